@@ -1,4 +1,5 @@
 import numpy as np
+from _classes.BioMLTrackingMixin import TrackedList
 
 class BioMLModelPropertiesMixin:
 
@@ -24,6 +25,18 @@ class BioMLModelPropertiesMixin:
             raise ValueError("compartments must be stored in a list")
         self._compartments = new_compartments
 
+    @property
+    def compartment_sizes(self):
+        """Getter for compartment sizes - compartment ID -> size, for the compartments whose size is known"""
+        return self._compartment_sizes
+    
+    @compartment_sizes.setter
+    def compartment_sizes(self, new_sizes):
+        """Setter for compartment sizes - Ensures it is a dictionary"""
+        if not isinstance(new_sizes, dict):
+            raise ValueError("compartment sizes must be stored in a dictionary")
+        self._compartment_sizes = new_sizes
+
 
 
 
@@ -37,7 +50,8 @@ class BioMLModelPropertiesMixin:
         """Setter for reactions - Ensures it is a list"""
         if not isinstance(new_reactions, list):
             raise ValueError("reactions must be stored in a list")
-        self._reactions = new_reactions
+        self._reactions = TrackedList(new_reactions, owner=self)
+        self._on_items_changed(new_reactions)
 
     @property
     def species(self):
@@ -49,7 +63,8 @@ class BioMLModelPropertiesMixin:
         """Setter for species - Ensures it is a list"""
         if not isinstance(new_species, list):
             raise ValueError("species must be stored in a list")
-        self._species = new_species
+        self._species = TrackedList(new_species, owner=self)
+        self._on_items_changed(new_species)
 
     @property
     def parameters(self):
@@ -1,4 +1,6 @@
 from sympy import Basic
+from _modules._constants import KINETIC_LAW_FORM_PARSED
+from _classes.BioMLTrackingMixin import TrackedList
 
 class BioMLReactionPropertiesMixin:
 
@@ -192,6 +194,10 @@ class BioMLReactionPropertiesMixin:
     def sp_kinetic_law(self, skl):
         if isinstance(skl, Basic):
             self._sp_kinetic_law = skl
+            formula = self._expanded_kinetic_law if self._expanded_kinetic_law else self._kinetic_law
+            if formula:
+                # the expression becomes the parsed form of the current kinetic law, so the law is not parsed again
+                self._sympy_forms = {formula: {KINETIC_LAW_FORM_PARSED: skl}}
         else:
             raise ValueError("Input for Sympy Kinetic Law(sp_kinetic_law) must be a Sympy Expression")
         
@@ -229,7 +235,8 @@ class BioMLReactionPropertiesMixin:
     @reactants.setter
     def reactants(self, reactants):
         if isinstance(reactants, list):
-            self._reactants = reactants
+            self._reactants = TrackedList(reactants, owner=self)
+            self._on_items_changed(reactants)
         else:
             raise ValueError("Input for reactants must be a list")
         
@@ -242,7 +249,8 @@ class BioMLReactionPropertiesMixin:
     @products.setter
     def products(self, products):
         if isinstance(products, list):
-            self._products = products
+            self._products = TrackedList(products, owner=self)
+            self._on_items_changed(products)
         else:
             raise ValueError("Input for products must be a list")
         
@@ -294,4 +302,43 @@ class BioMLReactionPropertiesMixin:
         if isinstance(flag, bool):
             self._mass_action = flag
         else:
-            raise ValueError("Input for \"mass\" actions must be a Boolean!")
\ No newline at end of file
+            raise ValueError("Input for \"mass\" actions must be a Boolean!")
+        
+
+    @property
+    def mass_action_tier(self):
+        return self._mass_action_tier
+    
+    @mass_action_tier.setter
+    def mass_action_tier(self, tier):
+        if isinstance(tier, str):
+            self._mass_action_tier = tier
+        else:
+            raise ValueError("Input for the mass-action tier must be a string!")
+
+
+
+    @property
+    def forward_kinetic_orders(self):
+        return self._forward_kinetic_orders
+    
+    @forward_kinetic_orders.setter
+    def forward_kinetic_orders(self, orders):
+        if isinstance(orders, dict):
+            self._forward_kinetic_orders = orders
+            self._touch_kinetic_orders()
+        else:
+            raise ValueError("Input for forward kinetic orders must be a dictionary!")
+        
+
+    @property
+    def reverse_kinetic_orders(self):
+        return self._reverse_kinetic_orders
+    
+    @reverse_kinetic_orders.setter
+    def reverse_kinetic_orders(self, orders):
+        if isinstance(orders, dict):
+            self._reverse_kinetic_orders = orders
+            self._touch_kinetic_orders()
+        else:
+            raise ValueError("Input for reverse kinetic orders must be a dictionary!")
@@ -64,12 +64,15 @@ class BioMLSpeciesPropertiesMixin:
         
     @property
     def charge(self):
+        self.resolve_chebi()
         return self._charge
     
     @charge.setter
     def charge(self, charge):
         if isinstance(charge, (int, float)):
             self._charge = charge
+            self._keep_charge = True
+            self._touch()
         else:
             raise ValueError("Input for Charge must be a number")
         
@@ -86,6 +89,7 @@ class BioMLSpeciesPropertiesMixin:
         
     @property
     def compound(self):
+        self.resolve_chebi()
         return self._compound
     
     @compound.setter
@@ -97,12 +101,15 @@ class BioMLSpeciesPropertiesMixin:
 
     @property
     def composition(self):
+        self.resolve_chebi()
         return self._composition
     
     @composition.setter
     def composition(self, new_comp):
         if isinstance(new_comp, dict):
             self._composition = new_comp
+            self._composition_vector = None     # encoded again on the next access
+            self._touch()
         else:
             raise ValueError("Input must be a dictionary mapping elements to their corresponding quantity in the species")
         
@@ -115,4 +122,26 @@ class BioMLSpeciesPropertiesMixin:
         if isinstance(new_code, str):
             self._chebi_code = new_code
         else:
-            raise ValueError("Input for chebi code must be a string")
\ No newline at end of file
+            raise ValueError("Input for chebi code must be a string")
+
+    @property
+    def composition_source(self):
+        return self._composition_source
+    
+    @composition_source.setter
+    def composition_source(self, source):
+        if isinstance(source, str):
+            self._composition_source = source
+        else:
+            raise ValueError("Input for composition source must be a string")
+
+    @property
+    def charge_source(self):
+        return self._charge_source
+    
+    @charge_source.setter
+    def charge_source(self, source):
+        if isinstance(source, str):
+            self._charge_source = source
+        else:
+            raise ValueError("Input for charge source must be a string")
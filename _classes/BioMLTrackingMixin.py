@@ -0,0 +1,92 @@
+class TrackedList(list):
+    """
+        A list which notifies its owner when its items are added, removed, replaced or reordered.
+        It is used for the species and reactions of a model and for the reactants and products of a reaction,
+        so that in-place changes such as "reaction.reactants.append(...)" invalidate the matrices cached on the model.
+    """
+
+    def __init__(self, iterable=(), owner=None):
+        super().__init__(iterable)
+        self._owner = owner
+
+    def _changed(self, added=()):
+        if self._owner is not None:
+            self._owner._on_items_changed(added)
+
+    def append(self, item):
+        super().append(item)
+        self._changed([item])
+
+    def extend(self, items):
+        items = list(items)
+        super().extend(items)
+        self._changed(items)
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def insert(self, position, item):
+        super().insert(position, item)
+        self._changed([item])
+
+    def __setitem__(self, key, value):
+        value = list(value) if isinstance(key, slice) else value
+        super().__setitem__(key, value)
+        self._changed(value if isinstance(key, slice) else [value])
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def remove(self, item):
+        super().remove(item)
+        self._changed()
+
+    def pop(self, *args):
+        item = super().pop(*args)
+        self._changed()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._changed()
+
+    def reverse(self):
+        super().reverse()
+        self._changed()
+
+
+
+class BioMLTrackingMixin:
+    """
+        Propagates structural changes of species, species references and reactions up to the model they belong to.
+        Every object knows its owner (a species reference is owned by its reaction, a reaction or a species by its model),
+        and "_touch" climbs the chain until the model bumps its structural version.
+    """
+
+    _owner = None
+
+    def _touch(self):
+        owner = self._owner
+        if owner is not None:
+            owner._touch()
+
+    def _touch_kinetic_orders(self):
+        # kinetic orders are not structural, the model only drops the kinetic-order matrices it derived from them
+        owner = self._owner
+        if owner is not None:
+            owner._touch_kinetic_orders()
+
+    def _adopt(self, items):
+        for item in items:
+            if isinstance(item, BioMLTrackingMixin):
+                item._owner = self
+
+    def _on_items_changed(self, added=()):
+        self._adopt(added)
+        self._touch()
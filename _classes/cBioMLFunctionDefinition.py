@@ -64,3 +64,7 @@ class BioMLFunctionDefinition():
             self._arguments = args
         else:
             raise ValueError("Input for arguments of a FunctionDefinition instance must be list!")
+
+    @property
+    def body(self):
+        return self._sbml_function_definition.getBody()
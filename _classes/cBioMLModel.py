@@ -1,13 +1,17 @@
 from _classes.BioMLModelPropertiesMixin import *
+from _classes.BioMLTrackingMixin import *
+import _modules._chebi_resolver as chebi_resolver
+import _modules._element_alphabet as element_alphabet
 
-class BioMLModel(BioMLModelPropertiesMixin):
+class BioMLModel(BioMLModelPropertiesMixin, BioMLTrackingMixin):
 
     def __init__(self, ID):
 
         self._ID: str = ID
         self._compartments: list[str] = []
-        self._reactions: list[object] = []
-        self._species: list[object] = []
+        self._compartment_sizes: dict[str, float] = {}     # compartment ID -> size, e.g. the volume in the rate laws
+        self._reactions: list[object] = TrackedList(owner=self)
+        self._species: list[object] = TrackedList(owner=self)
         self._parameters: list[object] = []
         self._function_definitions: list[object] = []
         self._kinetic_rate_constants_vector: np.ndarray = None
@@ -18,9 +22,45 @@ class BioMLModel(BioMLModelPropertiesMixin):
 
         self._element_indices_dict = {}
 
+        self._version: int = 0     # structural version, bumped whenever species or reactions are changed
+        self._matrix_cache_key: tuple = None
+        self._matrix_cache: dict = None
+
     def get_id(self):
 
         return self._ID
+
+    @property
+    def version(self):
+        return self._version
+
+    def _touch(self):
+
+        self._version += 1
+
+        self._matrix_cache_key = None
+        self._matrix_cache = None
+
+    def _touch_kinetic_orders(self):
+
+        # the stoichiometric matrices stay valid, only the kinetic-order matrices are built again
+        if self._matrix_cache is not None:
+            self._matrix_cache.pop("kinetic_orders", None)
+
+    def get_matrix_cache(self, key: tuple) -> dict:
+        """
+            Returns the matrices cached for the key, or None if the cache is empty or was built for another key (e.g. an older version)
+        """
+
+        if self._matrix_cache is not None and self._matrix_cache_key == key:
+            return self._matrix_cache
+
+        return None
+
+    def set_matrix_cache(self, key: tuple, matrices: dict) -> None:
+
+        self._matrix_cache_key = key
+        self._matrix_cache = matrices
     
     def get_list_of_compartments(self):
 
@@ -48,9 +88,9 @@ class BioMLModel(BioMLModelPropertiesMixin):
     
     def get_element_indices_dict(self):
 
-        if self._element_indices_dict():
+        if self._element_indices_dict:
 
-            return self._element_indices_dict()
+            return self._element_indices_dict
         
         else:
 
@@ -66,22 +106,41 @@ class BioMLModel(BioMLModelPropertiesMixin):
         
 
 
-    def mk_element_indices_dict(self):
+    def resolve_species_compositions(self):
+        """
+            Resolves the compound, charge and composition of all species (and species references) whose ChEBI resolution was deferred.
+            All their ChEBI codes are resolved together, so a model pays for ChEBI only once and only when compositions or charges are needed.
+        """
 
-        counter = 0
+        pending_species = [single_species for single_species in self._species if single_species.has_pending_chebi_resolution()]
 
-        for single_species in self._species:
+        for reaction in self._reactions:
 
-            if single_species.composition is None:
-                raise ValueError(f"Chemical composition is not known for {single_species.name if single_species.name is not None else single_species.ID}\n       Elemental matrix cannot be costructed!")
+            pending_species.extend(species_ref for species_ref in reaction.get_list_of_reactants() + reaction.get_list_of_products() if species_ref.has_pending_chebi_resolution())
 
-            for compound in single_species.composition.keys():
+        if not pending_species:
+            return
 
-                if compound not in self._element_indices_dict:
+        entries = chebi_resolver.get_default_resolver().resolve_many([chebi_code for single_species in pending_species for chebi_code in single_species.get_pending_chebi_codes()])
 
-                    self._element_indices_dict[compound] = counter
+        for single_species in pending_species:
+            single_species.resolve_chebi(entries)
+
+
+    def mk_element_indices_dict(self):
+        """
+            Returns the element -> row dictionary of the elemental matrix. The rows are the indices of the process-wide element alphabet,
+            so they are the same for all models; the dictionary is rebuilt on every call.
+        """
+
+        self.resolve_species_compositions()
+
+        for single_species in self._species:
+
+            if single_species.get_composition_vector() is None:
+                raise ValueError(f"Chemical composition is not known for {single_species.name if single_species.name is not None else single_species.ID}\n       Elemental matrix cannot be costructed!")
 
-                    counter += 1
+        self._element_indices_dict = element_alphabet.get_default_alphabet().indices_dict()
 
         return self._element_indices_dict
 
@@ -1,9 +1,13 @@
 from _classes.BioMLReactionPropertiesMixin import *
+from _classes.BioMLTrackingMixin import *
 from typing import Union
+import sympy as sp
 from sympy import Expr as sympy_expression
+from _modules._constants import *
+import _modules._ast_to_sympy as ast_to_sympy
 
 
-class BioMLReaction(BioMLReactionPropertiesMixin):
+class BioMLReaction(BioMLReactionPropertiesMixin, BioMLTrackingMixin):
 
     _counter: int = 0 #Class variable to track the index
 
@@ -27,12 +31,16 @@ class BioMLReaction(BioMLReactionPropertiesMixin):
         self._sp_kinetic_law: sympy_expression = None #sympy expression
         self._expanded_kinetic_law: str = None #Not set yet
         self._kinetic_law_type: str = None
-        self._reactants: list[object] = []
-        self._products: list[object] = []
+        self._reactants: list[object] = TrackedList(owner=self)
+        self._products: list[object] = TrackedList(owner=self)
         self._boundary_condition: bool = False
         self._local_parameters: list[object] = None
         self._klaw_variables: list[str] = []
         self._mass_action: bool = None
+        self._mass_action_tier: str = None #The tier of the mass-action classifier which decided the reaction
+        self._forward_kinetic_orders: dict[str, float] = None #Species ID -> exponent in the forward term of the rate law
+        self._reverse_kinetic_orders: dict[str, float] = None #Species ID -> exponent in the reverse term of the rate law
+        self._sympy_forms: dict[str, dict] = {} #Kinetic law string -> its Sympy forms, computed once when first needed
 
 
     @classmethod
@@ -48,6 +56,7 @@ class BioMLReaction(BioMLReactionPropertiesMixin):
 
     def reset_index(self):
         self._index = None
+        self._touch()
 
 
     def assign_index(self):
@@ -56,6 +65,7 @@ class BioMLReaction(BioMLReactionPropertiesMixin):
         else:
             self._index = BioMLReaction._counter
             BioMLReaction._counter += 1
+            self._touch()
             print(f"Index \"{self._index}\" has now been assigned to this reaction")
 
 
@@ -87,4 +97,62 @@ class BioMLReaction(BioMLReactionPropertiesMixin):
     
     def get_list_of_reactants(self):
 
-        return self._reactants
\ No newline at end of file
+        return self._reactants
+    
+
+
+
+    def get_sympy_kinetic_law(self, form: str = KINETIC_LAW_FORM_PARSED, symbolic_budget: object = None) -> sympy_expression:
+        """
+            Returns a Sympy form of the kinetic law (the expanded one if function definitions were expanded), parsing and transforming it only once.
+            The forms are cached under the kinetic law string, so they are computed again only if the kinetic law changes.
+            The law is parsed by libsbml and translated to Sympy node by node, so names like "E" or "beta" are plain symbols and not Sympy constants or functions.
+            Readers which have the libsbml tree of the law set sp_kinetic_law instead, and the law is not parsed at all.
+
+            Args:
+                form (str): "parsed", "simplified" (sympy.simplify), "cancelled" (sympy.cancel) or "expanded" (sympy.expand of the cancelled form)
+                symbolic_budget (SymbolicBudget): if given, the Sympy operations run within the time budget of the reaction
+
+            Raises:
+                SymbolicTimeout: if an operation runs out of the budget; nothing is cached for the form, so it can be tried again with more time
+
+            Returns:
+                sympy.Expr: the requested form
+        """
+
+        formula = self._expanded_kinetic_law if self._expanded_kinetic_law else self._kinetic_law
+
+        if not formula:
+            raise ValueError(f"There is not a kinetic formula for reaction {self._ID}")
+
+        if formula not in self._sympy_forms:
+            # only the forms of the current kinetic law are kept
+            self._sympy_forms = {formula: {}}
+
+        forms = self._sympy_forms[formula]
+
+        if form in forms:
+            return forms[form]
+
+        def transform(function, expression):
+            if symbolic_budget is None:
+                return function(expression)
+            return symbolic_budget.run(self._ID, function, expression)
+
+        if form == KINETIC_LAW_FORM_PARSED:
+            forms[form] = ast_to_sympy.formula_to_sympy(formula)
+            self._sp_kinetic_law = forms[form]
+
+        elif form == KINETIC_LAW_FORM_SIMPLIFIED:
+            forms[form] = transform(sp.simplify, self.get_sympy_kinetic_law(KINETIC_LAW_FORM_PARSED))
+
+        elif form == KINETIC_LAW_FORM_CANCELLED:
+            forms[form] = transform(sp.cancel, self.get_sympy_kinetic_law(KINETIC_LAW_FORM_PARSED))
+
+        elif form == KINETIC_LAW_FORM_EXPANDED:
+            forms[form] = transform(sp.expand, self.get_sympy_kinetic_law(KINETIC_LAW_FORM_CANCELLED, symbolic_budget))
+
+        else:
+            raise ValueError(f"Unknown form of the kinetic law: \"{form}\"")
+
+        return forms[form]
@@ -1,7 +1,12 @@
 from _classes.BioMLSpeciesPropertiesMixin import *
+from _classes.BioMLTrackingMixin import *
+import _modules._chebi_resolver as chebi_resolver
+from _modules._chebi_cache import ChebiCache
+import _modules._element_alphabet as element_alphabet
+from _modules._constants import *
 
 
-class BioMLSpecies(BioMLSpeciesPropertiesMixin):
+class BioMLSpecies(BioMLSpeciesPropertiesMixin, BioMLTrackingMixin):
 
     _counter: int = 0
 
@@ -22,7 +27,13 @@ class BioMLSpecies(BioMLSpeciesPropertiesMixin):
         self._thermodynamic_rate_constant: str = None
         self._compound: str = None  #This is the scientific name of the species like CO2, H2O, CH4
         self._composition: dict = None
+        self._composition_vector: tuple = None     # (element indices, counts) of the composition over the process-wide element alphabet
         self._chebi_code: str = None
+        self._pending_chebi_codes: list[str] = None     # ChEBI codes which are resolved on the first access to compound, charge or composition, or in one stage by BioMLModel.resolve_species_compositions
+        self._compound_from_chebi: bool = False     # True if the compound was filled in by the ChEBI resolution, so it is not used as a name
+        self._keep_charge: bool = False     # True if the charge was given explicitly and must not be replaced by the ChEBI charge
+        self._composition_source: str = None     # where the compound and composition came from, e.g. "fbc" or "chebi"
+        self._charge_source: str = None     # where the charge came from, e.g. "fbc", "sbml_charge" or "chebi"
 
     @classmethod
     def get_current_index(cls):
@@ -42,12 +53,81 @@ class BioMLSpecies(BioMLSpeciesPropertiesMixin):
     
     def get_charge(self):
 
-        return self._charge
+        return self.charge
     
     def get_compartment(self):
 
         return self._compartment
+
+    def get_composition_vector(self):
+        """
+            Returns the composition as a compact integer vector over the process-wide element alphabet:
+            the sorted element indices (int32) and their counts (int64), or None if the composition is not known
+        """
+
+        if self._composition_vector is None and self.composition is not None:
+            self._composition_vector = element_alphabet.get_default_alphabet().encode(self._composition)
+
+        return self._composition_vector
     
+    def defer_chebi_resolution(self, chebi_codes: list[str]):
+        """
+            Stores the ChEBI codes of the species so that its compound, charge and composition are resolved only when they are first accessed.
+            The first code having a formula, a charge or a composition is used, and values which were set explicitly are not replaced.
+        """
+
+        self._pending_chebi_codes = list(chebi_codes) if chebi_codes else None
+
+    def has_pending_chebi_resolution(self):
+
+        return bool(self._pending_chebi_codes)
+
+    def get_pending_chebi_codes(self):
+
+        return list(self._pending_chebi_codes) if self._pending_chebi_codes else []
+
+    def resolve_chebi(self, entries: dict = None):
+        """
+            Resolves the deferred ChEBI codes of the species. entries are the entries of a resolution stage (see ChebiResolver.resolve_many)
+            which already covers the codes; without them the codes are resolved here.
+        """
+
+        if not self._pending_chebi_codes:
+            return
+
+        chebi_codes = self._pending_chebi_codes
+
+        self._pending_chebi_codes = None
+
+        if entries is None:
+            entries = chebi_resolver.get_default_resolver().resolve_many(chebi_codes)
+
+        formula, charge, composition = None, None, None
+
+        for chebi_code in chebi_codes:
+
+            entry = entries.get(ChebiCache.normalize_code(chebi_code)) if chebi_code else None
+
+            if entry is None: continue
+
+            formula, charge, composition = entry["formula"], entry["charge"], entry["composition"]
+
+            if formula is not None or charge is not None or composition is not None:
+                break
+
+        if formula is not None and self._compound is None:
+            self._compound = formula
+            self._compound_from_chebi = True
+
+        if composition is not None and self._composition is None:
+            self._composition = composition
+            self._composition_vector = element_alphabet.get_default_alphabet().encode(composition)
+            self._composition_source = SOURCE_CHEBI
+
+        if charge is not None and not self._keep_charge:
+            self._charge = charge
+            self._charge_source = SOURCE_CHEBI
+
     @classmethod
     def reset_counter(cls, new_counter_value = 0):
         cls._counter = new_counter_value  # Reset the class-level counter
\ No newline at end of file
@@ -6,6 +6,7 @@ class BioMLSpeciesReference(BioMLSpecies):
     def __init__(self, species_instance):
         # Copy all attributes from parent dynamically
         self.__dict__.update(vars(species_instance))
+        self._species_instance: BioMLSpecies = species_instance     # the ChEBI codes are resolved once, for the species and all its references
         self._reaction_id: str = None
         self._stoichiometry: float = None
 
@@ -17,6 +18,7 @@ class BioMLSpeciesReference(BioMLSpecies):
     def stoichiometry(self, stoichiometry):
         if isinstance(stoichiometry, (int, float)):
             self._stoichiometry = stoichiometry
+            self._touch()
         else:
             raise ValueError("Input for Stoichiometry must be a number!")
         
@@ -34,6 +36,34 @@ class BioMLSpeciesReference(BioMLSpecies):
 
 
 
+    def resolve_chebi(self, entries: dict = None):
+        """
+            Resolves the species the reference was copied from and takes over its resolved compound, composition and charge,
+            unless they were set on the reference itself
+        """
+
+        if not self._pending_chebi_codes:
+            return
+
+        self._pending_chebi_codes = None
+
+        species = self._species_instance
+
+        species.resolve_chebi(entries)
+
+        if self._compound is None:
+            self._compound = species._compound
+            self._compound_from_chebi = species._compound_from_chebi
+
+        if self._composition is None and species._composition is not None:
+            self._composition = species._composition
+            self._composition_vector = species._composition_vector
+            self._composition_source = species._composition_source
+
+        if not self._keep_charge and species._charge_source == SOURCE_CHEBI:
+            self._charge = species._charge
+            self._charge_source = species._charge_source
+
     def get_stoichiometry(self):
 
         return self._stoichiometry
@@ -0,0 +1,214 @@
+import libsbml
+import sympy as sp
+
+import _modules._exceptions as exceptions
+
+
+
+
+_symbols: dict = {}     # the interned symbols, one sp.Symbol per name
+
+
+
+_FUNCTIONS: dict = {
+    libsbml.AST_FUNCTION_EXP: sp.exp,
+    libsbml.AST_FUNCTION_LN: sp.log,
+    libsbml.AST_FUNCTION_ABS: sp.Abs,
+    libsbml.AST_FUNCTION_FLOOR: sp.floor,
+    libsbml.AST_FUNCTION_CEILING: sp.ceiling,
+    libsbml.AST_FUNCTION_FACTORIAL: sp.factorial,
+    libsbml.AST_FUNCTION_SIN: sp.sin,
+    libsbml.AST_FUNCTION_COS: sp.cos,
+    libsbml.AST_FUNCTION_TAN: sp.tan,
+    libsbml.AST_FUNCTION_SEC: sp.sec,
+    libsbml.AST_FUNCTION_CSC: sp.csc,
+    libsbml.AST_FUNCTION_COT: sp.cot,
+    libsbml.AST_FUNCTION_SINH: sp.sinh,
+    libsbml.AST_FUNCTION_COSH: sp.cosh,
+    libsbml.AST_FUNCTION_TANH: sp.tanh,
+    libsbml.AST_FUNCTION_SECH: sp.sech,
+    libsbml.AST_FUNCTION_CSCH: sp.csch,
+    libsbml.AST_FUNCTION_COTH: sp.coth,
+    libsbml.AST_FUNCTION_ARCSIN: sp.asin,
+    libsbml.AST_FUNCTION_ARCCOS: sp.acos,
+    libsbml.AST_FUNCTION_ARCTAN: sp.atan,
+    libsbml.AST_FUNCTION_ARCSEC: sp.asec,
+    libsbml.AST_FUNCTION_ARCCSC: sp.acsc,
+    libsbml.AST_FUNCTION_ARCCOT: sp.acot,
+    libsbml.AST_FUNCTION_ARCSINH: sp.asinh,
+    libsbml.AST_FUNCTION_ARCCOSH: sp.acosh,
+    libsbml.AST_FUNCTION_ARCTANH: sp.atanh,
+    libsbml.AST_FUNCTION_ARCSECH: sp.asech,
+    libsbml.AST_FUNCTION_ARCCSCH: sp.acsch,
+    libsbml.AST_FUNCTION_ARCCOTH: sp.acoth,
+    libsbml.AST_FUNCTION_MAX: sp.Max,
+    libsbml.AST_FUNCTION_MIN: sp.Min,
+    libsbml.AST_RELATIONAL_EQ: sp.Eq,
+    libsbml.AST_RELATIONAL_NEQ: sp.Ne,
+    libsbml.AST_RELATIONAL_GT: sp.Gt,
+    libsbml.AST_RELATIONAL_GEQ: sp.Ge,
+    libsbml.AST_RELATIONAL_LT: sp.Lt,
+    libsbml.AST_RELATIONAL_LEQ: sp.Le,
+    libsbml.AST_LOGICAL_AND: sp.And,
+    libsbml.AST_LOGICAL_OR: sp.Or,
+    libsbml.AST_LOGICAL_XOR: sp.Xor,
+    libsbml.AST_LOGICAL_NOT: sp.Not,
+}
+
+
+
+_CONSTANTS: dict = {
+    libsbml.AST_CONSTANT_E: sp.E,
+    libsbml.AST_CONSTANT_PI: sp.pi,
+    libsbml.AST_CONSTANT_TRUE: sp.true,
+    libsbml.AST_CONSTANT_FALSE: sp.false,
+}
+
+
+
+
+# ********************************
+# *           Function           *
+# ********************************
+def get_symbol(name: str) -> sp.Symbol:
+    """
+        Returns the interned Sympy symbol of a name. Every name is a plain symbol,
+        so identifiers like "lambda", "beta" or "E" never clash with Python keywords or Sympy functions and constants.
+
+        Args:
+            name (str): the name of the symbol
+
+        Returns:
+            sp.Symbol: the symbol, the same object for every call with the same name
+    """
+
+    symbol = _symbols.get(name)
+
+    if symbol is None:
+        symbol = _symbols[name] = sp.Symbol(name)
+
+    return symbol
+
+
+
+# ********************************
+# *           Function           *
+# ********************************
+def ast_to_sympy(ast_node: libsbml.ASTNode, function_definitions: dict = None) -> sp.Basic:
+    """
+        Builds a Sympy expression directly from a libsbml ASTNode tree, without printing the tree to a string and parsing the string again.
+        Names become interned symbols (see get_symbol). A call of a function definition is expanded by substituting the arguments
+        of the call into the translated body of the definition; calls of other functions become undefined Sympy functions.
+
+        Args:
+            ast_node (libsbml.ASTNode): the root of the tree, e.g. KineticLaw.getMath()
+            function_definitions (dict): maps the IDs of function definitions to their BioMLFunctionDefinition instances
+
+        Returns:
+            sp.Basic: the Sympy expression
+
+        Raises:
+            NotParsable: if the tree is empty or has a node without a Sympy counterpart (e.g. csymbol delay)
+    """
+
+    if ast_node is None:
+        raise exceptions.NotParsable("There is not a math expression to translate")
+
+    node_type = ast_node.getType()
+
+    args = [ast_to_sympy(ast_node.getChild(n), function_definitions) for n in range(ast_node.getNumChildren())]
+
+    if node_type == libsbml.AST_PLUS:
+        return sp.Add(*args)
+
+    if node_type == libsbml.AST_TIMES:
+        return sp.Mul(*args)
+
+    if node_type == libsbml.AST_MINUS:
+        return -args[0] if len(args) == 1 else args[0] - sp.Add(*args[1:])
+
+    if node_type == libsbml.AST_DIVIDE:
+        return args[0] / args[1]
+
+    if node_type in (libsbml.AST_POWER, libsbml.AST_FUNCTION_POWER):
+        return sp.Pow(args[0], args[1])
+
+    if node_type == libsbml.AST_FUNCTION_ROOT:
+        # root(x) is the square root, root(n, x) the n-th root
+        return sp.Pow(args[-1], 1 / args[0] if len(args) == 2 else sp.Rational(1, 2))
+
+    if node_type == libsbml.AST_FUNCTION_LOG:
+        # the MathML <log/> is the common logarithm unless a <logbase> is given
+        return sp.log(args[-1], args[0] if len(args) == 2 else 10)
+
+    if node_type == libsbml.AST_INTEGER:
+        return sp.Integer(ast_node.getInteger())
+
+    if node_type in (libsbml.AST_REAL, libsbml.AST_REAL_E):
+        return sp.Float(ast_node.getReal())
+
+    if node_type == libsbml.AST_RATIONAL:
+        return sp.Rational(ast_node.getNumerator(), ast_node.getDenominator())
+
+    if node_type in (libsbml.AST_NAME, libsbml.AST_NAME_TIME, libsbml.AST_NAME_AVOGADRO):
+        return get_symbol(ast_node.getName())
+
+    if node_type in _CONSTANTS:
+        return _CONSTANTS[node_type]
+
+    if node_type in _FUNCTIONS:
+        return _FUNCTIONS[node_type](*args)
+
+    if node_type == libsbml.AST_FUNCTION_PIECEWISE:
+        # value1, condition1, value2, condition2, ..., [otherwise]
+        pieces = [(args[n], args[n + 1]) for n in range(0, len(args) - 1, 2)]
+
+        if len(args) % 2 == 1:
+            pieces.append((args[-1], sp.true))
+
+        return sp.Piecewise(*pieces)
+
+    if node_type == libsbml.AST_FUNCTION:
+
+        function_definition = (function_definitions or {}).get(ast_node.getName())
+
+        if function_definition is not None:
+            body = ast_to_sympy(function_definition.body, function_definitions)
+
+            # the substitution is simultaneous, so an argument passed on to another parameter name is not replaced twice
+            return body.xreplace({get_symbol(argument): arg for argument, arg in zip(function_definition.arguments, args)})
+
+        return sp.Function(ast_node.getName())(*args)
+
+    raise exceptions.NotParsable(f"The math element \"{ast_node.getName() or node_type}\" cannot be translated to Sympy")
+
+
+
+# ********************************
+# *           Function           *
+# ********************************
+def formula_to_sympy(formula: str) -> sp.Basic:
+    """
+        Parses an infix formula with libsbml and translates the tree to Sympy (see ast_to_sympy).
+        The formula is read with the SBML Level 1 syntax of KineticLaw.getFormula, in which "log" is the natural logarithm,
+        and with the Level 3 syntax if that fails (e.g. for the "&&" or "==" of an expanded function definition).
+
+        Args:
+            formula (str): the formula, e.g. a kinetic law with its function definitions expanded
+
+        Returns:
+            sp.Basic: the Sympy expression
+
+        Raises:
+            NotParsable: if libsbml cannot parse the formula
+    """
+
+    ast_node = libsbml.parseFormula(formula)
+
+    if ast_node is None:
+        ast_node = libsbml.parseL3Formula(formula)
+
+    if ast_node is None:
+        raise exceptions.NotParsable(f"The formula \"{formula}\" cannot be parsed")
+
+    return ast_to_sympy(ast_node)
@@ -1,8 +1,6 @@
 # Importing external packages
 from libcellml import Parser, Validator, Analyser, AnalyserExternalVariable, Importer, cellmlElementTypeAsString, Model as CellMLModel
 import numpy as np
-import chemparse as chp
-import libchebipy as chb
 import libsbml
 import sympy as sp
 import re
@@ -15,6 +13,11 @@ import os
 import _modules._utility as utility
 from pathlib import Path, PurePath
 import _modules._constants as cn
+import _modules._chebi_resolver as chebi_resolver
+import _modules._kinetic_orders as kinetic_orders
+import _modules._ast_to_sympy as ast_to_sympy
+import _modules._exceptions as exceptions
+from _modules._symbolic_budget import SymbolicBudget
 
 from xml.dom.minidom import parseString
 
@@ -29,17 +32,24 @@ from _classes.cBioMLSpeciesReference import *
 class CellmlReader:
 
 
+    def __init__(self):
+
+        self._symbolic_budget: SymbolicBudget = SymbolicBudget()
+
+
 
     # ********************************
     # *           Function           *
     # ********************************
-    def read_file( self, file_path: Union[str, Path], cellml_strict_mode: bool = False) -> BioMLModel:
+    def read_file( self, file_path: Union[str, Path], cellml_strict_mode: bool = False, symbolic_budget: SymbolicBudget = None) -> BioMLModel:
         """
             Reads a CellML file and converts it to a BioML if it is convertible.
             
             Args: 
                 file_path (str or Path): The path to the CellML file.
                 cellml_strict_mode (bool, optional): Whether to enforce strict CellML format rules. Defaults to False.
+                symbolic_budget (SymbolicBudget, optional): the time budget of the Sympy simplifications of the equations, charged to the variable each equation defines.
+                                                            Defaults to no limit.
             
             Returns:
                 BioMLModel class, to which different functions can be applied.
@@ -60,6 +70,8 @@ class CellmlReader:
         
         cellml_model_name = os.path.basename(file_path)
 
+        self._symbolic_budget = symbolic_budget if symbolic_budget is not None else SymbolicBudget()
+
         cellml_model = CellmlReader._read_analyse_cellml_model( file_path, cellml_strict_mode )
 
         cellml_contents = self._extract_cellml_content(cellml_model) #returns a dictionary containing "cellml_eqs", "cellml_flattened_eqs", "cellml_species_instances", "cellml_vars_instances", and "cellml_ast_nodes"
@@ -67,6 +79,9 @@ class CellmlReader:
         cellml_vars_instances = cellml_contents["cellml_vars_instances"]
 
         variable_type_buckets = self._classify_variables(cellml_vars_instances)
+
+        # All distinct ChEBI codes of the model are resolved together, so the species and coefficients below do not look them up one by one
+        CellmlReader._resolve_chebi_codes(cellml_vars_instances)
         
         """
         "variables_type_buckets" is a dictionary as shown below. It contains all kinds of variables encoded in the CellML file
@@ -117,6 +132,12 @@ class CellmlReader:
 
                 return biomlmodel
 
+            elif mass_action is None:
+
+                print(f"\nThe Mass Action check of CellML model \"{Path(cellml_model_name).stem.upper()}\" is undetermined, the symbolic operations on {', '.join(self._symbolic_budget.timed_out)} ran out of their time budget\nAnd it cannot be converted to a BioML Model")
+
+                return None
+
             else:
 
                 print(f"\nCellML model \"{Path(cellml_model_name).stem.upper()}\" has (an) equation(s) not governed by Mass Action Kinetics\nAnd cannot be converted to a BioML Model")
@@ -213,7 +234,7 @@ class CellmlReader:
 
                 continue
 
-        cellml_flattened_eqs = self._flatten_equations(cellml_eqs, cellml_vars_instances)
+        cellml_flattened_eqs = self._flatten_equations(cellml_ast_nodes)
 
         return {
             "cellml_eqs": cellml_eqs,
@@ -450,7 +471,7 @@ class CellmlReader:
 
             if all( char.isdigit() for char in name_code ):
 
-                compound, _ = CellmlReader._parse_using_chebi(name_code)
+                compound, _, _ = CellmlReader._parse_using_chebi(name_code)
 
             else:
 
@@ -575,7 +596,7 @@ class CellmlReader:
 
                     if all( char.isdigit() for char in name_code ):
 
-                        compound, _ = CellmlReader._parse_using_chebi(name_code)
+                        compound, _, _ = CellmlReader._parse_using_chebi(name_code)
 
                     else:
 
@@ -719,6 +740,7 @@ class CellmlReader:
             
             Returns:
                bool: True if any mass action pattern is found, False otherwise.
+               None: if no equation breaks the pattern but the simplification of some equations ran out of the symbolic budget.
         """
 
         cellml_vars_instances = cellml_contents["cellml_vars_instances"]
@@ -746,9 +768,23 @@ class CellmlReader:
                 if cellml_flattened_eqs.get(cellml_eq_lhs) is not None:
                     cellml_eq_rhs = str(cellml_flattened_eqs[cellml_eq_lhs])
 
-                    simp_cellml_eq = str(sp.simplify(cellml_flattened_eqs[cellml_eq_lhs]))
+                    try:
+
+                        sp_simp_cellml_eq = self._symbolic_budget.run(cellml_eq_lhs, sp.simplify, cellml_flattened_eqs[cellml_eq_lhs])
+
+                    except exceptions.SymbolicTimeout as e:
+
+                        utility.add_warning(f"\n{e}, so it is not known whether it follows Mass Action Kinetics")
+
+                        # an undetermined equation does not hide an equation which breaks Mass Action Kinetics
+                        if mass_action:
+                            mass_action = None
+
+                        continue
+
+                    simp_cellml_eq = str(sp_simp_cellml_eq)
 
-                    eq_mass_action = self._check_mass_action( cellml_eq_rhs, simp_cellml_eq, cellml_vars, species_in_cellml_eqs )
+                    eq_mass_action = self._check_mass_action( cellml_eq_rhs, simp_cellml_eq, cellml_vars, species_in_cellml_eqs, sp_simp_cellml_eq )
 
                     if not eq_mass_action:
 
@@ -805,7 +841,7 @@ class CellmlReader:
     # ********************************
     # *           Function           *
     # ********************************
-    def _check_mass_action(self, cellml_eq: str, simp_cellml_eq: str, cellml_vars: list[str], species_in_cellml_eq: list[str]) -> bool:
+    def _check_mass_action(self, cellml_eq: str, simp_cellml_eq: str, cellml_vars: list[str], species_in_cellml_eq: list[str], sp_simp_cellml_eq: sp.Basic = None) -> bool:
         """
             checks a single equation for the patterns found in Mass Action Kinetics equations
             
@@ -814,6 +850,7 @@ class CellmlReader:
                 simp_cellml_eq (str): a simplified (using sympy simplification command) CellML equation as a string
                 cellml_vars (list): a list containing all CellML variables
                 species_in_cellml_eq (list): a list containing the species used in this specific equation
+                sp_simp_cellml_eq (sympy.Basic): the simplified equation as a Sympy expression; if given, simp_cellml_eq is not parsed again
             
             Returns:
                bool: True if any mass action pattern is found, False otherwise.
@@ -834,7 +871,7 @@ class CellmlReader:
                             flag = False
         
         try:
-            fracs = self._find_frac_parts(simp_cellml_eq, cellml_vars)
+            fracs = self._find_frac_parts(sp_simp_cellml_eq if sp_simp_cellml_eq is not None else simp_cellml_eq, cellml_vars)
             if len(species_in_cellml_eq) > 0:
                 for i in range(len(species_in_cellml_eq)):
                     if species_in_cellml_eq[i] in fracs["denominator"]:
@@ -905,12 +942,12 @@ class CellmlReader:
     # ********************************
     # *           Function           *
     # ********************************
-    def _find_frac_parts( self, simp_cellml_eq: str, cellml_vars: list[str] ) -> dict:
+    def _find_frac_parts( self, simp_cellml_eq: Union[str, sp.Basic], cellml_vars: list[str] ) -> dict:
         """
             Finds the numerator and denominator of a fraction in a kinetic law string.
 
             Keyword Args:
-                simp_cellml_eq (str): Simplified CellMl equation using Sympy simplification method
+                simp_cellml_eq (str or sympy.Basic): Simplified CellMl equation using Sympy simplification method; a Sympy expression is used as it is, without parsing it again
                 cellml_vars (list[str]): A list containing CellML variables as strings
 
             Returns:
@@ -922,8 +959,11 @@ class CellmlReader:
         fracs = {"numerator": '', "denominator": ''}
 
         try:
-            symbol_dict = {cellml_var: sp.symbols(cellml_var) for cellml_var in cellml_vars}
-            cellml_sympy_eq = sp.sympify(simp_cellml_eq, locals=symbol_dict)
+            if isinstance(simp_cellml_eq, sp.Basic):
+                cellml_sympy_eq = simp_cellml_eq
+            else:
+                symbol_dict = {cellml_var: sp.symbols(cellml_var) for cellml_var in cellml_vars}
+                cellml_sympy_eq = sp.sympify(simp_cellml_eq, locals=symbol_dict)
             numerator, denominator = cellml_sympy_eq.as_numer_denom()
             fracs["numerator"] = str(numerator)
             fracs["denominator"] = str(denominator)
@@ -1032,41 +1072,34 @@ class CellmlReader:
     # ********************************
     # *           Function           *
     # ********************************
-    def _flatten_equations(self, cellml_eqs: list[str], cellml_vars_instances: list[object]) -> list:
+    def _flatten_equations(self, cellml_ast_nodes: list[libsbml.ASTNode]) -> list:
         """
             Returns a dictionary mapping variables (as strings) to flattened equations (sympy expressions) where all variables defined by equations have been substituted by their defnitions.
 
             Args:
-                cellml_eqs (list): containing all equations as they are imported from CellML
-                cellml_vars_instances (list): containing all variables in a CellML model
+                cellml_ast_nodes (list): containing the Abstract Syntax Trees of all equations as they are imported from CellML
 
             Returns:
                 list: containing the flattened equations
         """
 
-        # Step 1: Create symbol dictionary
-        cellml_vars = [var_instance.name() for var_instance in cellml_vars_instances]
-        symbol_dict = {var: sp.symbols(var) for var in cellml_vars}
-
-        # Step 2: Build equation dictionary: LHS string -> RHS sympy expression
+        # Step 1: Build equation dictionary: LHS string -> RHS sympy expression, translated from the tree of the equation
         eq_dict = {}
-        for cellml_eq in cellml_eqs:
-            if '=' in cellml_eq:
-                lhs_str = cellml_eq.split('=')[0].strip()
-                rhs_str = cellml_eq.split('=')[1].strip()
-                rhs_expr = sp.sympify(rhs_str.replace("^", "**"), locals=symbol_dict)
-                eq_dict[lhs_str] = rhs_expr
-
-        # Step 3: Recursive substitution
+        for cellml_ast_node in cellml_ast_nodes:
+            if cellml_ast_node.getType() == libsbml.AST_RELATIONAL_EQ and cellml_ast_node.getNumChildren() == 2:
+                lhs_str = libsbml.formulaToL3String(cellml_ast_node.getChild(0)).strip()
+                eq_dict[lhs_str] = ast_to_sympy.ast_to_sympy(cellml_ast_node.getChild(1))
+
+        # Step 2: Recursive substitution
         def substitute_all(expr, eq_dict):
             prev_expr = None
             while expr != prev_expr:
                 prev_expr = expr
                 for var_str, sub_expr in eq_dict.items():
-                    expr = expr.subs(symbol_dict[var_str], sub_expr)
+                    expr = expr.subs(ast_to_sympy.get_symbol(var_str), sub_expr)
             return expr
 
-        # Step 4: Determine which variables are used as intermediate
+        # Step 3: Determine which variables are used as intermediate
         substituted_vars = set()
         for rhs_expr in eq_dict.values():
             for symbol in rhs_expr.free_symbols:
@@ -1074,12 +1107,16 @@ class CellmlReader:
                 if var_name in eq_dict:
                     substituted_vars.add(var_name)
 
-        # Step 5: Flatten and filter
+        # Step 4: Flatten and filter
         flattened_eqs = {}
         for var, rhs_expr in eq_dict.items():
             if var not in substituted_vars:
                 flattened_rhs = substitute_all(rhs_expr, eq_dict)
-                flattened_eqs[var] = sp.simplify(flattened_rhs)
+                try:
+                    flattened_eqs[var] = self._symbolic_budget.run(var, sp.simplify, flattened_rhs)
+                except exceptions.SymbolicTimeout:
+                    # the equation is kept as it is, the mass-action check marks it undetermined
+                    flattened_eqs[var] = flattened_rhs
 
         return flattened_eqs
     
@@ -1171,6 +1208,9 @@ class CellmlReader:
 
             biomlmodel_reaction.kinetic_law = str(sympy_expr_eq).replace('**', '^')
 
+            # the flattened equation is already the Sympy form of the law, the string is printed by Sympy and is not parsed again
+            biomlmodel_reaction.sp_kinetic_law = sympy_expr_eq
+
             biomlmodel_reaction.kinetic_law_type = 'Mass Action'
 
             biomlmodel_species_list = []
@@ -1181,6 +1221,10 @@ class CellmlReader:
 
             local_parameters = []
 
+            forward_kinetic_orders = {}
+
+            reverse_kinetic_orders = {}
+
             forward_rate_constant = str(forward_rate_contents["rate_constant"])
 
             cellml_forward_rate_instance = self._return_cellml_parameter_instance( forward_rate_constant, cellml_vars_instances )
@@ -1273,6 +1317,8 @@ class CellmlReader:
 
                     biomlmodel_reactants_list.append(biomlmodel_species_reference)
 
+                    forward_kinetic_orders[cellml_id] = forward_rate_contents["kinetic_orders"][species_name]
+
             reverse_rate_constant = str(reverse_rate_contents["rate_constant"])
 
             cellml_reverse_rate_instance = self._return_cellml_parameter_instance(reverse_rate_constant, cellml_vars_instances)
@@ -1361,6 +1407,8 @@ class CellmlReader:
 
                     biomlmodel_products_list.append(biomlmodel_species_reference)
 
+                    reverse_kinetic_orders[cellml_id] = reverse_rate_contents["kinetic_orders"][species_name]
+
             for species in biomlmodel_species_list:
                 if species not in biomlmodel.species:
                     biomlmodel.species.append(species)
@@ -1373,6 +1421,10 @@ class CellmlReader:
 
             biomlmodel_reaction.products = biomlmodel_products_list
 
+            biomlmodel_reaction.forward_kinetic_orders = forward_kinetic_orders
+
+            biomlmodel_reaction.reverse_kinetic_orders = reverse_kinetic_orders
+
             biomlmodel_reactions_list.append(biomlmodel_reaction)
 
         biomlmodel.reactions = biomlmodel_reactions_list
@@ -1523,6 +1575,7 @@ class CellmlReader:
             Returns:
                 dict: A dictionary containing:
                     - 'stoichiometry' (dict): A mapping of species names to their integer exponents.
+                    - 'kinetic_orders' (dict): A mapping of species names to their exponents as floats (NaN if a species is not a plain factor).
                     - 'rate_constant' (sympy.Basic): The remaining expression after substituting species with 1.
 
             Raises:
@@ -1550,6 +1603,7 @@ class CellmlReader:
 
         return {
             'stoichiometry': stoichiometry,
+            'kinetic_orders': kinetic_orders.kinetic_orders(rate_expr, species_str_list),
             'rate_constant': substituted_expr
         }
 
@@ -1638,43 +1692,33 @@ class CellmlReader:
     # *           Function           *
     # ********************************
     @staticmethod
-    def _parse_using_chebi( chebi_code: str ) -> tuple[str, int, dict]:
-
+    def _resolve_chebi_codes(cellml_variables: list[object]) -> dict:
         """
-            This function receives a string which includes ChEBI code for the compound and uses EBI API to search for the compounds chemical composition and fetches it
-            Then using the chemparse package decomposes the chemical formula to its elements and returns it as a dictionary
-            It should be mentioned that some ChEBI compounds don't have chemical formula registered for them and some have two different chemical compositions assigned to them
+            Collects the ChEBI codes encoded in the IDs of the CellML variables (e.g. "va_15377" or "co_15377_1") and resolves every distinct code once.
+            The codes which are not cached are fetched concurrently, and later lookups of the same codes are answered from the resolver's memory.
 
             Args:
-                chebi_code (str): a 5 digit code as a string
+                cellml_variables (list[object]): a list containing all CellML variables (instances of CellML variable class)
 
             Returns:
-                str: a string represnting the compound's chemical formula (like CH4)
-                int: an integer representing the charge of the compound
-                dict: A dictionary mapping molecule names (str) to their integer counts (int).
+                dict: A dictionary mapping each normalized code to a dictionary containing "formula", "charge", "composition" and "formulae"
         """
 
-        chebi_entity = chb.ChebiEntity(chebi_code)
-        name = chebi_entity.get_name()
+        chebi_codes = []
 
-        parsed_compound={}
+        for cellml_variable in cellml_variables:
 
+            id_parts = cellml_variable.id().split('_')
 
-        formulae = chebi_entity.get_formulae() # There are two methods to fetch chemical composition of a compound: get_formulae is used when more than one composition is registerd for the compound
-                                                # It returns a list containing 'Formula' classes and Getting list's length will show us that if there is one or more chemical compositions registered
-        if len(formulae) == 0: # Sometimes no chemical formula is registered so the length of the list will be zero
+            if len(id_parts) > 1:
 
-            parsed_compound = None
-            formula = None
-            charge = None
+                code = id_parts[1].split('.')[0]
 
-        else:
+                if code.isdigit():
+                    chebi_codes.append(code)
 
-            charge = chebi_entity.get_charge()
-            formula = chebi_entity.get_formula()
-            parsed_compound = chp.parse_formula(formula)
+        return chebi_resolver.get_default_resolver().resolve_many(chebi_codes)
 
-        return formula, charge, parsed_compound
 
 
 
@@ -1685,38 +1729,49 @@ class CellmlReader:
     # *           Function           *
     # ********************************
     @staticmethod
-    def _get_formula_using_chebi ( chebi_code: str ) -> str:
-    
+    def _parse_using_chebi( chebi_code: str ) -> tuple[str, int, dict]:
+
         """
-            This function receives a string which includes ChEBI code for the compound and uses EBI API to search for the compound's chemical composition and fetches it
+            This function receives a string which includes ChEBI code for the compound and uses EBI API to search for the compounds chemical composition and fetches it
+            Then using the chemparse package decomposes the chemical formula to its elements and returns it as a dictionary
             It should be mentioned that some ChEBI compounds don't have chemical formula registered for them and some have two different chemical compositions assigned to them
+            The lookup goes through the shared ChEBI resolver, so entries found in the persistent ChEBI cache are not fetched again
 
             Args:
                 chebi_code (str): a 5 digit code as a string
 
             Returns:
                 str: a string represnting the compound's chemical formula (like CH4)
+                int: an integer representing the charge of the compound
+                dict: A dictionary mapping molecule names (str) to their integer counts (int).
         """
 
-        chebi_entity = chb.ChebiEntity(chebi_code)
+        return chebi_resolver.get_default_resolver().parse(chebi_code)
 
-        formulae = chebi_entity.get_formulae() # There are two methods to fetch chemical composition of a compound: get_formulae is used when more than one composition is registerd for the compound
-                                                # It returns a list containing 'Formula' classes and Getting list's length will show us that if there is one or more chemical compositions registered
-        if len(formulae) == 0: # Sometimes no chemical formula is registered so the length of the list will be zero
 
-            formula = None
 
-        elif len(formulae) == 1:
 
-            formula = chebi_entity.get_formula()
 
 
-        else:
+    # ********************************
+    # *           Function           *
+    # ********************************
+    @staticmethod
+    def _get_formula_using_chebi ( chebi_code: str ) -> str:
+    
+        """
+            This function receives a string which includes ChEBI code for the compound and uses EBI API to search for the compound's chemical composition and fetches it
+            It should be mentioned that some ChEBI compounds don't have chemical formula registered for them and some have two different chemical compositions assigned to them
+            The lookup goes through the shared ChEBI resolver, so entries found in the persistent ChEBI cache are not fetched again
 
-            formula = formulae[1].get_formula()
+            Args:
+                chebi_code (str): a 5 digit code as a string
 
+            Returns:
+                str: a string represnting the compound's chemical formula (like CH4)
+        """
 
-        return formula
+        return chebi_resolver.get_default_resolver().get_formula(chebi_code)
     
 
     @staticmethod
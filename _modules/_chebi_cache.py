@@ -0,0 +1,241 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+
+from _modules._constants import *
+
+
+
+
+class ChebiCache:
+    """
+        A persistent, size-bounded cache of ChEBI entries stored in an SQLite file.
+
+        Each entry is keyed by the ChEBI code (digits only) and stores the chemical formula, the charge,
+        all registered formulae and the composition parsed by chemparse. Entries older than the TTL are
+        treated as missing and the least recently used entries are evicted when the cache grows beyond its maximum size.
+    """
+
+
+    def __init__(self, cache_dir: str = None, max_entries: int = None, ttl: float = None):
+
+        self._cache_dir: str = cache_dir if cache_dir is not None else CHEBI_CACHE_DIR
+        self._max_entries: int = max_entries if max_entries is not None else CHEBI_CACHE_MAX_ENTRIES
+        self._ttl: float = ttl if ttl is not None else CHEBI_CACHE_TTL
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+
+        self._db_path: str = os.path.join(self._cache_dir, CHEBI_CACHE_FILE_NAME)
+        self._lock = threading.Lock()
+
+        self._connection = sqlite3.connect(self._db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chebi_entries (
+                chebi_id TEXT PRIMARY KEY,
+                formula TEXT,
+                charge INTEGER,
+                composition TEXT,
+                formulae TEXT,
+                fetched_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS idx_last_accessed ON chebi_entries (last_accessed)")
+        self._connection.commit()
+
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    @property
+    def max_entries(self):
+        return self._max_entries
+
+    @property
+    def ttl(self):
+        return self._ttl
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    @staticmethod
+    def normalize_code(chebi_code: str) -> str:
+        """
+            Returns the ChEBI code as digits only, e.g. "CHEBI:15377" becomes "15377"
+
+            Args:
+                chebi_code (str): a ChEBI code with or without the "CHEBI:" prefix
+
+            Returns:
+                str: the ChEBI code as digits only
+        """
+
+        return str(chebi_code).upper().replace("CHEBI:", "").strip()
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def get(self, chebi_code: str) -> dict:
+        """
+            Returns the cached entry for a ChEBI code and marks it as recently used
+
+            Args:
+                chebi_code (str): a ChEBI code with or without the "CHEBI:" prefix
+
+            Returns:
+                dict: A dictionary containing "formula", "charge", "composition" and "formulae"
+                None: If the code is not cached or its entry has expired
+        """
+
+        key = ChebiCache.normalize_code(chebi_code)
+
+        now = time.time()
+
+        with self._lock:
+
+            row = self._connection.execute(
+                "SELECT formula, charge, composition, formulae, fetched_at FROM chebi_entries WHERE chebi_id = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            formula, charge, composition, formulae, fetched_at = row
+
+            if self._ttl is not None and now - fetched_at > self._ttl:
+                self._connection.execute("DELETE FROM chebi_entries WHERE chebi_id = ?", (key,))
+                self._connection.commit()
+                return None
+
+            self._connection.execute("UPDATE chebi_entries SET last_accessed = ? WHERE chebi_id = ?", (now, key))
+            self._connection.commit()
+
+        return {
+            "formula": formula,
+            "charge": charge,
+            "composition": json.loads(composition) if composition is not None else None,
+            "formulae": json.loads(formulae) if formulae is not None else []
+        }
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def put(self, chebi_code: str, formula: str, charge: int, composition: dict, formulae: list[str] = None) -> None:
+        """
+            Stores a ChEBI entry in the cache and evicts the least recently used entries if the cache is full.
+            Entries without a formula are stored too, so compounds with no registered formula are not fetched again.
+
+            Args:
+                chebi_code (str): a ChEBI code with or without the "CHEBI:" prefix
+                formula (str): the chemical formula of the compound
+                charge (int): the charge of the compound
+                composition (dict): A dictionary mapping elements to their counts, as returned by chemparse
+                formulae (list[str]): all formulae registered for the compound
+
+            Returns:
+                None
+        """
+
+        key = ChebiCache.normalize_code(chebi_code)
+
+        now = time.time()
+
+        with self._lock:
+
+            self._connection.execute(
+                "INSERT OR REPLACE INTO chebi_entries (chebi_id, formula, charge, composition, formulae, fetched_at, last_accessed) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, formula, charge,
+                 json.dumps(composition) if composition is not None else None,
+                 json.dumps(formulae if formulae is not None else []),
+                 now, now)
+            )
+
+            self._evict()
+
+            self._connection.commit()
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def _evict(self) -> None:
+        """
+            Removes expired entries and then the least recently used entries until the cache fits its maximum size.
+            The caller must hold the lock.
+
+            Returns:
+                None
+        """
+
+        if self._ttl is not None:
+            self._connection.execute("DELETE FROM chebi_entries WHERE fetched_at < ?", (time.time() - self._ttl,))
+
+        if self._max_entries is None:
+            return
+
+        number_of_entries = self._connection.execute("SELECT COUNT(*) FROM chebi_entries").fetchone()[0]
+
+        excess = number_of_entries - self._max_entries
+
+        if excess > 0:
+            self._connection.execute(
+                "DELETE FROM chebi_entries WHERE chebi_id IN (SELECT chebi_id FROM chebi_entries ORDER BY last_accessed ASC LIMIT ?)", (excess,)
+            )
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def clear(self) -> None:
+        """
+            Removes all entries from the cache
+
+            Returns:
+                None
+        """
+
+        with self._lock:
+            self._connection.execute("DELETE FROM chebi_entries")
+            self._connection.commit()
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def close(self) -> None:
+        """
+            Closes the connection to the cache file
+
+            Returns:
+                None
+        """
+
+        with self._lock:
+            self._connection.close()
+
+
+
+    def __len__(self):
+
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM chebi_entries").fetchone()[0]
+
+    def __contains__(self, chebi_code):
+
+        return self.get(chebi_code) is not None
@@ -0,0 +1,377 @@
+import os
+import io
+import json
+import argparse
+
+import numpy as np
+import chemparse as chp
+
+from _modules._constants import *
+
+
+
+
+class ChebiIndex:
+    """
+        A compact, read-only lookup index of ChEBI compounds built from the ChEBI flat-file dumps
+        ("chemical_data.tsv" and "compounds.tsv").
+
+        The index is a directory of NumPy arrays which are memory-mapped when the index is opened, so a lookup is a binary search
+        and a few array slices: no network access and no parsing of the dumps at run time.
+            - ids.npy: the sorted ChEBI IDs
+            - charges.npy: the charge of each compound (CHEBI_INDEX_NO_CHARGE if unknown)
+            - formula_offsets.npy, formula_blob.npy: the registered formulae of each compound, separated by new lines
+            - composition_offsets.npy, composition_elements.npy, composition_counts.npy: the composition parsed by chemparse
+            - meta.json: the element names referred to by composition_elements.npy
+    """
+
+
+    def __init__(self, index_dir: str):
+
+        if not os.path.isfile(os.path.join(index_dir, CHEBI_INDEX_META_FILE_NAME)):
+            raise FileNotFoundError(f"There is no ChEBI index in: {index_dir}")
+
+        self._index_dir: str = index_dir
+
+        with open(os.path.join(index_dir, CHEBI_INDEX_META_FILE_NAME), "r") as meta_file:
+            meta = json.load(meta_file)
+
+        self._elements: list[str] = meta["elements"]
+
+        self._ids = ChebiIndex._load(index_dir, "ids")
+        self._charges = ChebiIndex._load(index_dir, "charges")
+        self._formula_offsets = ChebiIndex._load(index_dir, "formula_offsets")
+        self._formula_blob = ChebiIndex._load(index_dir, "formula_blob")
+        self._composition_offsets = ChebiIndex._load(index_dir, "composition_offsets")
+        self._composition_elements = ChebiIndex._load(index_dir, "composition_elements")
+        self._composition_counts = ChebiIndex._load(index_dir, "composition_counts")
+
+
+    @property
+    def index_dir(self):
+        return self._index_dir
+
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, chebi_code):
+        return self._position(chebi_code) is not None
+
+
+
+    @staticmethod
+    def _load(index_dir: str, name: str) -> np.ndarray:
+
+        return np.load(os.path.join(index_dir, name + ".npy"), mmap_mode="r")
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def _position(self, chebi_code: str) -> int:
+        """
+            Finds the position of a ChEBI code in the index using a binary search
+
+            Args:
+                chebi_code (str): a ChEBI code with or without the "CHEBI:" prefix
+
+            Returns:
+                int: the position of the code in the index
+                None: If the code is not in the index
+        """
+
+        try:
+            chebi_id = int(str(chebi_code).upper().replace("CHEBI:", "").strip())
+        except ValueError:
+            return None
+
+        position = int(np.searchsorted(self._ids, chebi_id))
+
+        if position < len(self._ids) and self._ids[position] == chebi_id:
+            return position
+
+        return None
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def lookup(self, chebi_code: str) -> dict:
+        """
+            Returns the formula, charge and composition of a ChEBI compound
+
+            Args:
+                chebi_code (str): a ChEBI code with or without the "CHEBI:" prefix
+
+            Returns:
+                dict: A dictionary containing "formula", "charge", "composition" and "formulae"
+                None: If the code is not in the index
+        """
+
+        position = self._position(chebi_code)
+
+        if position is None:
+            return None
+
+        start, end = self._formula_offsets[position], self._formula_offsets[position + 1]
+
+        formulae = bytes(self._formula_blob[start:end]).decode("utf-8").split("\n") if end > start else []
+
+        charge = int(self._charges[position])
+
+        if charge == CHEBI_INDEX_NO_CHARGE:
+            charge = None
+
+        start, end = self._composition_offsets[position], self._composition_offsets[position + 1]
+
+        if len(formulae) == 0:
+            composition = None
+        else:
+            composition = {self._elements[element]: float(count)
+                           for element, count in zip(self._composition_elements[start:end], self._composition_counts[start:end])}
+
+        return {
+            "formula": formulae[0] if formulae else None,
+            "charge": charge if formulae else None,
+            "composition": composition,
+            "formulae": formulae
+        }
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    @staticmethod
+    def build(chemical_data_path: str, compounds_path: str, index_dir: str) -> "ChebiIndex":
+        """
+            Builds the index from the ChEBI flat-file dumps and saves it in a directory.
+            Both the legacy dumps (ID, COMPOUND_ID, SOURCE, TYPE, CHEMICAL_DATA) and the newer dumps having "formula" and "charge" columns are supported.
+            Secondary ChEBI IDs, i.e. compounds having a parent ID in "compounds.tsv", get the formulae and the charge of their parent if they have none.
+
+            Args:
+                chemical_data_path (str): the path to "chemical_data.tsv"
+                compounds_path (str): the path to "compounds.tsv"; it can be None if secondary IDs are not needed
+                index_dir (str): the directory the index is saved in
+
+            Returns:
+                ChebiIndex: the index opened from the directory
+        """
+
+        formulae, charges = ChebiIndex._read_chemical_data(chemical_data_path)
+
+        parent_ids = ChebiIndex._read_parent_ids(compounds_path) if compounds_path is not None else {}
+
+        for chebi_id, parent_id in parent_ids.items():
+
+            if chebi_id not in formulae and parent_id in formulae:
+                formulae[chebi_id] = formulae[parent_id]
+
+            if chebi_id not in charges and parent_id in charges:
+                charges[chebi_id] = charges[parent_id]
+
+        ids = np.array(sorted(set(formulae) | set(charges)), dtype=np.int64)
+
+        element_indices = {}
+
+        charge_array = np.full(len(ids), CHEBI_INDEX_NO_CHARGE, dtype=np.int32)
+        formula_offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        composition_offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+
+        formula_chunks = []
+        composition_elements = []
+        composition_counts = []
+
+        formula_length = 0
+
+        for position, chebi_id in enumerate(ids.tolist()):
+
+            if chebi_id in charges:
+                charge_array[position] = charges[chebi_id]
+
+            compound_formulae = formulae.get(chebi_id, [])
+
+            encoded = "\n".join(compound_formulae).encode("utf-8")
+            formula_chunks.append(encoded)
+            formula_length += len(encoded)
+            formula_offsets[position + 1] = formula_length
+
+            if compound_formulae:
+
+                try:
+                    composition = chp.parse_formula(compound_formulae[0])
+                except Exception:
+                    composition = {}
+
+                for element, count in composition.items():
+                    composition_elements.append(element_indices.setdefault(element, len(element_indices)))
+                    composition_counts.append(count)
+
+            composition_offsets[position + 1] = len(composition_elements)
+
+        os.makedirs(index_dir, exist_ok=True)
+
+        np.save(os.path.join(index_dir, "ids.npy"), ids)
+        np.save(os.path.join(index_dir, "charges.npy"), charge_array)
+        np.save(os.path.join(index_dir, "formula_offsets.npy"), formula_offsets)
+        np.save(os.path.join(index_dir, "formula_blob.npy"), np.frombuffer(b"".join(formula_chunks), dtype=np.uint8))
+        np.save(os.path.join(index_dir, "composition_offsets.npy"), composition_offsets)
+        np.save(os.path.join(index_dir, "composition_elements.npy"), np.array(composition_elements, dtype=np.uint16))
+        np.save(os.path.join(index_dir, "composition_counts.npy"), np.array(composition_counts, dtype=np.float64))
+
+        with open(os.path.join(index_dir, CHEBI_INDEX_META_FILE_NAME), "w") as meta_file:
+            json.dump({"elements": list(element_indices), "entries": len(ids)}, meta_file)
+
+        return ChebiIndex(index_dir)
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    @staticmethod
+    def _read_chemical_data(chemical_data_path: str) -> tuple[dict, dict]:
+        """
+            Reads the formulae and charges of the compounds in "chemical_data.tsv"
+
+            Args:
+                chemical_data_path (str): the path to "chemical_data.tsv"
+
+            Returns:
+                dict: A dictionary mapping ChEBI IDs (int) to the list of their formulae
+                dict: A dictionary mapping ChEBI IDs (int) to their charges
+        """
+
+        formulae = {}
+        charges = {}
+
+        with io.open(chemical_data_path, "r", encoding="cp1252") as tsv_file:
+
+            header = [column.strip().lower() for column in next(tsv_file).rstrip("\r\n").split("\t")]
+
+            legacy_format = "type" in header
+
+            compound_column = header.index("compound_id")
+
+            for line in tsv_file:
+
+                tokens = line.rstrip("\r\n").split("\t")
+
+                if len(tokens) < len(header):
+                    continue
+
+                try:
+                    chebi_id = int(tokens[compound_column])
+                except ValueError:
+                    continue
+
+                if legacy_format:
+
+                    data_type = tokens[header.index("type")]
+                    data = tokens[header.index("chemical_data")].strip()
+
+                    if data_type == "FORMULA":
+                        formula = data
+                        charge = None
+                    elif data_type == "CHARGE":
+                        formula = None
+                        charge = data
+                    else:
+                        continue
+
+                else:
+
+                    formula = tokens[header.index("formula")].strip() if "formula" in header else None
+                    charge = tokens[header.index("charge")].strip() if "charge" in header else None
+
+                if formula:
+                    formulae.setdefault(chebi_id, [])
+                    if formula not in formulae[chebi_id]:
+                        formulae[chebi_id].append(formula)
+
+                parsed_charge = ChebiIndex._parse_charge(charge)
+
+                if parsed_charge is not None and chebi_id not in charges:
+                    charges[chebi_id] = parsed_charge
+
+        return formulae, charges
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    @staticmethod
+    def _read_parent_ids(compounds_path: str) -> dict:
+        """
+            Reads the parent IDs of the secondary compounds in "compounds.tsv"
+
+            Args:
+                compounds_path (str): the path to "compounds.tsv"
+
+            Returns:
+                dict: A dictionary mapping secondary ChEBI IDs (int) to their parent IDs (int)
+        """
+
+        parent_ids = {}
+
+        with io.open(compounds_path, "r", encoding="cp1252") as tsv_file:
+
+            header = [column.strip().lower() for column in next(tsv_file).rstrip("\r\n").split("\t")]
+
+            id_column = header.index("id")
+            parent_column = header.index("parent_id")
+
+            for line in tsv_file:
+
+                tokens = line.rstrip("\r\n").split("\t")
+
+                if len(tokens) <= max(id_column, parent_column):
+                    continue
+
+                try:
+                    parent_ids[int(tokens[id_column])] = int(tokens[parent_column])
+                except ValueError:
+                    continue
+
+        return parent_ids
+
+
+
+    @staticmethod
+    def _parse_charge(charge: str) -> int:
+        """
+            Converts a charge such as "1", "-2" or "2-" to an integer, or returns None if it is not a number
+        """
+
+        if charge is None:
+            return None
+
+        charge = charge.strip()
+
+        if charge.endswith("-") and len(charge) > 1:
+            charge = "-" + charge[:-1]
+
+        try:
+            return int(float(charge))
+        except ValueError:
+            return None
+
+
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Builds the offline ChEBI index from the ChEBI flat-file dumps")
+    parser.add_argument("chemical_data", help="path to chemical_data.tsv")
+    parser.add_argument("compounds", nargs="?", default=None, help="path to compounds.tsv")
+    parser.add_argument("--output", default=CHEBI_INDEX_DIR or os.path.join(os.path.expanduser("~"), ".bioml", "chebi_index"), help="directory of the index")
+
+    arguments = parser.parse_args()
+
+    chebi_index = ChebiIndex.build(arguments.chemical_data, arguments.compounds, arguments.output)
+
+    print(f"ChEBI index with {len(chebi_index)} compounds saved to {arguments.output}")
@@ -0,0 +1,453 @@
+import math
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+import chemparse as chp
+import libchebipy as chb
+
+import _modules._utility as utility
+from _modules._constants import *
+from _modules._chebi_cache import ChebiCache
+from _modules._chebi_index import ChebiIndex
+
+
+
+
+class ChebiResolver:
+    """
+        Resolves ChEBI codes to their chemical formula, charge and composition.
+        This class is shared by the SBML and CellML readers and works in one of two modes:
+            - "online": entries are looked up in a persistent ChebiCache first and only fetched through libChEBIpy when they are missing or expired.
+            - "offline": entries are looked up in a ChebiIndex built from the ChEBI flat-file dumps, without any network access.
+    """
+
+
+    def __init__(self, cache: ChebiCache = None, use_cache: bool = True, mode: str = CHEBI_RESOLVER_ONLINE, index: ChebiIndex = None):
+
+        if mode not in (CHEBI_RESOLVER_ONLINE, CHEBI_RESOLVER_OFFLINE):
+            raise ValueError(f"ChEBI resolver mode must be \"{CHEBI_RESOLVER_ONLINE}\" or \"{CHEBI_RESOLVER_OFFLINE}\", not \"{mode}\"")
+
+        if mode == CHEBI_RESOLVER_OFFLINE and index is None:
+            raise ValueError("An offline ChEBI resolver needs a ChEBI index")
+
+        self._cache: ChebiCache = cache
+        self._use_cache: bool = use_cache
+        self._mode: str = mode
+        self._index: ChebiIndex = index
+
+        self._resolved: dict = {}     # entries resolved during this session, keyed by the normalized code
+        self._abandoned: list[threading.Thread] = []     # the threads of fetches which timed out and have not ended yet
+        self._lock = threading.Lock()
+
+
+    @property
+    def mode(self):
+        return self._mode
+
+    @property
+    def index(self):
+        return self._index
+
+
+    @property
+    def cache(self):
+        """Getter for cache - the cache is opened the first time it is needed"""
+
+        if self._cache is None and self._use_cache:
+
+            try:
+                self._cache = ChebiCache()
+
+            except Exception as e:
+                utility.warning_printer(f"ChEBI cache cannot be opened, ChEBI entries will not be cached: {e}")
+                self._use_cache = False
+
+        return self._cache
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def parse(self, chebi_code: str) -> tuple[str, int, dict]:
+        """
+            Returns the chemical formula, the charge and the composition of a ChEBI compound
+
+            Args:
+                chebi_code (str): a 5 digit code as a string
+
+            Returns:
+                str: a string represnting the compound's chemical formula (like CH4)
+                int: an integer representing the charge of the compound
+                dict: A dictionary mapping molecule names (str) to their counts.
+        """
+
+        entry = self._lookup(chebi_code)
+
+        return entry["formula"], entry["charge"], entry["composition"]
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def get_formula(self, chebi_code: str) -> str:
+        """
+            Returns the chemical formula of a ChEBI compound.
+            If more than one formula is registered for the compound, the second one is returned.
+
+            Args:
+                chebi_code (str): a 5 digit code as a string
+
+            Returns:
+                str: a string represnting the compound's chemical formula (like CH4)
+        """
+
+        formulae = self._lookup(chebi_code)["formulae"]
+
+        if len(formulae) == 0:
+            return None
+
+        elif len(formulae) == 1:
+            return formulae[0]
+
+        else:
+            return formulae[1]
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def _lookup(self, chebi_code: str) -> dict:
+        """
+            Looks up a ChEBI code in the offline index, or in the cache and fetches it from ChEBI if it is not cached
+
+            Args:
+                chebi_code (str): a 5 digit code as a string
+
+            Returns:
+                dict: A dictionary containing "formula", "charge", "composition" and "formulae"
+        """
+
+        chebi_code = ChebiCache.normalize_code(chebi_code)
+
+        with self._lock:
+            entry = self._resolved.get(chebi_code)
+
+        if entry is not None:
+            return entry
+
+        if self._mode == CHEBI_RESOLVER_OFFLINE:
+
+            entry = self._index.lookup(chebi_code)
+
+            if entry is None:
+                entry = ChebiResolver._empty_entry()
+
+            return self._remember(chebi_code, entry)
+
+        cache = self.cache
+
+        if cache is not None:
+
+            entry = cache.get(chebi_code)
+
+            if entry is not None:
+                return self._remember(chebi_code, entry)
+
+        entry = ChebiResolver._fetch(chebi_code)
+
+        if cache is not None:
+            cache.put(chebi_code, entry["formula"], entry["charge"], entry["composition"], entry["formulae"])
+
+        return self._remember(chebi_code, entry)
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def resolve_many(self, chebi_codes: list[str], max_workers: int = None, timeout: float = None) -> dict:
+        """
+            Resolves all distinct ChEBI codes of a model in one stage.
+            Codes already resolved in this session or found in the offline index or the cache are not fetched again,
+            the remaining codes are fetched concurrently through a bounded thread pool.
+            A code whose fetch fails or takes longer than the timeout is reported with a warning and treated as a compound without a registered formula;
+            it is not remembered, so it is fetched again by the next call.
+
+            Args:
+                chebi_codes (list[str]): ChEBI codes with or without the "CHEBI:" prefix; duplicates are resolved once
+                max_workers (int): the maximum number of concurrent fetches. Defaults to CHEBI_RESOLVE_MAX_WORKERS
+                timeout (float): the number of seconds a single fetch may take. Defaults to CHEBI_RESOLVE_TIMEOUT
+
+            Returns:
+                dict: A dictionary mapping each normalized code to a dictionary containing "formula", "charge", "composition" and "formulae"
+        """
+
+        if max_workers is None:
+            max_workers = CHEBI_RESOLVE_MAX_WORKERS
+
+        if timeout is None:
+            timeout = CHEBI_RESOLVE_TIMEOUT
+
+        if not isinstance(max_workers, int) or max_workers < 1:
+            raise ValueError("The number of ChEBI workers must be a positive integer")
+
+        if timeout <= 0:
+            raise ValueError("The ChEBI timeout must be a positive number")
+
+        chebi_codes = list(dict.fromkeys(ChebiCache.normalize_code(chebi_code) for chebi_code in chebi_codes if chebi_code))
+
+        with self._lock:
+            missing = [chebi_code for chebi_code in chebi_codes if chebi_code not in self._resolved]
+
+        if self._mode == CHEBI_RESOLVER_OFFLINE:
+
+            # an offline resolver never opens the cache
+            for chebi_code in missing:
+                self._lookup(chebi_code)
+
+            missing = []
+
+        cache = self.cache if missing else None
+
+        if cache is not None:
+
+            for chebi_code in list(missing):
+
+                entry = cache.get(chebi_code)
+
+                if entry is not None:
+                    self._remember(chebi_code, entry)
+                    missing.remove(chebi_code)
+
+        if missing:
+
+            # libChEBIpy loads its flat files on the first lookup, so one code is fetched before the other workers start
+            self._fetch_concurrently(missing[:1], cache, 1, timeout)
+
+            self._fetch_concurrently(missing[1:], cache, max_workers, timeout)
+
+        # the codes which failed or timed out are not remembered, so they are fetched again next time
+        with self._lock:
+            return {chebi_code: self._resolved.get(chebi_code, ChebiResolver._empty_entry()) for chebi_code in chebi_codes}
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def _fetch_concurrently(self, chebi_codes: list[str], cache: ChebiCache, max_workers: int, timeout: float) -> None:
+        """
+            Fetches ChEBI codes in at most max_workers daemon threads and gives up on the fetches running longer than the timeout.
+            Every fetch reports to a concurrent.futures.Future, which is waited for until it is done or its timeout is reached.
+            A fetch which was given up on cannot be stopped, but its thread is a daemon which does not keep the interpreter alive
+            (the threads of a ThreadPoolExecutor would be joined at exit), and it keeps its worker slot until it ends,
+            so a resolver never has more than max_workers hanging fetches.
+
+            Args:
+                chebi_codes (list[str]): normalized ChEBI codes which are neither resolved nor cached
+                cache (ChebiCache): the cache the fetched entries are stored in, or None
+                max_workers (int): the maximum number of concurrent fetches
+                timeout (float): the number of seconds a single fetch may take
+
+            Returns:
+                None
+        """
+
+        pending = list(chebi_codes)
+
+        running = {}     # future -> (chebi code, thread, deadline of the fetch)
+        given_up = {}     # future -> chebi code, for the fetches of this call which timed out
+
+        while pending or running:
+
+            # the list is shared by concurrent calls, so it is only read through a snapshot taken under the lock
+            with self._lock:
+                self._abandoned = [thread for thread in self._abandoned if thread.is_alive()]
+                abandoned = list(self._abandoned)
+
+            free_slots = max_workers - len(running) - len(abandoned)
+
+            if pending and free_slots <= 0 and not running:
+
+                # every slot is held by an earlier fetch which was given up on
+                abandoned[0].join(timeout)
+
+                if abandoned[0].is_alive():
+
+                    for chebi_code in pending:
+                        utility.warning_printer(f"ChEBI code {chebi_code} was not resolved, {len(abandoned)} earlier ChEBI fetch(es) are still hanging")
+
+                    break
+
+                continue
+
+            while pending and free_slots > 0:
+
+                chebi_code = pending.pop(0)
+
+                future = Future()
+                future.set_running_or_notify_cancel()
+
+                thread = threading.Thread(target=ChebiResolver._fetch_into, args=(future, chebi_code), name=f"chebi-{chebi_code}", daemon=True)
+                thread.start()
+
+                running[future] = (chebi_code, thread, time.monotonic() + timeout)
+
+                free_slots -= 1
+
+            next_deadline = min(deadline for _, _, deadline in running.values())
+
+            done, _ = wait(running, timeout=max(next_deadline - time.monotonic(), 0.0), return_when=FIRST_COMPLETED)
+
+            for future in done:
+
+                chebi_code, _, _ = running.pop(future)
+
+                self._collect(chebi_code, future, cache)
+
+            now = time.monotonic()
+
+            for future, (chebi_code, thread, deadline) in list(running.items()):
+
+                if now >= deadline:
+
+                    utility.warning_printer(f"ChEBI code {chebi_code} was not resolved within {timeout} seconds")
+
+                    del running[future]
+
+                    given_up[future] = chebi_code
+
+                    with self._lock:
+                        self._abandoned.append(thread)
+
+        # a result of a fetch which was given up on is stored as well, if it came in before this call ended
+        for future, chebi_code in given_up.items():
+            if future.done() and future.exception() is None:
+                self._store(chebi_code, future.result(), cache)
+
+
+
+    @staticmethod
+    def _fetch_into(future: Future, chebi_code: str) -> None:
+
+        try:
+            future.set_result(ChebiResolver._fetch(chebi_code))
+
+        except Exception as e:
+            future.set_exception(e)
+
+
+
+    def _collect(self, chebi_code: str, future: Future, cache: ChebiCache) -> None:
+
+        if future.exception() is None:
+            self._store(chebi_code, future.result(), cache)
+
+        else:
+            utility.warning_printer(f"ChEBI code {chebi_code} cannot be resolved: {future.exception()}")
+
+
+
+    def _store(self, chebi_code: str, entry: dict, cache: ChebiCache) -> None:
+
+        if cache is not None:
+            cache.put(chebi_code, entry["formula"], entry["charge"], entry["composition"], entry["formulae"])
+
+        self._remember(chebi_code, entry)
+
+
+
+    def _remember(self, chebi_code: str, entry: dict) -> dict:
+
+        with self._lock:
+            self._resolved[chebi_code] = entry
+
+        return entry
+
+
+
+    @staticmethod
+    def _empty_entry() -> dict:
+
+        return {"formula": None, "charge": None, "composition": None, "formulae": []}
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    @staticmethod
+    def _fetch(chebi_code: str) -> dict:
+        """
+            This function receives a string which includes ChEBI code for the compound and uses EBI API to search for the compounds chemical composition and fetches it
+            Then using the chemparse package decomposes the chemical formula to its elements and returns it as a dictionary
+            It should be mentioned that some ChEBI compounds don't have chemical formula registered for them and some have two different chemical compositions assigned to them
+
+            Args:
+                chebi_code (str): a 5 digit code as a string
+
+            Returns:
+                dict: A dictionary containing "formula", "charge", "composition" and "formulae"
+        """
+
+        chebi_entity = chb.ChebiEntity(ChebiCache.normalize_code(chebi_code))
+
+        formulae = [registered_formula.get_formula() for registered_formula in chebi_entity.get_formulae()]
+
+        if len(formulae) == 0: # Sometimes no chemical formula is registered so the length of the list will be zero
+
+            return ChebiResolver._empty_entry()
+
+        formula = chebi_entity.get_formula()
+
+        charge = chebi_entity.get_charge()
+
+        if charge is not None and math.isnan(charge):
+            charge = None
+
+        elif charge is not None:
+            charge = int(charge)
+
+        return {"formula": formula, "charge": charge, "composition": chp.parse_formula(formula), "formulae": formulae}
+
+
+
+
+_default_resolver: ChebiResolver = None
+
+
+
+def get_default_resolver() -> ChebiResolver:
+    """
+        Returns the ChEBI resolver shared by the readers, creating it on first use.
+        The resolver is offline if the BIOML_CHEBI_INDEX_DIR environment variable points to a ChEBI index.
+    """
+
+    global _default_resolver
+
+    if _default_resolver is None:
+
+        if CHEBI_INDEX_DIR:
+            _default_resolver = ChebiResolver(mode=CHEBI_RESOLVER_OFFLINE, index=ChebiIndex(CHEBI_INDEX_DIR))
+        else:
+            _default_resolver = ChebiResolver()
+
+    return _default_resolver
+
+
+
+def set_default_resolver(resolver: ChebiResolver) -> None:
+    """
+        Replaces the ChEBI resolver shared by the readers
+    """
+
+    global _default_resolver
+
+    if not isinstance(resolver, ChebiResolver):
+        raise TypeError("The ChEBI resolver must be an instance of ChebiResolver")
+
+    _default_resolver = resolver
@@ -1,5 +1,4 @@
-
-
+import os
 
 
 MAX_RECURSION = 8
@@ -8,4 +7,106 @@ MAX_RECURSION = 8
 WARNINGS = []
 
 
-MAX_DEPTH = 400
\ No newline at end of file
+MAX_DEPTH = 400
+
+
+CHEBI_CACHE_DIR = os.environ.get("BIOML_CHEBI_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".bioml", "chebi_cache"))
+
+CHEBI_CACHE_FILE_NAME = "chebi_cache.sqlite3"
+
+CHEBI_CACHE_MAX_ENTRIES = 50000     # least recently used entries are evicted above this size
+
+CHEBI_CACHE_TTL = 30 * 24 * 60 * 60     # seconds before a cached ChEBI entry is fetched again
+
+
+CHEBI_INDEX_DIR = os.environ.get("BIOML_CHEBI_INDEX_DIR")     # if set, ChEBI codes are resolved from this offline index only
+
+CHEBI_INDEX_META_FILE_NAME = "meta.json"
+
+CHEBI_INDEX_NO_CHARGE = -2 ** 31     # marks compounds without a registered charge in the offline index
+
+CHEBI_RESOLVER_ONLINE = "online"
+
+CHEBI_RESOLVER_OFFLINE = "offline"
+
+CHEBI_RESOLVE_MAX_WORKERS = 8     # concurrent ChEBI fetches when the codes of a model are resolved together
+
+CHEBI_RESOLVE_TIMEOUT = 30.0     # seconds a single ChEBI fetch may take
+
+
+SOURCE_FBC = "fbc"     # the fbc:chemicalFormula and fbc:charge attributes of an SBML species
+
+SOURCE_SBML_CHARGE = "sbml_charge"     # the charge attribute of an SBML species
+
+SOURCE_CHEBI = "chebi"     # the ChEBI entry of the species annotation
+
+
+MATRIX_BACKEND_DENSE = "dense"
+
+MATRIX_BACKEND_SPARSE = "sparse"
+
+MATRIX_BACKEND_AUTO = "auto"     # sparse for matrices with at least SPARSE_AUTO_MIN_ENTRIES entries, dense otherwise
+
+SPARSE_AUTO_MIN_ENTRIES = 1000000
+
+
+THERMO_ENGINE_NULL_SPACE = "null_space"     # Wegscheider conditions from a null-space basis of -S (dense SVD)
+
+THERMO_ENGINE_LSQR = "lsqr"     # least-squares residual of S^T mu = ln(k+/k-), solved by scipy.sparse.linalg.lsqr
+
+THERMO_ENGINE_LSMR = "lsmr"     # the same residual, solved by scipy.sparse.linalg.lsmr
+
+THERMO_TOLERANCE = 1e-2     # largest deviation from the Wegscheider conditions accepted as compatible
+
+THERMO_SOLVER_TOLERANCE = 1e-12
+
+THERMO_SOLVER_MAX_ITERATIONS = 10000
+
+THERMO_ENGINE_EXACT = "exact"     # Wegscheider conditions from the exact integer null space of S, cached by network topology
+
+NULL_SPACE_CACHE_DIR = os.environ.get("BIOML_NULL_SPACE_CACHE_DIR")     # if set, integer null spaces are also saved in this directory
+
+NULL_SPACE_CACHE_MAX_ENTRIES = 256     # null spaces kept in memory
+
+
+THERMO_SWEEP_CHUNK_SIZE = 10000     # rate-constant vectors multiplied by the null-space basis at once in a parameter sweep
+
+SWEEP_FORWARD_COLUMN_PREFIX = "k_forward_"     # columns of a sweep table holding the forward rate constant of a reaction, followed by the reaction ID
+
+SWEEP_REVERSE_COLUMN_PREFIX = "k_reverse_"     # columns of a sweep table holding the reverse rate constant of a reaction, followed by the reaction ID
+
+THERMO_BASIS_ZERO_TOLERANCE = 1e-10     # basis entries smaller than this are not counted as reactions of a thermodynamic cycle
+
+
+CHARGE_MODE_VECTOR = "vector"     # charge balance as z @ S, with one charge per species
+
+CHARGE_MODE_MATRIX = "matrix"     # charge balance from the reactions x species matrix of the charges of the species references
+
+
+KINETIC_LAW_FORM_PARSED = "parsed"     # the kinetic law translated to SymPy from its libsbml expression tree
+
+KINETIC_LAW_FORM_SIMPLIFIED = "simplified"     # sympy.simplify of the parsed kinetic law, used by the mass-action checker
+
+KINETIC_LAW_FORM_CANCELLED = "cancelled"     # sympy.cancel of the parsed kinetic law, a single fraction of polynomials
+
+KINETIC_LAW_FORM_EXPANDED = "expanded"     # sympy.expand of the cancelled kinetic law, split into forward and reverse terms by the readers
+
+
+MASS_ACTION_TIER_STRUCTURAL = "structural"     # decided from the expression tree of the parsed kinetic law
+
+MASS_ACTION_TIER_CANCELLED = "cancelled"     # decided from the kinetic law brought to one fraction by sympy.cancel
+
+MASS_ACTION_TIER_SIMPLIFIED = "simplified"     # decided by the string heuristics on the kinetic law simplified by sympy.simplify
+
+MASS_ACTION_TIER_AST = "ast"     # decided from the libsbml expression tree of the kinetic law, without SymPy
+
+MASS_ACTION_TIER_UNDETERMINED = "undetermined"     # not decided, the symbolic operations on the kinetic law ran out of their time budget
+
+MASS_ACTION_ENGINE_SYMPY = "sympy"     # mass-action kinetics classified by the SymPy tiers
+
+MASS_ACTION_ENGINE_AST = "ast"     # the libsbml expression tree is classified first, the SymPy tiers only see the laws it cannot decide
+
+
+SYMBOLIC_REACTION_TIME_BUDGET = None     # seconds the symbolic operations (sympy.simplify, cancel, expand) on one reaction may take; None for no limit
+
+SYMBOLIC_MODEL_TIME_BUDGET = None     # seconds the symbolic operations on all reactions of a model may take together; None for no limit
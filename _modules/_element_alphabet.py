@@ -0,0 +1,91 @@
+import threading
+
+import numpy as np
+
+
+
+
+class ElementAlphabet:
+    """
+        A process-wide, append-only numbering of the chemical elements and moieties found in species compositions.
+        Every element keeps its index for the life of the process, so the rows of the elemental matrices of all models in a batch mean the same element.
+    """
+
+
+    def __init__(self):
+
+        self._indices: dict = {}
+        self._names: list[str] = []
+        self._lock = threading.Lock()
+
+
+    @property
+    def names(self):
+        """The element names, in index order"""
+        return list(self._names)
+
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, element):
+        return element in self._indices
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def encode(self, composition: dict) -> tuple[np.ndarray, np.ndarray]:
+        """
+            Converts a composition to a compact integer vector over the alphabet, adding the elements which are not numbered yet
+
+            Args:
+                composition (dict): A dictionary mapping element names to their counts
+
+            Returns:
+                np.ndarray: the element indices, sorted (int32)
+                np.ndarray: the counts of the elements (int64)
+        """
+
+        with self._lock:
+
+            for element in composition:
+
+                if element not in self._indices:
+                    self._indices[element] = len(self._names)
+                    self._names.append(element)
+
+            pairs = sorted((self._indices[element], int(count)) for element, count in composition.items())
+
+        element_indices = np.array([index for index, _ in pairs], dtype=np.int32)
+        counts = np.array([count for _, count in pairs], dtype=np.int64)
+
+        return element_indices, counts
+
+
+
+    def index(self, element: str) -> int:
+
+        return self._indices.get(element)
+
+
+
+    def indices_dict(self) -> dict:
+
+        with self._lock:
+            return dict(self._indices)
+
+
+
+
+_default_alphabet: ElementAlphabet = ElementAlphabet()
+
+
+
+def get_default_alphabet() -> ElementAlphabet:
+    """
+        Returns the element alphabet shared by all species of the process
+    """
+
+    return _default_alphabet
@@ -55,4 +55,10 @@ class NotParsable(Exception):
     """
     This exception is raised when the string cannot be parsed by libsbml FormulatoL3String function
     """
-    pass
\ No newline at end of file
+    pass
+
+class SymbolicTimeout(Exception):
+    """
+    This exception is raised when a symbolic operation on a kinetic law runs out of its time budget and its worker process is killed
+    """
+    pass
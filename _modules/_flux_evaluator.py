@@ -0,0 +1,141 @@
+import numpy as np
+from scipy import sparse
+
+
+
+
+class FluxEvaluator:
+    """
+        Evaluates the fluxes of a mass-action model for many concentration states at once,
+
+            v = k+ * prod_i c_i ** F_ij - k- * prod_i c_i ** R_ij
+
+        where F and R are the forward and reverse stoichiometric matrices (species x reactions).
+        The products are computed in log space, ln(k+) + ln(c) @ F, so a whole block of states costs two matrix products and no SymPy.
+        Species with zero concentration are counted separately (c == 0) @ (F != 0), which sets the terms they take part in to zero exactly.
+    """
+
+
+    def __init__(self, forward_matrix, reverse_matrix, forward_rate_constants: np.ndarray, reverse_rate_constants: np.ndarray):
+
+        if forward_matrix.shape != reverse_matrix.shape:
+            raise ValueError(f"The forward and reverse stoichiometric matrices have different shapes: {forward_matrix.shape} and {reverse_matrix.shape}")
+
+        self._forward_rate_constants: np.ndarray = np.asarray(forward_rate_constants, dtype=np.float64).ravel()
+        self._reverse_rate_constants: np.ndarray = np.asarray(reverse_rate_constants, dtype=np.float64).ravel()
+
+        if len(self._forward_rate_constants) != forward_matrix.shape[1] or len(self._reverse_rate_constants) != forward_matrix.shape[1]:
+            raise ValueError(f"{forward_matrix.shape[1]} rate constants are needed per direction, one for each reaction")
+
+        if np.any(self._forward_rate_constants < 0) or np.any(self._reverse_rate_constants < 0):
+            raise ValueError("Rate constants cannot be negative")
+
+        self._forward_matrix = FluxEvaluator._to_float(forward_matrix)
+        self._reverse_matrix = FluxEvaluator._to_float(reverse_matrix)
+
+        self._forward_pattern = FluxEvaluator._to_float(forward_matrix != 0)
+        self._reverse_pattern = FluxEvaluator._to_float(reverse_matrix != 0)
+
+        with np.errstate(divide="ignore"):
+            # a zero rate constant gives ln(k) = -inf and a zero term
+            self._logn_forward_rate_constants: np.ndarray = np.log(self._forward_rate_constants)
+            self._logn_reverse_rate_constants: np.ndarray = np.log(self._reverse_rate_constants)
+
+
+    @property
+    def shape(self):
+        """The number of species (columns of a concentration array) and of reactions (columns of the fluxes)"""
+        return self._forward_matrix.shape
+
+    @property
+    def forward_rate_constants(self):
+        return self._forward_rate_constants
+
+    @property
+    def reverse_rate_constants(self):
+        return self._reverse_rate_constants
+
+
+
+    @staticmethod
+    def _to_float(matrix):
+
+        if sparse.issparse(matrix):
+            return sparse.csc_matrix(matrix, dtype=np.float64)
+
+        return np.asarray(matrix, dtype=np.float64)
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def evaluate_directions(self, concentrations) -> tuple[np.ndarray, np.ndarray]:
+        """
+            Evaluates the forward and reverse rates of all reactions
+
+            Args:
+                concentrations (np.ndarray): the concentrations, one state (species) or a block of states (states x species);
+                                             the columns follow the rows of the stoichiometric matrix
+
+            Returns:
+                np.ndarray: the forward rates k+ * prod c ** F (states x reactions, or reactions for a single state)
+                np.ndarray: the reverse rates k- * prod c ** R, of the same shape
+        """
+
+        concentrations = np.asarray(concentrations, dtype=np.float64)
+
+        single_state = concentrations.ndim == 1
+
+        concentrations = np.atleast_2d(concentrations)
+
+        if concentrations.ndim != 2 or concentrations.shape[1] != self.shape[0]:
+            raise ValueError(f"Concentrations must have {self.shape[0]} columns, one for each species, not the shape {concentrations.shape}")
+
+        if np.any(concentrations < 0):
+            raise ValueError("Concentrations cannot be negative")
+
+        zeros = concentrations == 0
+
+        logn_concentrations = np.log(np.where(zeros, 1.0, concentrations))
+
+        zeros = zeros.astype(np.float64)
+
+        rates = []
+
+        for logn_rate_constants, matrix, pattern in ((self._logn_forward_rate_constants, self._forward_matrix, self._forward_pattern),
+                                                     (self._logn_reverse_rate_constants, self._reverse_matrix, self._reverse_pattern)):
+
+            # ndarray @ sparse matrix returns an ndarray
+            rate = np.exp(logn_rate_constants + np.asarray(logn_concentrations @ matrix))
+
+            rate[np.asarray(zeros @ pattern) > 0] = 0.0
+
+            rates.append(rate[0] if single_state else rate)
+
+        return rates[0], rates[1]
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def evaluate(self, concentrations) -> np.ndarray:
+        """
+            Evaluates the net fluxes v = k+ * prod c ** F - k- * prod c ** R of all reactions
+
+            Args:
+                concentrations (np.ndarray): the concentrations, one state (species) or a block of states (states x species)
+
+            Returns:
+                np.ndarray: the fluxes (states x reactions, or reactions for a single state)
+        """
+
+        forward_rates, reverse_rates = self.evaluate_directions(concentrations)
+
+        return forward_rates - reverse_rates
+
+
+
+    def __call__(self, concentrations) -> np.ndarray:
+        return self.evaluate(concentrations)
@@ -0,0 +1,370 @@
+import os
+import math
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+
+from _modules._constants import *
+
+
+
+
+# ********************************
+# *           Function           *
+# ********************************
+def integer_null_space(stoichiometric_matrix) -> np.ndarray:
+    """
+        Computes an exact basis of the right null space of an integer matrix.
+
+        The matrix is brought to reduced row echelon form by a fraction-free (Bareiss-style) Gauss-Jordan elimination:
+        rows are combined with integer multipliers only and every row is divided by the gcd of its entries, so no rounding happens
+        and the numbers stay small. Rows are stored as dictionaries of their nonzero entries, which keeps sparse networks cheap.
+        Each free column gives one basis vector with coprime integer entries.
+
+        Args:
+            stoichiometric_matrix (np.ndarray or scipy.sparse matrix): an integer matrix, e.g. the stoichiometric matrix S (species x reactions)
+
+        Returns:
+            np.ndarray: A 2D array (columns x nullity) whose columns are the basis vectors; int64, or object if an entry does not fit in int64
+    """
+
+    matrix = sparse.csr_matrix(stoichiometric_matrix)
+
+    _, columns = matrix.shape
+
+    rows = []
+
+    for row in range(matrix.shape[0]):
+
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+
+        entries = {int(column): int(value) for column, value in zip(matrix.indices[start:end], matrix.data[start:end]) if value != 0}
+
+        if entries:
+            rows.append(entries)
+
+    pivots = []     # (pivot column, row) of the reduced rows
+
+    for column in range(columns):
+
+        pivot_row = next((row for row in rows if column in row), None)
+
+        if pivot_row is None:
+            continue
+
+        rows.remove(pivot_row)
+
+        pivot_value = pivot_row[column]
+
+        # eliminate the column from the remaining rows and from the rows already reduced
+        for target in rows + [row for _, row in pivots]:
+
+            factor = target.get(column)
+
+            if not factor:
+                continue
+
+            for key in set(target) | set(pivot_row):
+
+                value = pivot_value * target.get(key, 0) - factor * pivot_row.get(key, 0)
+
+                if value:
+                    target[key] = value
+                else:
+                    target.pop(key, None)
+
+            _divide_by_gcd(target)
+
+        rows = [row for row in rows if row]
+
+        pivots.append((column, pivot_row))
+
+    pivot_columns = {column for column, _ in pivots}
+
+    free_columns = [column for column in range(columns) if column not in pivot_columns]
+
+    basis = []
+
+    for free_column in free_columns:
+
+        # x[free] = multiple, x[pivot] = -row[free] * multiple / row[pivot] for every reduced row mentioning the free column
+        involved = [(column, row) for column, row in pivots if free_column in row]
+
+        multiple = 1
+
+        for column, row in involved:
+            multiple = multiple * abs(row[column]) // math.gcd(multiple, abs(row[column]))
+
+        vector = [0] * columns
+
+        vector[free_column] = multiple
+
+        for column, row in involved:
+            vector[column] = -row[free_column] * multiple // row[column]
+
+        divisor = 0
+
+        for value in vector:
+            divisor = math.gcd(divisor, value)
+
+        basis.append([value // divisor for value in vector])
+
+    if not basis:
+        return np.zeros((columns, 0), dtype=np.int64)
+
+    limit = np.iinfo(np.int64).max
+
+    dtype = np.int64 if all(abs(value) <= limit for vector in basis for value in vector) else object
+
+    return np.array(basis, dtype=dtype).T
+
+
+
+def _divide_by_gcd(row: dict) -> None:
+
+    divisor = 0
+
+    for value in row.values():
+        divisor = math.gcd(divisor, value)
+
+    if divisor > 1:
+        for key in row:
+            row[key] //= divisor
+
+
+
+# ********************************
+# *           Function           *
+# ********************************
+def cached_integer_null_space(stoichiometric_matrix) -> np.ndarray:
+    """
+        Returns the integer null space of a matrix from the default cache, computing and caching it if its topology is new
+
+        Args:
+            stoichiometric_matrix (np.ndarray or scipy.sparse matrix): an integer matrix
+
+        Returns:
+            np.ndarray: the basis, as returned by integer_null_space
+    """
+
+    key = topology_hash(stoichiometric_matrix)
+
+    cache = get_default_cache()
+
+    basis = cache.get(key)
+
+    if basis is None:
+
+        basis = integer_null_space(stoichiometric_matrix)
+
+        cache.put(key, basis)
+
+    return basis
+
+
+
+# ********************************
+# *           Function           *
+# ********************************
+def topology_hash(stoichiometric_matrix) -> str:
+    """
+        Returns a canonical hash of an integer matrix: its shape, sparsity pattern and values.
+        Dense and sparse matrices, and matrices stored with different integer dtypes, get the same hash.
+
+        Args:
+            stoichiometric_matrix (np.ndarray or scipy.sparse matrix): an integer matrix
+
+        Returns:
+            str: a hexadecimal SHA-256 digest
+    """
+
+    matrix = sparse.csr_matrix(stoichiometric_matrix, dtype=np.int64)
+
+    matrix.eliminate_zeros()
+    matrix.sort_indices()
+
+    digest = hashlib.sha256()
+
+    digest.update(np.asarray(matrix.shape, dtype=np.int64).tobytes())
+    digest.update(matrix.indptr.astype(np.int64).tobytes())
+    digest.update(matrix.indices.astype(np.int64).tobytes())
+    digest.update(matrix.data.astype(np.int64).tobytes())
+
+    return digest.hexdigest()
+
+
+
+
+class NullSpaceCache:
+    """
+        A cache of integer null-space bases keyed by the topology hash of the stoichiometric matrix.
+        Bases are kept in memory (the least recently used ones are dropped above the maximum size) and,
+        if a directory is given, also saved as .npy files so that they are reused across runs.
+    """
+
+
+    def __init__(self, cache_dir: str = None, max_entries: int = None):
+
+        self._cache_dir: str = cache_dir if cache_dir is not None else NULL_SPACE_CACHE_DIR
+        self._max_entries: int = max_entries if max_entries is not None else NULL_SPACE_CACHE_MAX_ENTRIES
+
+        if not isinstance(self._max_entries, int) or self._max_entries < 1:
+            raise ValueError("The maximum number of cached null spaces must be a positive integer")
+
+        if self._cache_dir:
+            os.makedirs(self._cache_dir, exist_ok=True)
+
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    @property
+    def max_entries(self):
+        return self._max_entries
+
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries or (self._file_path(key) is not None and os.path.isfile(self._file_path(key)))
+
+
+
+    def _file_path(self, key: str) -> str:
+
+        if not self._cache_dir:
+            return None
+
+        return os.path.join(self._cache_dir, key + ".npy")
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def get(self, key: str) -> np.ndarray:
+        """
+            Returns the cached basis of a topology hash, looking in memory first and then on disk
+
+            Args:
+                key (str): the topology hash of the stoichiometric matrix
+
+            Returns:
+                np.ndarray: the basis
+                None: If the topology is not cached
+        """
+
+        with self._lock:
+
+            basis = self._entries.get(key)
+
+            if basis is not None:
+                self._entries.move_to_end(key)
+                return basis
+
+        file_path = self._file_path(key)
+
+        if file_path is None or not os.path.isfile(file_path):
+            return None
+
+        try:
+            basis = np.load(file_path, allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+
+        self._remember(key, basis)
+
+        return basis
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def put(self, key: str, basis: np.ndarray) -> None:
+        """
+            Stores the basis of a topology hash in memory and, if the cache has a directory, on disk
+
+            Args:
+                key (str): the topology hash of the stoichiometric matrix
+                basis (np.ndarray): the integer null-space basis
+
+            Returns:
+                None
+        """
+
+        self._remember(key, basis)
+
+        file_path = self._file_path(key)
+
+        # bases with entries beyond int64 are kept in memory only
+        if file_path is not None and basis.dtype != object:
+
+            temporary_path = file_path + f".{os.getpid()}.tmp.npy"
+
+            np.save(temporary_path, basis)
+
+            os.replace(temporary_path, file_path)
+
+
+
+    def _remember(self, key: str, basis: np.ndarray) -> None:
+
+        basis.setflags(write=False)
+
+        with self._lock:
+
+            self._entries[key] = basis
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+
+    def clear(self) -> None:
+
+        with self._lock:
+            self._entries.clear()
+
+
+
+
+_default_cache: NullSpaceCache = None
+
+
+
+def get_default_cache() -> NullSpaceCache:
+    """
+        Returns the null-space cache shared by all models, creating it on first use.
+        It is saved on disk only if the BIOML_NULL_SPACE_CACHE_DIR environment variable is set.
+    """
+
+    global _default_cache
+
+    if _default_cache is None:
+        _default_cache = NullSpaceCache()
+
+    return _default_cache
+
+
+
+def set_default_cache(cache: NullSpaceCache) -> None:
+    """
+        Replaces the null-space cache shared by all models
+    """
+
+    global _default_cache
+
+    if not isinstance(cache, NullSpaceCache):
+        raise TypeError("The null-space cache must be an instance of NullSpaceCache")
+
+    _default_cache = cache
@@ -0,0 +1,48 @@
+import math
+
+import sympy as sp
+
+
+
+
+# ********************************
+# *           Function           *
+# ********************************
+def kinetic_orders(rate_term: sp.Expr, species_names) -> dict[str, float]:
+    """
+        Extracts the kinetic order of each species in one term of a rate law, i.e. the exponent of the species in a product such as k1*A*B**2.
+        For a mass-action law the kinetic orders of the forward (reverse) term are the stoichiometric coefficients of the reactants (products).
+
+        A species found anywhere else in the term, e.g. in a denominator sum such as Km + A or with a symbolic exponent,
+        does not have a kinetic order and gets NaN, so the term never matches the stoichiometry.
+
+        Args:
+            rate_term (sp.Expr): a forward or reverse term of a rate law; the sign of a reverse term is ignored
+            species_names (iterable of str): the names of the species symbols
+
+        Returns:
+            dict[str, float]: maps every species of the term to its kinetic order
+    """
+
+    species_names = set(species_names)
+
+    orders = {}
+
+    for factor in sp.Mul.make_args(rate_term):
+
+        base, exponent = factor.as_base_exp()
+
+        if base.is_Symbol and str(base) in species_names:
+
+            order = float(exponent) if exponent.is_number else math.nan
+
+            orders[str(base)] = orders.get(str(base), 0.0) + order
+
+            continue
+
+        for symbol in factor.free_symbols:
+
+            if str(symbol) in species_names:
+                orders[str(symbol)] = math.nan
+
+    return orders
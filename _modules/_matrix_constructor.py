@@ -1,4 +1,5 @@
 import numpy as np
+import sympy as sp
 import _modules._exceptions as exceptions
 from _classes.cBioMLModel import BioMLModel
 from _classes.cBioMLReaction import *
@@ -8,6 +9,18 @@ import warnings
 from _modules._constants import *
 
 from scipy.linalg import null_space
+from scipy import sparse
+from scipy.sparse.linalg import lsqr, lsmr
+from scipy.sparse.csgraph import connected_components
+from concurrent.futures import ThreadPoolExecutor
+
+import _modules._integer_null_space as integer_null_space
+import _modules._element_alphabet as element_alphabet
+from _modules._model_reducer import ModelReducer, ReducedNetwork
+import _modules._rate_sweep as rate_sweep
+import _modules._parallel_sweep as parallel_sweep
+from _modules._wegscheider_conditions import WegscheiderConditions
+from _modules._flux_evaluator import FluxEvaluator
     
 
 
@@ -15,90 +28,221 @@ from scipy.linalg import null_space
 class MatrixConstructor:
 
 
+    def __init__(self, backend: str = MATRIX_BACKEND_AUTO):
+
+        self.backend = backend
+
+        self.component_report: list[dict] = None     # the per sub-network verdicts of the last thermodynamic check run by component
+
+
+    @property
+    def backend(self):
+        return self._backend
+    
+    @backend.setter
+    def backend(self, backend):
+        if backend in (MATRIX_BACKEND_DENSE, MATRIX_BACKEND_SPARSE, MATRIX_BACKEND_AUTO):
+            self._backend = backend
+        else:
+            raise ValueError(f"Matrix backend must be \"{MATRIX_BACKEND_DENSE}\", \"{MATRIX_BACKEND_SPARSE}\" or \"{MATRIX_BACKEND_AUTO}\", not \"{backend}\"")
+
+
+
     # ********************************
     # *           Function           *
     # ********************************
-    def construct_stoichiometric_matrix(self, biomlmodel: BioMLModel) -> np.ndarray:
+    def _to_matrix(self, entries: dict, rows: int, columns: int):
         """
-            Constructs the stoichiometric matrix for the given BioModel.
+            Builds a matrix from its nonzero entries, as a dense array or as a sparse CSR matrix depending on the backend.
+            In the "auto" backend the sparse format is used for matrices having at least SPARSE_AUTO_MIN_ENTRIES entries.
+            The smallest integer dtype holding all entries is used.
 
-            Parameters:
-                biomlmodel (BioMLModel): A model of BioML class containing species and reactions.
+            Args:
+                entries (dict): A dictionary mapping (row, column) to the integer value of the entry
+                rows (int): the number of rows
+                columns (int): the number of columns
 
             Returns:
-                np.ndarray: A 2D array representing the stoichiometric matrix, 
-                            where rows correspond to species and columns to reactions.
+                np.ndarray or scipy.sparse.csr_matrix: the matrix
         """
 
-        if biomlmodel == None:
-            raise exceptions.NoModel("No BioModel has been read!!!")
+        row_indices = np.fromiter((row for row, _ in entries), dtype=np.int64, count=len(entries))
+        column_indices = np.fromiter((column for _, column in entries), dtype=np.int64, count=len(entries))
+        values = np.fromiter(entries.values(), dtype=np.int64, count=len(entries))
 
-        species_list = biomlmodel.get_list_of_species()
-        reactions_list = biomlmodel.get_list_of_reactions()
+        return self._arrays_to_matrix(row_indices, column_indices, values, rows, columns)
 
-        if len(species_list) == 0:
-            raise exceptions.EmptyList("There are no species in this model.")
-        
-        if len(reactions_list) == 0:
-            raise exceptions.EmptyList("There are no reactions in this model.")
 
-        rows = BioMLSpecies.get_current_index()
 
-        columns = BioMLReaction.get_current_index()
+    def _arrays_to_matrix(self, row_indices: np.ndarray, column_indices: np.ndarray, values: np.ndarray, rows: int, columns: int, dtype: np.dtype = None):
+        """
+            Builds a matrix, as _to_matrix does, from arrays of the row indices, column indices and values of its nonzero entries (no position may repeat).
+            If no dtype is given, the smallest integer dtype holding the values is used.
+        """
 
-        self.stoichiometric_matrix = np.zeros((rows, columns), dtype = int)
+        if dtype is None:
+            dtype = MatrixConstructor._smallest_int_dtype((values.min(), values.max()) if len(values) else ())
 
-        for individual_reaction in reactions_list:
+        values = values.astype(dtype)
 
-            column = individual_reaction.index
+        if self._backend == MATRIX_BACKEND_SPARSE or (self._backend == MATRIX_BACKEND_AUTO and rows * columns >= SPARSE_AUTO_MIN_ENTRIES):
 
-            if column == None:
-                continue
+            matrix = sparse.csr_matrix((values, (row_indices, column_indices)), shape=(rows, columns), dtype=dtype)
 
-            reaction_reactants = individual_reaction.get_list_of_reactants()
+            matrix.eliminate_zeros()
 
-            for individual_reactant in reaction_reactants:
+            return matrix
 
-                row = individual_reactant.index
+        matrix = np.zeros((rows, columns), dtype = dtype)
 
-                stoichiometry = individual_reactant.get_stoichiometry()
+        matrix[row_indices, column_indices] = values
 
-                self.stoichiometric_matrix[row, column] = -1 * int(stoichiometry)
+        matrix.setflags(write=False)
 
-            reaction_products = individual_reaction.get_list_of_products()
+        return matrix
 
-            for individual_product in reaction_products:
 
-                row = individual_product.index
 
-                stoichiometry = individual_product.get_stoichiometry()
+    @staticmethod
+    def _smallest_int_dtype(values) -> np.dtype:
+        """
+            Returns the smallest signed integer dtype which holds all the values and their negations,
+            so a matrix of that dtype can be negated without wrapping around (e.g. -(-128) in int8)
+        """
+
+        values = list(values)
 
-                self.stoichiometric_matrix[row, column] = int(stoichiometry)
+        low, high = (min(values), max(values)) if values else (0, 0)
+
+        for dtype in (np.int8, np.int16, np.int32):
+            if -np.iinfo(dtype).max <= low and high <= np.iinfo(dtype).max:
+                return np.dtype(dtype)
+
+        return np.dtype(np.int64)
 
-        return self.stoichiometric_matrix
-    
 
 
     # ********************************
     # *           Function           *
     # ********************************
-    def construct_forward_stoichiometric_matrix(self, biomlmodel: BioMLModel) -> np.ndarray:
+    @staticmethod
+    def integer_product(left_matrix, right_matrix):
         """
-            Constructs the forward stoichiometric matrix for the given BioModel.
+            Multiplies two integer matrices, dense or sparse, without overflowing their small dtypes
 
-            Parameters:
-                biomlmodel (an instance of BioModel class): The biological model containing species and reactions.
+            Args:
+                left_matrix (np.ndarray or scipy.sparse matrix): the left matrix
+                right_matrix (np.ndarray or scipy.sparse matrix): the right matrix
 
             Returns:
-                np.ndarray: A 2D array representing the stoichiometric matrix, 
-                            where rows correspond to species and columns to reactions.
+                np.ndarray or scipy.sparse.csr_matrix: the product with int64 entries
+        """
+
+        product = left_matrix.astype(np.int64) @ right_matrix.astype(np.int64)
+
+        if sparse.issparse(product):
+            product = sparse.csr_matrix(product)
+            product.eliminate_zeros()
+
+        return product
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    @staticmethod
+    def nonzero_columns(matrix) -> np.ndarray:
+        """
+            Returns the indices of the columns having at least one nonzero entry, for dense or sparse matrices
+
+            Args:
+                matrix (np.ndarray or scipy.sparse matrix): the matrix
+
+            Returns:
+                np.ndarray: the sorted column indices
+        """
+
+        if sparse.issparse(matrix):
+
+            matrix = matrix.tocoo()
+
+            return np.unique(matrix.col[matrix.data != 0])
+
+        return np.flatnonzero(np.any(np.asarray(matrix) != 0, axis=0))
+
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    @staticmethod
+    def balance_violations(conservation_array, row_names: list[str], column_names: dict) -> list[dict]:
+        """
+            Lists the columns (reactions) of a conservation array, e.g. E @ S, which have nonzero entries, with their imbalance.
+            The violating columns are found by one vectorized test and their nonzero entries by one np.nonzero call, so only the violations are visited.
+
+            Args:
+                conservation_array (np.ndarray or scipy.sparse matrix): the conservation array (conserved quantities x reactions)
+                row_names (list[str]): the name of the quantity of each row, e.g. the chemical elements
+                column_names (dict): maps column indices to reaction IDs
+
+            Returns:
+                list[dict]: one dictionary per violating reaction, in column order, containing "reaction" (ID), "index" (column)
+                            and "imbalance" (a dictionary mapping each unbalanced quantity to the amount produced, negative if consumed)
+        """
+
+        violating_columns = MatrixConstructor.nonzero_columns(conservation_array)
+
+        if len(violating_columns) == 0:
+            return []
+
+        violating_array = conservation_array[:, violating_columns]
+
+        violating_array = violating_array.toarray() if sparse.issparse(violating_array) else np.asarray(violating_array)
+
+        positions, rows = np.nonzero(violating_array.T)
+
+        amounts = violating_array.T[positions, rows]
+
+        boundaries = np.searchsorted(positions, np.arange(1, len(violating_columns)))
+
+        violations = []
+
+        for column, column_rows, column_amounts in zip(violating_columns, np.split(rows, boundaries), np.split(amounts, boundaries)):
+
+            violations.append({
+                "reaction": column_names.get(column, str(column)),
+                "index": int(column),
+                "imbalance": {row_names[row]: int(amount) for row, amount in zip(column_rows, column_amounts)}
+            })
+
+        return violations
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def _assemble_matrices(self, biomlmodel: BioMLModel) -> dict:
+        """
+            Builds the stoichiometric, forward and reverse stoichiometric matrices in a single traversal of the reactions,
+            together with the positions where each species reference takes part in a reaction (used for the charge matrix).
+            The result is cached on the model and reused until the model's structural version, the backend or the matrix size changes.
+            Cached dense matrices are read-only, copy them before changing them.
+
+            Args:
+                biomlmodel (BioMLModel): A model of BioML class containing species and reactions.
+
+            Returns:
+                dict: A dictionary containing "stoichiometric", "forward", "reverse", "participants", "rows" and "columns"
         """
 
         if biomlmodel == None:
             raise exceptions.NoModel("No BioModel has been read!!!")
 
         species_list = biomlmodel.get_list_of_species()
-        parameters_list = biomlmodel.get_list_of_parameters()
         reactions_list = biomlmodel.get_list_of_reactions()
 
         if len(species_list) == 0:
@@ -111,7 +255,17 @@ class MatrixConstructor:
 
         columns = BioMLReaction.get_current_index()
 
-        self.forward_stoichiometric_matrix = np.zeros((rows, columns), dtype = int)
+        cache_key = (biomlmodel.version, self._backend, rows, columns)
+
+        matrices = biomlmodel.get_matrix_cache(cache_key)
+
+        if matrices is not None:
+            return matrices
+
+        stoichiometric_entries = {}
+        forward_entries = {}
+        reverse_entries = {}
+        participants = {}
 
         for individual_reaction in reactions_list:
 
@@ -120,15 +274,78 @@ class MatrixConstructor:
             if column == None:
                 continue
 
-            reaction_reactants = individual_reaction.get_list_of_reactants()
-
-            for individual_reactant in reaction_reactants:
+            for individual_reactant in individual_reaction.get_list_of_reactants():
 
                 row = individual_reactant.index
 
-                stoichiometry = individual_reactant.get_stoichiometry()
+                stoichiometry = int(individual_reactant.get_stoichiometry())
+
+                stoichiometric_entries[row, column] = -1 * stoichiometry
+                forward_entries[row, column] = stoichiometry
+                participants[column, row] = individual_reactant
+
+            for individual_product in individual_reaction.get_list_of_products():
+
+                row = individual_product.index
+
+                stoichiometry = int(individual_product.get_stoichiometry())
+
+                stoichiometric_entries[row, column] = stoichiometry
+                reverse_entries[row, column] = stoichiometry
+                participants[column, row] = individual_product
+
+        matrices = {
+            "stoichiometric": self._to_matrix(stoichiometric_entries, rows, columns),
+            "forward": self._to_matrix(forward_entries, rows, columns),
+            "reverse": self._to_matrix(reverse_entries, rows, columns),
+            "participants": participants,
+            "rows": rows,
+            "columns": columns
+        }
+
+        biomlmodel.set_matrix_cache(cache_key, matrices)
+
+        return matrices
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def construct_stoichiometric_matrix(self, biomlmodel: BioMLModel) -> np.ndarray:
+        """
+            Constructs the stoichiometric matrix for the given BioModel.
+
+            Parameters:
+                biomlmodel (BioMLModel): A model of BioML class containing species and reactions.
+
+            Returns:
+                np.ndarray: A 2D array representing the stoichiometric matrix, 
+                            where rows correspond to species and columns to reactions.
+        """
+
+        self.stoichiometric_matrix = self._assemble_matrices(biomlmodel)["stoichiometric"]
+
+        return self.stoichiometric_matrix
+    
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def construct_forward_stoichiometric_matrix(self, biomlmodel: BioMLModel) -> np.ndarray:
+        """
+            Constructs the forward stoichiometric matrix for the given BioModel.
+
+            Parameters:
+                biomlmodel (an instance of BioModel class): The biological model containing species and reactions.
+
+            Returns:
+                np.ndarray: A 2D array representing the stoichiometric matrix, 
+                            where rows correspond to species and columns to reactions.
+        """
 
-                self.forward_stoichiometric_matrix[row, column] = int(stoichiometry)
+        self.forward_stoichiometric_matrix = self._assemble_matrices(biomlmodel)["forward"]
 
         return self.forward_stoichiometric_matrix
     
@@ -149,43 +366,114 @@ class MatrixConstructor:
                             where rows correspond to species and columns to reactions.
         """
 
-        if biomlmodel == None:
-            raise exceptions.NoModel("No BioModel has been read!!!")
+        self.reverse_stoichiometric_matrix = self._assemble_matrices(biomlmodel)["reverse"]
 
-        species_list = biomlmodel.get_list_of_species()
-        parameters_list = biomlmodel.get_list_of_parameters()
-        reactions_list = biomlmodel.get_list_of_reactions()
+        return self.reverse_stoichiometric_matrix
+    
 
-        if len(species_list) == 0:
-            raise exceptions.EmptyList("There are no species in this model.")
-        
-        if len(reactions_list) == 0:
-            raise exceptions.EmptyList("There are no reactions in this model.")
 
-        rows = BioMLSpecies.get_current_index()
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def construct_kinetic_order_matrices(self, biomlmodel: BioMLModel) -> tuple:
+        """
+            Constructs the forward and reverse kinetic-order matrices of the given BioModel from the species exponents extracted from the rate laws by the readers.
+            Entry (i, j) is the exponent of species i in the forward (reverse) term of the rate law of reaction j; for a mass-action model
+            the matrices equal the forward and reverse stoichiometric matrices. The matrices are cached with the stoichiometric matrices.
 
-        columns = BioMLReaction.get_current_index()
+            Parameters:
+                biomlmodel (BioMLModel): A model of BioML class containing species and reactions.
+
+            Returns:
+                np.ndarray or scipy.sparse.csr_matrix: the forward kinetic-order matrix (species x reactions, float64)
+                np.ndarray or scipy.sparse.csr_matrix: the reverse kinetic-order matrix (species x reactions, float64)
+                np.ndarray: a boolean vector, True for the reactions whose kinetic orders are known, i.e. whose rate law has one product term per direction
+        """
 
-        self.reverse_stoichiometric_matrix = np.zeros((rows, columns), dtype = int)
+        matrices = self._assemble_matrices(biomlmodel)
 
-        for individual_reaction in reactions_list:
+        if "kinetic_orders" in matrices:
+            return matrices["kinetic_orders"]
+
+        species_indices = {species.get_id(): species.index for species in biomlmodel.get_list_of_species()}
+
+        known = np.zeros(matrices["columns"], dtype=bool)
+
+        entries = {"forward": ([], [], []), "reverse": ([], [], [])}
+
+        for individual_reaction in biomlmodel.get_list_of_reactions():
 
             column = individual_reaction.index
 
-            if column == None:
+            if column is None or individual_reaction.forward_kinetic_orders is None or individual_reaction.reverse_kinetic_orders is None:
                 continue
 
-            reaction_products = individual_reaction.get_list_of_products()
+            known[column] = True
 
-            for individual_product in reaction_products:
+            # the species references of the reaction take precedence, they carry the rows of the stoichiometric matrix
+            reaction_indices = dict(species_indices)
+            reaction_indices.update({species_reference.get_id(): species_reference.index
+                                     for species_reference in individual_reaction.get_list_of_reactants() + individual_reaction.get_list_of_products()})
 
-                row = individual_product.index
+            for direction, orders in (("forward", individual_reaction.forward_kinetic_orders), ("reverse", individual_reaction.reverse_kinetic_orders)):
 
-                stoichiometry = individual_product.get_stoichiometry()
+                row_indices, column_indices, values = entries[direction]
+
+                for species_id, order in orders.items():
+
+                    row = reaction_indices.get(species_id)
+
+                    if row is not None and order != 0:
+                        row_indices.append(row)
+                        column_indices.append(column)
+                        values.append(order)
+
+        kinetic_order_matrices = tuple(
+            self._arrays_to_matrix(np.asarray(row_indices, dtype=np.int64), np.asarray(column_indices, dtype=np.int64),
+                                   np.asarray(values, dtype=np.float64), matrices["rows"], matrices["columns"], dtype=np.dtype(np.float64))
+            for row_indices, column_indices, values in entries.values()
+        ) + (known,)
+
+        known.setflags(write=False)
+
+        matrices["kinetic_orders"] = kinetic_order_matrices
+
+        return kinetic_order_matrices
 
-                self.reverse_stoichiometric_matrix[row, column] = int(stoichiometry)
 
-        return self.reverse_stoichiometric_matrix
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def find_kinetic_order_mismatches(self, biomlmodel: BioMLModel) -> np.ndarray:
+        """
+            Compares the kinetic-order matrices with the forward and reverse stoichiometric matrices in one array comparison:
+            both pairs are stacked and every reaction whose column differs anywhere is a mismatch, i.e. its rate law is not the mass-action law of its stoichiometry.
+            Reactions whose kinetic orders are unknown are not reported.
+
+            Parameters:
+                biomlmodel (BioMLModel): A model of BioML class containing species and reactions.
+
+            Returns:
+                np.ndarray: the sorted column indices of the mismatching reactions
+        """
+
+        forward_orders, reverse_orders, known = self.construct_kinetic_order_matrices(biomlmodel)
+
+        forward_stoichiometry = self.construct_forward_stoichiometric_matrix(biomlmodel)
+        reverse_stoichiometry = self.construct_reverse_stoichiometric_matrix(biomlmodel)
+
+        # NaN marks a species which is not a plain factor of the rate law, so it counts as a difference
+        if sparse.issparse(forward_orders):
+            differences = sparse.csr_matrix(sparse.vstack([forward_orders, reverse_orders]) - sparse.vstack([forward_stoichiometry, reverse_stoichiometry]))
+            differences.data = np.nan_to_num(differences.data, nan=1.0)
+        else:
+            differences = np.nan_to_num(np.vstack([forward_orders, reverse_orders]) - np.vstack([forward_stoichiometry, reverse_stoichiometry]), nan=1.0)
+
+        mismatches = MatrixConstructor.nonzero_columns(differences)
+
+        return mismatches[known[mismatches]]
+
 
 
     # ********************************
@@ -241,9 +529,10 @@ class MatrixConstructor:
 
         for species in species_list:
 
-            if species.compound:
+            # a compound found in ChEBI is not used, so the names are the same before and after the resolution, and naming the rows never goes to ChEBI
+            if species._compound and not species._compound_from_chebi:
 
-                row_indices_names[species.index] = species.compound
+                row_indices_names[species.index] = species._compound
 
             else:
 
@@ -293,9 +582,9 @@ class MatrixConstructor:
             reaction = column_indices_names[j]
 
             if printing:
-                utility.printer(f"\nThe stoichiometric coefficient for {species} in reaction {reaction} is: ", f"{self.stoichiometric_matrix[i][j]}")
+                utility.printer(f"\nThe stoichiometric coefficient for {species} in reaction {reaction} is: ", f"{self.stoichiometric_matrix[i, j]}")
 
-            return f"The stoichiometric coefficient for {species} in reaction {reaction} is: {self.stoichiometric_matrix[i][j]}"
+            return f"The stoichiometric coefficient for {species} in reaction {reaction} is: {self.stoichiometric_matrix[i, j]}"
     
 
 
@@ -351,98 +640,853 @@ class MatrixConstructor:
         return vector_of_kinetic_constants
     
 
+
     # ********************************
     # *           Function           *
     # ********************************
-    def construct_kinetic_thermo_conversion_matrix(self, biomlmodel: BioMLModel, printing: bool = False) -> np.ndarray:
+    def construct_rate_constant_vectors(self, biomlmodel: BioMLModel) -> tuple[np.ndarray, np.ndarray]:
         """
-            Returns a 2D numpy array that converts kinetic reaction rate constants to corresponding thermodynamic reaction rate constants
+            Returns the forward and reverse kinetic rate constants of all reactions, one entry per column of the stoichiometric matrix.
+            The rate constants are the numeric coefficients of the forward (positive) and reverse (negative) terms of the expanded rate law,
+            so a common factor such as the compartment in cell*(k1*A*B - k2*C) is folded into both of them.
+            A reaction without a reverse term (irreversible) gets a reverse rate constant of zero; a reaction without a rate law keeps the rate constants found by the reader.
 
             Args:
                 biomlmodel (BioMlModel): A model of BioML class containing species and reactions.
-                printing (bool): if this value is True, a message will be displayed to show the result
 
             Returns:
-                np.ndarray: A 2D numpy array
+                np.ndarray: the forward rate constants k+
+                np.ndarray: the reverse rate constants k-
+
+            Raises:
+                ValueError: if a rate law has more than one term per direction, or a parameter or compartment of a coefficient has no value
         """
 
         if biomlmodel is None:
             raise exceptions.NoModel("No BioModel has been read!!!")
 
-        reactions_number = BioMLReaction.get_current_index()
+        columns = BioMLReaction.get_current_index()
 
-        identity_array = np.eye(reactions_number)
+        forward_rate_constants = np.zeros(columns)
+        reverse_rate_constants = np.zeros(columns)
 
-        forward_stoichiometric_matrix = self.construct_forward_stoichiometric_matrix(biomlmodel)
+        species = {single_species.get_id() for single_species in biomlmodel.get_list_of_species()}
 
-        reverse_stoichiometric_matrix = self.construct_reverse_stoichiometric_matrix(biomlmodel)
+        values = dict(biomlmodel.compartment_sizes)
+        values.update({parameter.get_id(): parameter.get_value() for parameter in biomlmodel.get_list_of_parameters() if parameter.get_value() is not None})
 
-        transposed_forward_stoichiometric_matrix = np.transpose(forward_stoichiometric_matrix)
+        for biomlmodel_reaction in biomlmodel.get_list_of_reactions():
 
-        transposed_reverse_stoichiometric_matrix = np.transpose(reverse_stoichiometric_matrix)
+            if biomlmodel_reaction.index is None:
+                continue
 
-        conversion_matrix = np.block( [ [ identity_array, transposed_forward_stoichiometric_matrix ], [ identity_array, transposed_reverse_stoichiometric_matrix ] ] )
+            if biomlmodel_reaction.expanded_kinetic_law or biomlmodel_reaction.kinetic_law:
 
-        if printing:
-            utility.printer("\nConversion Matrix is\n:", conversion_matrix)
+                reaction_values = dict(values)
+                reaction_values.update({parameter.get_id(): parameter.get_value() for parameter in biomlmodel_reaction.local_parameters if parameter.get_value() is not None})
 
-        return conversion_matrix
-    
+                forward_rate_constants[biomlmodel_reaction.index], reverse_rate_constants[biomlmodel_reaction.index] = \
+                    MatrixConstructor._rate_law_coefficients(biomlmodel_reaction, species, reaction_values)
 
-    # ********************************
-    # *           Function           *
-    # ********************************
-    def check_kinetic_rates_thermo_compatibility(self, biomlmodel: BioMLModel, printing: bool = False) -> bool:
-        """
-            Checks the validity of Kinetic reaction rate constants in thermodynamic framework.
-            The function uses Wegscheider conditions to check thermodynamic compatibility of constants
+                continue
 
-            Args:
-                biomlmodel (BioMlModel): A model of BioML class containing species and reactions.
-                printing (bool): if this value is True, a message will be displayed to show the result
+            if biomlmodel_reaction.kinetic_forward_rate_constant_value is None:
+                raise ValueError(f"There is no value for the forward reaction rate constant of reaction {biomlmodel_reaction.get_id()}: {biomlmodel_reaction.get_kinetic_law()}")
 
-            Returns:
-                bool: True if the reaction rate constants are compatible and meaningful, False otherwise
-        """
+            forward_rate_constants[biomlmodel_reaction.index] = biomlmodel_reaction.kinetic_forward_rate_constant_value
 
-        if biomlmodel is None:
-            raise exceptions.NoModel("No BioModel has been read!!!")
-        
+            if biomlmodel_reaction.kinetic_reverse_rate_constant_value is not None:
+                reverse_rate_constants[biomlmodel_reaction.index] = biomlmodel_reaction.kinetic_reverse_rate_constant_value
 
-        kinetic_rates_vector = self.construct_kinetic_constants_vector(biomlmodel)
+        return forward_rate_constants, reverse_rate_constants
 
-        with warnings.catch_warnings():
 
-            warnings.simplefilter('error', RuntimeWarning)
 
-            logn_kinetic_rates_vector = np.log(kinetic_rates_vector)
+    @staticmethod
+    def _rate_law_coefficients(biomlmodel_reaction: BioMLReaction, species: set[str], values: dict) -> tuple[float, float]:
 
-        logn_kinetic_rates_vector = logn_kinetic_rates_vector.reshape(-1,1)
+        forward_rate_constant, reverse_rate_constant = None, 0.0
 
-        stoichiometric_matrix = self.construct_stoichiometric_matrix(biomlmodel)
+        for term in sp.Add.make_args(biomlmodel_reaction.get_sympy_kinetic_law(KINETIC_LAW_FORM_EXPANDED)):
 
-        minus_stoichiometric_matrix = -1 * stoichiometric_matrix
+            # the coefficient is everything but the species, e.g. cell*k1 of cell*k1*A*B
+            coefficient = sp.Mul(*[factor for factor in sp.Mul.make_args(term) if not {str(symbol) for symbol in factor.free_symbols} & species])
 
-        minus_stoichiometric_null_space = null_space(minus_stoichiometric_matrix)
+            unknown = sorted(str(symbol) for symbol in coefficient.free_symbols if str(symbol) not in values)
 
-        transposed_minus_stoichiometric_null_space = minus_stoichiometric_null_space.T
+            if unknown:
+                raise ValueError(f"There is no value for {', '.join(unknown)} in the rate law of reaction {biomlmodel_reaction.get_id()}")
 
-        result = transposed_minus_stoichiometric_null_space @ logn_kinetic_rates_vector
+            coefficient = float(coefficient.subs({symbol: values[str(symbol)] for symbol in coefficient.free_symbols}))
 
-        if np.all(np.abs(result) <= 1e-2):
+            if coefficient >= 0 and forward_rate_constant is None:
+                forward_rate_constant = coefficient
 
-            if printing:
-                utility.printer("\nThermodynamic Compatibility Check: ","The kinetic reaction rate constants are compatible with thermodynamic constraints\n", text_color="green", text_style="bold")
+            elif coefficient < 0 and reverse_rate_constant == 0.0:
+                reverse_rate_constant = -coefficient
 
-            return True
-        
-        else:
+            else:
+                raise ValueError(f"The rate law of reaction {biomlmodel_reaction.get_id()} has more than one term per direction")
 
-            if printing:
-                utility.printer("\nThermodynamic Compatibility Check: ","The kinetic reaction rate constants are NOT compatible with thermodynamic constraints\n", text_color="red", text_style="bold")
-            
-            return False
-        
+        return (forward_rate_constant if forward_rate_constant is not None else 0.0), reverse_rate_constant
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def construct_flux_evaluator(self, biomlmodel: BioMLModel) -> FluxEvaluator:
+        """
+            Compiles the forward and reverse stoichiometric matrices and the rate constants of a mass-action model into a NumPy flux evaluator.
+            The rate constants are read when the evaluator is built, so build a new one after changing them.
+
+            Args:
+                biomlmodel (BioMlModel): A model of BioML class containing species and reactions.
+
+            Returns:
+                FluxEvaluator: evaluates the fluxes (states x reactions) of a block of concentration states (states x species)
+        """
+
+        forward_rate_constants, reverse_rate_constants = self.construct_rate_constant_vectors(biomlmodel)
+
+        return FluxEvaluator(self.construct_forward_stoichiometric_matrix(biomlmodel), self.construct_reverse_stoichiometric_matrix(biomlmodel),
+                             forward_rate_constants, reverse_rate_constants)
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def construct_kinetic_thermo_conversion_matrix(self, biomlmodel: BioMLModel, printing: bool = False) -> np.ndarray:
+        """
+            Returns a 2D numpy array that converts kinetic reaction rate constants to corresponding thermodynamic reaction rate constants
+
+            Args:
+                biomlmodel (BioMlModel): A model of BioML class containing species and reactions.
+                printing (bool): if this value is True, a message will be displayed to show the result
+
+            Returns:
+                np.ndarray: A 2D numpy array
+        """
+
+        if biomlmodel is None:
+            raise exceptions.NoModel("No BioModel has been read!!!")
+
+        reactions_number = BioMLReaction.get_current_index()
+
+        forward_stoichiometric_matrix = self.construct_forward_stoichiometric_matrix(biomlmodel)
+
+        reverse_stoichiometric_matrix = self.construct_reverse_stoichiometric_matrix(biomlmodel)
+
+        transposed_forward_stoichiometric_matrix = forward_stoichiometric_matrix.T
+
+        transposed_reverse_stoichiometric_matrix = reverse_stoichiometric_matrix.T
+
+        if sparse.issparse(forward_stoichiometric_matrix):
+
+            identity_array = sparse.identity(reactions_number, format="csr")
+
+            conversion_matrix = sparse.bmat( [ [ identity_array, transposed_forward_stoichiometric_matrix ], [ identity_array, transposed_reverse_stoichiometric_matrix ] ], format="csr" )
+
+        else:
+
+            identity_array = np.eye(reactions_number)
+
+            conversion_matrix = np.block( [ [ identity_array, transposed_forward_stoichiometric_matrix ], [ identity_array, transposed_reverse_stoichiometric_matrix ] ] )
+
+        if printing:
+            utility.printer("\nConversion Matrix is\n:", conversion_matrix)
+
+        return conversion_matrix
+    
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def construct_integer_null_space(self, biomlmodel: BioMLModel) -> np.ndarray:
+        """
+            Returns an exact integer basis of the null space of the stoichiometric matrix, one column per independent Wegscheider condition.
+            The basis is cached under the topology hash of S, in memory and optionally on disk, so models sharing a network structure
+            (e.g. versions of one pathway with different parameters) compute it only once.
+
+            Args:
+                biomlmodel (BioMLModel): A model of BioML class containing species and reactions.
+
+            Returns:
+                np.ndarray: A 2D integer array (reactions x nullity)
+        """
+
+        matrices = self._assemble_matrices(biomlmodel)
+
+        if "integer_null_space" in matrices:
+            return matrices["integer_null_space"]
+
+        basis = integer_null_space.cached_integer_null_space(matrices["stoichiometric"])
+
+        matrices["integer_null_space"] = basis
+
+        return basis
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def construct_wegscheider_conditions(self, biomlmodel: BioMLModel) -> WegscheiderConditions:
+        """
+            Derives the explicit Wegscheider conditions of the model, one per vector of the integer null space of S.
+            The rate constants are named after the parameters of the kinetic laws; a reaction without a named rate constant
+            gets the symbols k_forward_<reaction ID> and k_reverse_<reaction ID>.
+
+            Args:
+                biomlmodel (BioMLModel): A model of BioML class containing species and reactions.
+
+            Returns:
+                WegscheiderConditions: the conditions, which can be checked symbolically or evaluated by a compiled NumPy function
+        """
+
+        if biomlmodel is None:
+            raise exceptions.NoModel("No BioModel has been read!!!")
+
+        basis = self.construct_integer_null_space(biomlmodel)
+
+        reactions_by_index = {reaction.index: reaction for reaction in biomlmodel.get_list_of_reactions()}
+
+        reaction_ids, forward_rate_constants, reverse_rate_constants = [], [], []
+
+        for column in range(basis.shape[0]):
+
+            reaction = reactions_by_index.get(column)
+
+            reaction_id = reaction.ID if reaction is not None else str(column)
+
+            reaction_ids.append(reaction_id)
+
+            forward_rate_constants.append(reaction.kinetic_forward_rate_constant if reaction is not None and reaction.kinetic_forward_rate_constant else SWEEP_FORWARD_COLUMN_PREFIX + reaction_id)
+            reverse_rate_constants.append(reaction.kinetic_reverse_rate_constant if reaction is not None and reaction.kinetic_reverse_rate_constant else SWEEP_REVERSE_COLUMN_PREFIX + reaction_id)
+
+        return WegscheiderConditions(basis, forward_rate_constants, reverse_rate_constants, reaction_ids)
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    @staticmethod
+    def row_space_residual(stoichiometric_matrix, logn_kinetic_rates_vector: np.ndarray, engine: str = THERMO_ENGINE_LSQR) -> np.ndarray:
+        """
+            Returns the residual r = ln(k+/k-) - S^T mu of the least-squares solution mu of S^T mu = ln(k+/k-).
+            The residual is the part of ln(k+/k-) outside the row space of S, so it is zero (up to the solver tolerance) exactly when the Wegscheider conditions hold.
+            Its norm equals the norm of the projection used by the null-space engine, and each entry shows how far the constants of one reaction are off.
+
+            Args:
+                stoichiometric_matrix (np.ndarray or scipy.sparse matrix): the stoichiometric matrix S (species x reactions)
+                logn_kinetic_rates_vector (np.ndarray): ln(k+/k-) for all reactions
+                engine (str): "lsqr" or "lsmr"
+
+            Returns:
+                np.ndarray: A 1D array containing the residual of each reaction
+        """
+
+        transposed_stoichiometric_matrix = sparse.csr_matrix(stoichiometric_matrix, dtype=np.float64).T.tocsr()
+
+        logn_kinetic_rates_vector = np.asarray(logn_kinetic_rates_vector, dtype=np.float64).ravel()
+
+        if engine == THERMO_ENGINE_LSMR:
+            solution = lsmr(transposed_stoichiometric_matrix, logn_kinetic_rates_vector, atol=THERMO_SOLVER_TOLERANCE, btol=THERMO_SOLVER_TOLERANCE, maxiter=THERMO_SOLVER_MAX_ITERATIONS)
+        else:
+            solution = lsqr(transposed_stoichiometric_matrix, logn_kinetic_rates_vector, atol=THERMO_SOLVER_TOLERANCE, btol=THERMO_SOLVER_TOLERANCE, iter_lim=THERMO_SOLVER_MAX_ITERATIONS)
+
+        mu, stop_reason, iterations = solution[0], solution[1], solution[2]
+
+        if iterations >= THERMO_SOLVER_MAX_ITERATIONS:
+            utility.add_warning(f"The {engine.upper()} solver stopped after {iterations} iterations (reason {stop_reason}) before converging; the thermodynamic check may be inaccurate")
+
+        return logn_kinetic_rates_vector - transposed_stoichiometric_matrix @ mu
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    @staticmethod
+    def thermodynamic_basis(stoichiometric_matrix, engine: str = THERMO_ENGINE_NULL_SPACE) -> np.ndarray:
+        """
+            Returns the basis ln(k+/k-) is projected onto to test the Wegscheider conditions: every basis vector is a cycle of the network with unit length
+
+            Args:
+                stoichiometric_matrix (np.ndarray or scipy.sparse matrix): the stoichiometric matrix S (species x reactions)
+                engine (str): "null_space" for an orthonormal basis of the null space of -S (a dense SVD),
+                              or "exact" for the exact integer null space of S, cached by network topology, with each vector scaled to unit length.
+                              "null_space" densifies a sparse S, which needs memory for species x reactions floats on genome-scale models;
+                              the "lsqr" and "lsmr" engines of check_kinetic_rates_thermo_compatibility keep S sparse and form no basis
+
+            Returns:
+                np.ndarray: A 2D array (reactions x cycles)
+        """
+
+        if engine == THERMO_ENGINE_NULL_SPACE:
+
+            # S is converted to floats before it is negated, a small integer dtype would wrap around (-(-128) is -128 in int8)
+            if sparse.issparse(stoichiometric_matrix):
+                # the null space is computed with a dense SVD
+                minus_stoichiometric_matrix = -sparse.csr_matrix(stoichiometric_matrix, dtype=np.float64).toarray()
+
+            else:
+                minus_stoichiometric_matrix = -np.asarray(stoichiometric_matrix, dtype=np.float64)
+
+            return null_space(minus_stoichiometric_matrix)
+
+        elif engine == THERMO_ENGINE_EXACT:
+
+            integer_basis = integer_null_space.cached_integer_null_space(stoichiometric_matrix).astype(np.float64)
+
+            # each basis vector is scaled to unit length, so the tolerance means the same as for the orthonormal basis of "null_space"
+            return integer_basis / np.linalg.norm(integer_basis, axis=0) if integer_basis.shape[1] else integer_basis
+
+        else:
+            raise ValueError(f"A thermodynamic basis is computed by the \"{THERMO_ENGINE_NULL_SPACE}\" or \"{THERMO_ENGINE_EXACT}\" engine, not by \"{engine}\"")
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def _wegscheider_deviation(self, stoichiometric_matrix, logn_kinetic_rates_vector: np.ndarray, engine: str) -> np.ndarray:
+        """
+            Returns how far ln(k+/k-) is from satisfying the Wegscheider conditions of a stoichiometric matrix, using one of the engines
+            described in check_kinetic_rates_thermo_compatibility. The constants are compatible if the deviation is within THERMO_TOLERANCE.
+            Every engine measures the same quantity, the norm of the projection of ln(k+/k-) onto the null space of S:
+            the norm of the residual for "lsqr" and "lsmr", and the norm of the coordinates in an orthonormal basis for "null_space" and "exact".
+
+            Args:
+                stoichiometric_matrix (np.ndarray or scipy.sparse matrix): the stoichiometric matrix S (species x reactions)
+                logn_kinetic_rates_vector (np.ndarray): ln(k+/k-) for the reactions (columns) of S
+                engine (str): "null_space", "lsqr", "lsmr" or "exact"
+
+            Returns:
+                np.ndarray: a 1D array holding the deviation
+        """
+
+        if engine in (THERMO_ENGINE_NULL_SPACE, THERMO_ENGINE_EXACT):
+
+            basis = MatrixConstructor.thermodynamic_basis(stoichiometric_matrix, engine)
+
+            # the unit cycles of "exact" are not orthogonal to each other, so their coordinates would not add up to the projection
+            if engine == THERMO_ENGINE_EXACT:
+                basis = np.linalg.qr(basis)[0]
+
+            projection = basis.T @ np.asarray(logn_kinetic_rates_vector, dtype=np.float64).ravel()
+
+        else:
+
+            projection = MatrixConstructor.row_space_residual(stoichiometric_matrix, logn_kinetic_rates_vector, engine)
+
+        return np.array([np.linalg.norm(projection)])
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    @staticmethod
+    def connected_components(stoichiometric_matrix) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+            Returns the weakly connected components of the bipartite graph linking each column (reaction) of a stoichiometric matrix to its rows (species)
+
+            Args:
+                stoichiometric_matrix (np.ndarray or scipy.sparse matrix): the stoichiometric matrix S (species x reactions)
+
+            Returns:
+                list[tuple[np.ndarray, np.ndarray]]: the row indices and column indices of each component
+        """
+
+        pattern = sparse.csr_matrix(stoichiometric_matrix != 0, dtype=np.int8)
+
+        rows, columns = pattern.shape
+
+        bipartite_graph = sparse.bmat([[None, pattern], [pattern.T, None]], format="csr")
+
+        _, labels = connected_components(bipartite_graph, directed=False)
+
+        species_labels, reaction_labels = labels[:rows], labels[rows:]
+
+        components = []
+
+        for label in np.unique(reaction_labels):
+
+            components.append((np.flatnonzero(species_labels == label), np.flatnonzero(reaction_labels == label)))
+
+        return components
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def find_connected_components(self, biomlmodel: BioMLModel) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+            Splits the model into independent sub-networks: the weakly connected components of the bipartite graph linking each reaction to its species.
+            The stoichiometric matrix is block diagonal over the components, so the Wegscheider conditions of the model are the union of those of its components.
+            Reactions without species form components of their own; species which take part in no reaction are left out.
+
+            Args:
+                biomlmodel (BioMLModel): A model of BioML class containing species and reactions.
+
+            Returns:
+                list[tuple[np.ndarray, np.ndarray]]: the species (row) indices and reaction (column) indices of each component
+        """
+
+        matrices = self._assemble_matrices(biomlmodel)
+
+        if "components" in matrices:
+            return matrices["components"]
+
+        components = MatrixConstructor.connected_components(matrices["stoichiometric"])
+
+        matrices["components"] = components
+
+        return components
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def reduce_network(self, biomlmodel: BioMLModel, prune_dead_ends: bool = True) -> ReducedNetwork:
+        """
+            Returns the structurally reduced stoichiometric matrix of the model (see ModelReducer), cached until the model changes.
+            Dead-end pruning keeps the Wegscheider conditions but drops reactions, so it must be switched off for per-reaction checks such as mass balance.
+
+            Args:
+                biomlmodel (BioMLModel): A model of BioML class containing species and reactions.
+                prune_dead_ends (bool): if this value is True, dead-end species and their reactions are removed
+
+            Returns:
+                ReducedNetwork: the reduced network and its mapping back to the species and reactions of the model
+        """
+
+        matrices = self._assemble_matrices(biomlmodel)
+
+        key = "reduced" if prune_dead_ends else "reduced_without_pruning"
+
+        if key not in matrices:
+            matrices[key] = ModelReducer.reduce(matrices["stoichiometric"], prune_dead_ends=prune_dead_ends)
+
+        return matrices[key]
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def _check_components(self, stoichiometric_matrix, logn_kinetic_rates_vector: np.ndarray, engine: str, components: list[tuple[np.ndarray, np.ndarray]],
+                          species_names: list[list[str]], reaction_names: list[list[str]], extra_deviation: np.ndarray = None,
+                          parallel: bool = False, max_workers: int = None) -> tuple[bool, list[dict]]:
+        """
+            Runs the Wegscheider check on every connected sub-network and merges the verdicts
+
+            Args:
+                stoichiometric_matrix (np.ndarray or scipy.sparse matrix): the stoichiometric matrix of the model, or of its reduced network
+                logn_kinetic_rates_vector (np.ndarray): ln(k+/k-) for the columns of the matrix
+                engine (str): "null_space", "lsqr", "lsmr" or "exact"
+                components (list[tuple[np.ndarray, np.ndarray]]): the row indices and column indices of each sub-network
+                species_names (list[list[str]]): the IDs of the species each row stands for
+                reaction_names (list[list[str]]): the IDs of the reactions each column stands for
+                extra_deviation (np.ndarray): deviations already known for the columns, e.g. those of lumped reactions
+                parallel (bool): if this value is True, the sub-networks are checked concurrently
+                max_workers (int): the maximum number of sub-networks checked at the same time
+
+            Returns:
+                bool: True if all sub-networks are compatible, False otherwise
+                list[dict]: one dictionary per sub-network containing "component", "species", "reactions", "compatible" and "max_deviation"
+        """
+
+        stoichiometric_matrix = sparse.csr_matrix(stoichiometric_matrix) if sparse.issparse(stoichiometric_matrix) else np.asarray(stoichiometric_matrix)
+
+        def check_component(component):
+
+            species_indices, reaction_indices = component
+
+            sub_matrix = stoichiometric_matrix[species_indices][:, reaction_indices]
+
+            deviation = np.abs(self._wegscheider_deviation(sub_matrix, logn_kinetic_rates_vector[reaction_indices], engine)).ravel()
+
+            if extra_deviation is not None:
+                deviation = np.concatenate([deviation, extra_deviation[reaction_indices]])
+
+            max_deviation = float(deviation.max()) if deviation.size else 0.0
+
+            return max_deviation <= THERMO_TOLERANCE, max_deviation
+
+        if parallel and len(components) > 1:
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                verdicts = list(executor.map(check_component, components))
+
+        else:
+            verdicts = [check_component(component) for component in components]
+
+        report = []
+
+        for number, ((species_indices, reaction_indices), (compatible, max_deviation)) in enumerate(zip(components, verdicts)):
+
+            report.append({
+                "component": number,
+                "species": [name for index in species_indices for name in species_names[index]],
+                "reactions": [name for index in reaction_indices for name in reaction_names[index]],
+                "compatible": compatible,
+                "max_deviation": max_deviation
+            })
+
+        return all(compatible for compatible, _ in verdicts), report
+
+
+
+    def _matrix_names(self, biomlmodel: BioMLModel, reduced_network: ReducedNetwork = None) -> tuple[list[list[str]], list[list[str]]]:
+
+        matrices = self._assemble_matrices(biomlmodel)
+
+        species_ids = {species.index: species.ID for species in biomlmodel.get_list_of_species()}
+        reaction_ids = {reaction.index: reaction.ID for reaction in biomlmodel.get_list_of_reactions()}
+
+        if reduced_network is None:
+            species_groups = [[row] for row in range(matrices["rows"])]
+            reaction_groups = [[column] for column in range(matrices["columns"])]
+        else:
+            species_groups = reduced_network.species_groups
+            reaction_groups = reduced_network.reaction_groups
+
+        species_names = [[species_ids.get(index, str(index)) for index in group] for group in species_groups]
+        reaction_names = [[reaction_ids.get(index, str(index)) for index in group] for group in reaction_groups]
+
+        return species_names, reaction_names
+
+
+
+    def _fold_lumping_deviation(self, biomlmodel: BioMLModel, reduced_network: ReducedNetwork, lumping_deviation: np.ndarray) -> tuple[np.ndarray, list[dict]]:
+        """
+            Attributes the deviations of lumped reactions to the reduced column of their group.
+            Groups pruned as dead ends have no column any more, so each of them is reported as a sub-network of its own.
+        """
+
+        group_of = {}
+
+        for column, group in enumerate(reduced_network.reaction_groups):
+            for reaction in group:
+                group_of[reaction] = column
+
+        for number, group in enumerate(reduced_network.pruned_reaction_groups):
+            for reaction in group:
+                group_of[reaction] = -1 - number
+
+        extra_deviation = np.zeros(reduced_network.shape[1])
+        pruned_deviation = np.zeros(len(reduced_network.pruned_reaction_groups))
+
+        for (member, _, _), deviation in zip(reduced_network.lumped_pairs, lumping_deviation):
+
+            column = group_of[member]
+
+            if column >= 0:
+                extra_deviation[column] = max(extra_deviation[column], deviation)
+            else:
+                pruned_deviation[-1 - column] = max(pruned_deviation[-1 - column], deviation)
+
+        reaction_ids = {reaction.index: reaction.ID for reaction in biomlmodel.get_list_of_reactions()}
+
+        pruned_report = []
+
+        for group, deviation in zip(reduced_network.pruned_reaction_groups, pruned_deviation):
+
+            # a pruned reaction which was never lumped closes no cycle and needs no entry
+            if len(group) < 2:
+                continue
+
+            pruned_report.append({
+                "component": None,
+                "species": [],
+                "reactions": [reaction_ids.get(reaction, str(reaction)) for reaction in group],
+                "compatible": bool(deviation <= THERMO_TOLERANCE),
+                "max_deviation": float(deviation)
+            })
+
+        return extra_deviation, pruned_report
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def check_kinetic_rates_thermo_compatibility(self, biomlmodel: BioMLModel, printing: bool = False, engine: str = THERMO_ENGINE_NULL_SPACE,
+                                                 by_component: bool = False, parallel: bool = False, max_workers: int = None, reduce: bool = False) -> bool:
+        """
+            Checks the validity of Kinetic reaction rate constants in thermodynamic framework.
+            The function uses Wegscheider conditions to check thermodynamic compatibility of constants.
+            The conditions hold if ln(k+/k-) lies in the row space of the stoichiometric matrix, which can be tested by one of two engines:
+                - "null_space": projects ln(k+/k-) onto a basis of the null space of -S (a dense SVD, which densifies a sparse S)
+                - "lsqr" or "lsmr": solves the least-squares problem S^T mu = ln(k+/k-) with an iterative sparse solver
+                  and checks the residual, without forming a null-space basis
+                - "exact": projects ln(k+/k-) onto the exact integer null space of S, which is cached by network topology
+            Every engine compares the norm of the projection of ln(k+/k-) onto the null space of S with THERMO_TOLERANCE, so they give the same verdict.
+
+            Args:
+                biomlmodel (BioMlModel): A model of BioML class containing species and reactions.
+                printing (bool): if this value is True, a message will be displayed to show the result
+                engine (str): "null_space", "lsqr", "lsmr" or "exact"
+                by_component (bool): if this value is True, the species-reaction network is split into its connected sub-networks,
+                                     each one is checked on its own and the verdicts are kept in self.component_report
+                parallel (bool): if this value is True, the sub-networks are checked concurrently
+                max_workers (int): the maximum number of sub-networks checked at the same time
+                reduce (bool): if this value is True, the check runs on the structurally reduced network (see reduce_network),
+                               the two-reaction cycles of lumped reactions are checked on their own
+
+            Returns:
+                bool: True if the reaction rate constants are compatible and meaningful, False otherwise
+        """
+
+        if biomlmodel is None:
+            raise exceptions.NoModel("No BioModel has been read!!!")
+        
+        if engine not in (THERMO_ENGINE_NULL_SPACE, THERMO_ENGINE_LSQR, THERMO_ENGINE_LSMR, THERMO_ENGINE_EXACT):
+            raise ValueError(f"Thermodynamic engine must be \"{THERMO_ENGINE_NULL_SPACE}\", \"{THERMO_ENGINE_LSQR}\", \"{THERMO_ENGINE_LSMR}\" or \"{THERMO_ENGINE_EXACT}\", not \"{engine}\"")
+
+
+        kinetic_rates_vector = self.construct_kinetic_constants_vector(biomlmodel)
+
+        with warnings.catch_warnings():
+
+            warnings.simplefilter('error', RuntimeWarning)
+
+            logn_kinetic_rates_vector = np.log(kinetic_rates_vector)
+
+        stoichiometric_matrix = self.construct_stoichiometric_matrix(biomlmodel)
+
+        reduced_network = None
+        lumping_deviation = np.zeros(0)
+
+        if reduce:
+
+            reduced_network = self.reduce_network(biomlmodel)
+
+            lumping_deviation = np.abs(reduced_network.lumping_deviation(logn_kinetic_rates_vector))
+
+            stoichiometric_matrix = reduced_network.stoichiometric_matrix
+
+            logn_kinetic_rates_vector = logn_kinetic_rates_vector.ravel()[reduced_network.reactions]
+
+        if by_component:
+
+            components = MatrixConstructor.connected_components(stoichiometric_matrix) if reduce else self.find_connected_components(biomlmodel)
+
+            species_names, reaction_names = self._matrix_names(biomlmodel, reduced_network)
+
+            extra_deviation = None
+
+            if reduce:
+                extra_deviation, pruned_report = self._fold_lumping_deviation(biomlmodel, reduced_network, lumping_deviation)
+
+            compatible, self.component_report = self._check_components(stoichiometric_matrix, logn_kinetic_rates_vector.ravel(), engine, components,
+                                                                        species_names, reaction_names, extra_deviation, parallel, max_workers)
+
+            if reduce:
+
+                for entry in pruned_report:
+                    entry["component"] = len(self.component_report)
+                    self.component_report.append(entry)
+
+                compatible = all(entry["compatible"] for entry in self.component_report)
+
+            if printing:
+
+                if compatible:
+                    utility.printer("\nThermodynamic Compatibility Check: ","The kinetic reaction rate constants are compatible with thermodynamic constraints\n", text_color="green", text_style="bold")
+
+                else:
+                    utility.printer("\nThermodynamic Compatibility Check: ","The kinetic reaction rate constants are NOT compatible with thermodynamic constraints\n", text_color="red", text_style="bold")
+
+                    for component in self.component_report:
+                        if not component["compatible"]:
+                            utility.message_printer(f"Sub-network {component['component']} is not compatible, reactions: {', '.join(component['reactions'])}", color="magenta")
+
+            return compatible
+
+        result = self._wegscheider_deviation(stoichiometric_matrix, logn_kinetic_rates_vector, engine)
+
+        if np.all(np.abs(result) <= THERMO_TOLERANCE) and np.all(lumping_deviation <= THERMO_TOLERANCE):
+
+            if printing:
+                utility.printer("\nThermodynamic Compatibility Check: ","The kinetic reaction rate constants are compatible with thermodynamic constraints\n", text_color="green", text_style="bold")
+
+            return True
+        
+        else:
+
+            if printing:
+                utility.printer("\nThermodynamic Compatibility Check: ","The kinetic reaction rate constants are NOT compatible with thermodynamic constraints\n", text_color="red", text_style="bold")
+            
+            return False
+        
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def construct_thermodynamic_basis(self, biomlmodel: BioMLModel, engine: str = THERMO_ENGINE_NULL_SPACE) -> np.ndarray:
+        """
+            Returns the thermodynamic basis of the model (see thermodynamic_basis), cached until the model changes
+
+            Args:
+                biomlmodel (BioMlModel): A model of BioML class containing species and reactions.
+                engine (str): "null_space" or "exact"
+
+            Returns:
+                np.ndarray: A 2D array (reactions x cycles)
+        """
+
+        if biomlmodel is None:
+            raise exceptions.NoModel("No BioModel has been read!!!")
+
+        matrices = self._assemble_matrices(biomlmodel)
+
+        key = "thermodynamic_basis_" + engine
+
+        if key not in matrices:
+
+            basis = MatrixConstructor.thermodynamic_basis(matrices["stoichiometric"], engine)
+
+            basis.setflags(write=False)
+
+            matrices[key] = basis
+
+        return matrices[key]
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def check_kinetic_rates_thermo_compatibility_sweep(self, biomlmodel: BioMLModel, forward_rates, reverse_rates,
+                                                       engine: str = THERMO_ENGINE_NULL_SPACE, parallel: bool = False, max_workers: int = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+            Checks many candidate vectors of kinetic rate constants against the Wegscheider conditions at once, e.g. the candidates of a parameter estimation.
+            The thermodynamic basis of the model is computed once and all candidates are projected onto it by batched matrix products,
+            THERMO_SWEEP_CHUNK_SIZE candidates at a time. The rate constants stored in the reactions are not used nor changed.
+
+            Args:
+                biomlmodel (BioMlModel): A model of BioML class containing species and reactions.
+                forward_rates (array-like): the forward rate constants (candidates x reactions), columns in the order of the stoichiometric matrix
+                reverse_rates (array-like): the reverse rate constants, with the same shape
+                engine (str): "null_space" or "exact"
+                parallel (bool): if this value is True, the chunks are evaluated by a pool of processes sharing the basis and the candidates in shared memory
+                max_workers (int): the number of worker processes. Defaults to the number of CPUs
+
+            Returns:
+                np.ndarray: a boolean vector, True for the compatible candidates; candidates with a rate constant which is not positive are incompatible
+                np.ndarray: the norm of the projection of ln(k+/k-) onto the thermodynamic basis for each candidate, NaN for the invalid candidates
+        """
+
+        if biomlmodel is None:
+            raise exceptions.NoModel("No BioModel has been read!!!")
+
+        if engine not in (THERMO_ENGINE_NULL_SPACE, THERMO_ENGINE_EXACT):
+            raise ValueError(f"A parameter sweep runs on the \"{THERMO_ENGINE_NULL_SPACE}\" or \"{THERMO_ENGINE_EXACT}\" engine, not on \"{engine}\"")
+
+        logn_ratios, valid = rate_sweep.logn_rate_ratios(forward_rates, reverse_rates)
+
+        basis = self.construct_thermodynamic_basis(biomlmodel, engine)
+
+        if logn_ratios.shape[1] != basis.shape[0]:
+            raise ValueError(f"The rate constants have {logn_ratios.shape[1]} columns but the model has {basis.shape[0]} reactions")
+
+        # the norm of the projection is compared, as in check_kinetic_rates_thermo_compatibility, so the unit cycles of "exact" are orthonormalized first
+        if engine == THERMO_ENGINE_EXACT:
+            basis = np.linalg.qr(basis)[0]
+
+        if parallel:
+
+            compatible, residual_norms = parallel_sweep.parallel_thermo_sweep(basis, logn_ratios, max_workers)
+
+        else:
+
+            compatible = np.zeros(len(logn_ratios), dtype=bool)
+            residual_norms = np.zeros(len(logn_ratios))
+
+            for start in range(0, len(logn_ratios), THERMO_SWEEP_CHUNK_SIZE):
+
+                chunk = slice(start, start + THERMO_SWEEP_CHUNK_SIZE)
+
+                residual_norms[chunk] = np.linalg.norm(logn_ratios[chunk] @ basis, axis=1)
+                compatible[chunk] = residual_norms[chunk] <= THERMO_TOLERANCE
+
+        compatible &= valid
+        residual_norms[~valid] = np.nan
+
+        return compatible, residual_norms
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def localize_thermodynamic_violations(self, biomlmodel: BioMLModel, engine: str = THERMO_ENGINE_EXACT, logn_ratios: np.ndarray = None) -> dict:
+        """
+            Finds the thermodynamic cycles (vectors of the thermodynamic basis) whose Wegscheider condition is violated, by how much, and the reactions taking part in them.
+            Everything is computed with array operations over the deviations, so the cost does not grow with Python loops over cycles or candidates.
+            The "exact" engine (default) gives sparse integer cycles which are easier to read than the dense orthonormal cycles of "null_space".
+
+            Args:
+                biomlmodel (BioMlModel): A model of BioML class containing species and reactions.
+                engine (str): "exact" or "null_space"
+                logn_ratios (np.ndarray): ln(k+/k-) of several candidates (candidates x reactions); if None, the rate constants of the model are used
+
+            Returns:
+                dict: arrays of equal length with one entry per (candidate, violated cycle, reaction):
+                      "candidate", "cycle", "deviation" (of the cycle), "reaction" (column index) and "coefficient" (of the reaction in the cycle)
+        """
+
+        if biomlmodel is None:
+            raise exceptions.NoModel("No BioModel has been read!!!")
+
+        if engine not in (THERMO_ENGINE_NULL_SPACE, THERMO_ENGINE_EXACT):
+            raise ValueError(f"Violations are localized with the \"{THERMO_ENGINE_NULL_SPACE}\" or \"{THERMO_ENGINE_EXACT}\" engine, not with \"{engine}\"")
+
+        if logn_ratios is None:
+
+            with warnings.catch_warnings():
+
+                warnings.simplefilter('error', RuntimeWarning)
+
+                logn_ratios = np.log(self.construct_kinetic_constants_vector(biomlmodel))
+
+        logn_ratios = np.atleast_2d(np.asarray(logn_ratios, dtype=np.float64))
+
+        basis = self.construct_thermodynamic_basis(biomlmodel, engine)
+
+        if logn_ratios.shape[1] != basis.shape[0]:
+            raise ValueError(f"ln(k+/k-) has {logn_ratios.shape[1]} columns but the model has {basis.shape[0]} reactions")
+
+        deviation = logn_ratios @ basis
+
+        candidates, cycles = np.nonzero(np.abs(deviation) > THERMO_TOLERANCE)
+
+        cycle_basis = sparse.csc_matrix(np.where(np.abs(basis) > THERMO_BASIS_ZERO_TOLERANCE, basis, 0.0))
+
+        # every (candidate, cycle) pair is repeated once per reaction of the cycle and the reactions are gathered from the CSC arrays of the basis
+        counts = np.diff(cycle_basis.indptr)[cycles]
+
+        pair = np.repeat(np.arange(len(cycles)), counts)
+
+        position = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        entries = cycle_basis.indptr[cycles][pair] + position
+
+        return {
+            "candidate": candidates[pair],
+            "cycle": cycles[pair],
+            "deviation": deviation[candidates, cycles][pair],
+            "reaction": cycle_basis.indices[entries],
+            "coefficient": cycle_basis.data[entries]
+        }
 
 
 
@@ -459,6 +1503,12 @@ class MatrixConstructor:
         Returns:
             np.ndarray: A 2D array representing the elemental matrix, 
                         where rows correspond to elements and columns to species.
+                        The rows follow the process-wide element alphabet, so a row means the same element in every model.
+                        The matrix has a row for every element numbered so far in the process; the rows of elements which the model does not use are zero,
+                        so they never show up in E @ S or its violations (see get_elemental_matrix_row_names for the element of each row).
+
+        Raises:
+            ValueError: if the chemical composition of a species is not known
         """
         if biomlmodel == None:
             raise exceptions.NoModel("No BioModel has been read!!!")
@@ -469,27 +1519,41 @@ class MatrixConstructor:
             raise exceptions.EmptyList("There are no species in this model.")
         
 
-        columns = BioMLSpecies.get_current_index()
+        matrices = self._assemble_matrices(biomlmodel)
+
+        if "elemental" in matrices:
+
+            self.elemental_matrix = matrices["elemental"]
+
+            return self.elemental_matrix
 
-        element_indices_dict = biomlmodel.mk_element_indices_dict()
+        biomlmodel.resolve_species_compositions()
 
-        rows = len( element_indices_dict )
+        columns = BioMLSpecies.get_current_index()
 
-        self.elemental_matrix = np.zeros((rows, columns), dtype = int)
+        # every species carries its composition as (element indices, counts) over the process-wide alphabet, so the matrix is one gather
+        composition_vectors = []
 
         for individual_biomlspecies in biomlspecies_list:
 
-            column = individual_biomlspecies.index
+            composition_vector = individual_biomlspecies.get_composition_vector()
+
+            if composition_vector is None:
+                raise ValueError(f"Chemical composition is not known for {individual_biomlspecies.name if individual_biomlspecies.name is not None else individual_biomlspecies.ID}\n       Elemental matrix cannot be costructed!")
+
+            composition_vectors.append(composition_vector)
+
+        biomlmodel.mk_element_indices_dict()
 
-            for compound, number in individual_biomlspecies.composition.items():
+        row_indices = np.concatenate([element_indices for element_indices, _ in composition_vectors]).astype(np.int64)
+        values = np.concatenate([counts for _, counts in composition_vectors])
+        column_indices = np.repeat([individual_biomlspecies.index for individual_biomlspecies in biomlspecies_list], [len(counts) for _, counts in composition_vectors])
 
-                row = element_indices_dict.get(compound)
+        rows = len(element_alphabet.get_default_alphabet())
 
-                if row is None:
-                    raise ValueError(f"There is not an index for {compound} in species {individual_biomlspecies.name if individual_biomlspecies.name is not None else individual_biomlspecies.ID}")
-                
-                self.elemental_matrix[row, column] = number
-                
+        self.elemental_matrix = self._arrays_to_matrix(row_indices, column_indices, values, rows, columns)
+
+        matrices["elemental"] = self.elemental_matrix
 
         return self.elemental_matrix
     
@@ -501,65 +1565,98 @@ class MatrixConstructor:
     # ********************************
     # *           Function           *
     # ********************************
-    def construct_charge_matrix(self, biomlmodel: BioMLModel) -> np.ndarray:
+    def get_elemental_matrix_row_names(self, biomlmodel: BioMLModel) -> list[str]:
+        """
+            Returns the chemical element of each row of the elemental matrix, i.e. the first entries of the process-wide element alphabet
+
+            Args:
+                biomlmodel (BioMLModel): A model of BioML class containing species and reactions.
+
+            Returns:
+                list[str]: the element names in row order
         """
-            Constructs the charge matrix for the given BioModel.
+
+        elemental_matrix = self.construct_elemental_matrix(biomlmodel)
+
+        row_names = element_alphabet.get_default_alphabet().names[:elemental_matrix.shape[0]]
+
+        return row_names
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def construct_charge_vector(self, biomlmodel: BioMLModel) -> np.ndarray:
+        """
+            Constructs the charge vector z of the given BioModel: one integer charge per species (row of the stoichiometric matrix).
+            The net charge produced by every reaction is then z @ S, one matrix-vector product for dense or sparse S.
 
             Parameters:
                 biomlmodel (BioMLModel): A model of BioML class containing species and reactions.
 
             Returns:
-                np.ndarray: A 2D array representing the stoichiometric matrix, 
-                            where rows correspond to species and columns to reactions.
+                np.ndarray: A 1D read-only array of length species
         """
 
-        if biomlmodel == None:
+        if biomlmodel is None:
             raise exceptions.NoModel("No BioModel has been read!!!")
 
-        species_list = biomlmodel.get_list_of_species()
-        reactions_list = biomlmodel.get_list_of_reactions()
+        matrices = self._assemble_matrices(biomlmodel)
 
-        if len(species_list) == 0:
-            raise exceptions.EmptyList("There are no species in this model.")
-        
-        if len(reactions_list) == 0:
-            raise exceptions.EmptyList("There are no reactions in this model.")
+        if "charge_vector" in matrices:
+            return matrices["charge_vector"]
 
-        rows = BioMLSpecies.get_current_index()
+        biomlmodel.resolve_species_compositions()
 
-        columns = BioMLReaction.get_current_index()
+        charges = {}
 
-        charge_matrix = np.zeros((rows, columns), dtype = int)
+        for individual_biomlspecies in biomlmodel.get_list_of_species():
 
-        for individual_reaction in reactions_list:
+            if individual_biomlspecies.charge is None:
+                raise ValueError(f"Charge is not known for {individual_biomlspecies.name if individual_biomlspecies.name is not None else individual_biomlspecies.ID}\n       Charge vector cannot be costructed!")
 
-            column = individual_reaction.index
+            charges[individual_biomlspecies.index] = int(individual_biomlspecies.charge)
 
-            if column == None:
-                continue
+        charge_vector = np.zeros(matrices["rows"], dtype=MatrixConstructor._smallest_int_dtype(charges.values()))
 
-            reaction_reactants = individual_reaction.get_list_of_reactants()
+        if charges:
+            charge_vector[list(charges.keys())] = list(charges.values())
 
-            for individual_reactant in reaction_reactants:
+        charge_vector.setflags(write=False)
 
-                row = individual_reactant.index
+        matrices["charge_vector"] = charge_vector
+
+        return charge_vector
 
-                charge = individual_reactant.get_charge()
 
-                charge_matrix[row, column] = charge
 
-            reaction_products = individual_reaction.get_list_of_products()
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def construct_charge_matrix(self, biomlmodel: BioMLModel) -> np.ndarray:
+        """
+            Constructs the charge matrix for the given BioModel: row j holds the charges of the species (see construct_charge_vector) taking part in reaction j.
 
-            for individual_product in reaction_products:
+            Parameters:
+                biomlmodel (BioMLModel): A model of BioML class containing species and reactions.
 
-                row = individual_product.index
+            Returns:
+                np.ndarray: A 2D array representing the stoichiometric matrix, 
+                            where rows correspond to species and columns to reactions.
+        """
 
-                charge = individual_product.get_charge()
+        matrices = self._assemble_matrices(biomlmodel)
 
-                charge_matrix[row, column] = int(charge)
+        if "charge" not in matrices:
 
-        transposed_charge_matrix = np.transpose(charge_matrix)
+            # the charges of the species are placed where they take part in a reaction, so the "vector" and "matrix" charge checks read the same charges
+            charge_vector = self.construct_charge_vector(biomlmodel)
 
-        return transposed_charge_matrix
+            entries = {(column, row): int(charge_vector[row]) for column, row in matrices["participants"]}
+
+            matrices["charge"] = self._to_matrix(entries, matrices["columns"], matrices["rows"])
 
+        transposed_charge_matrix = matrices["charge"]
 
+        return transposed_charge_matrix
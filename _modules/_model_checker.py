@@ -1,6 +1,8 @@
 import libsbml
 import _modules._exceptions as exceptions
 import _modules._constants as cn
+import _modules._utility as utility
+from _modules._symbolic_budget import SymbolicBudget
 from typing import Union
 import sympy as sp
 from sympy import symbols
@@ -16,6 +18,36 @@ class ModelChecker(object):
     """
 
 
+    def __init__(self, engine: str = cn.MASS_ACTION_ENGINE_SYMPY, symbolic_budget: SymbolicBudget = None):
+
+        self.engine = engine
+
+        self.symbolic_budget = symbolic_budget if symbolic_budget is not None else SymbolicBudget()
+
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @engine.setter
+    def engine(self, engine):
+        if engine in (cn.MASS_ACTION_ENGINE_SYMPY, cn.MASS_ACTION_ENGINE_AST):
+            self._engine = engine
+        else:
+            raise ValueError(f"Mass-action engine must be \"{cn.MASS_ACTION_ENGINE_SYMPY}\" or \"{cn.MASS_ACTION_ENGINE_AST}\", not \"{engine}\"")
+
+    @property
+    def symbolic_budget(self):
+        return self._symbolic_budget
+
+    @symbolic_budget.setter
+    def symbolic_budget(self, budget):
+        if isinstance(budget, SymbolicBudget):
+            self._symbolic_budget = budget
+        else:
+            raise ValueError("The symbolic budget of the model checker must be a SymbolicBudget instance")
+
+
     # ********************************
     # *           Function           *
     # ********************************
@@ -139,6 +171,10 @@ class ModelChecker(object):
 
             Each reaction's rate equation is analyzed for conformity with the Mass Action Kinetics pattern.
             Returns True only if all reactions meet this criterion.
+            The kinetic laws are classified in tiers (see _classify_kinetic_law) and the tier deciding each reaction is stored in its "mass_action_tier".
+            With the "ast" engine the libsbml expression tree of each law is classified first (see _classify_kinetic_law_ast).
+            The Sympy operations run within the symbolic budget of the checker. A reaction whose operations run out of time is marked "undetermined",
+            a warning names it, and the remaining reactions are still checked.
 
             Args:
                 biomlmodel (BioMLModel): A model of the BioML class containing species and reactions.
@@ -146,6 +182,7 @@ class ModelChecker(object):
 
             Returns:
                 bool: True if all reactions follow Mass Action Kinetics, False otherwise.
+                None: if no reaction breaks Mass Action Kinetics but some reactions are undetermined.
         """
 
         flag = True
@@ -154,11 +191,27 @@ class ModelChecker(object):
 
             biomlmodel_reactions_list = biomlmodel.get_list_of_reactions()
 
+            classify_kinetic_law = self._classify_kinetic_law_ast if self._engine == cn.MASS_ACTION_ENGINE_AST else self._classify_kinetic_law
+
+            undetermined = False
+
             for biomlmodel_reaction in biomlmodel_reactions_list:
 
-                args = self._make_checking_args( biomlmodel, biomlmodel_reaction )
+                try:
 
-                status = self._check_kinetic_law(**args)
+                    status, tier = classify_kinetic_law( biomlmodel, biomlmodel_reaction )
+
+                except exceptions.SymbolicTimeout as e:
+
+                    biomlmodel_reaction.mass_action_tier = cn.MASS_ACTION_TIER_UNDETERMINED
+
+                    utility.add_warning(f"\n{e}, so it is not known whether its kinetic law follows Mass Action Kinetics")
+
+                    undetermined = True
+
+                    continue
+
+                biomlmodel_reaction.mass_action_tier = tier
 
                 if not status:
 
@@ -169,6 +222,9 @@ class ModelChecker(object):
 
                 biomlmodel_reaction.mass_action = status
 
+            if flag and undetermined:
+                flag = None
+
         else:
 
             flag = False
@@ -184,6 +240,321 @@ class ModelChecker(object):
 
 
 
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def _classify_kinetic_law(self, biomlmodel: BioMLModel, bioml_reaction: object) -> tuple[bool, str]:
+        """
+            Decides whether the kinetic law of a reaction follows Mass Action Kinetics, trying the cheap tiers first:
+                - "structural": the parsed expression tree is a product of species powers and parameters, or a difference of two such products
+                  (optionally times a common factor of parameters), so no species can be in a denominator;
+                  the law must also pass the species rules of _check_kinetic_law (see _follows_species_rules)
+                - "cancelled": the law is brought to a single fraction with sympy.cancel; a species left in the denominator rules Mass Action out,
+                  otherwise the expanded numerator is checked as in the structural tier
+                - "simplified": the laws still undecided are simplified with sympy.simplify and checked by the string heuristics of _check_kinetic_law
+            Only the first tier can be decided without rewriting the expression, and sympy.simplify runs for the ambiguous laws only.
+
+            Args:
+                biomlmodel (BioMLModel): A model of the BioML class containing species and reactions.
+                bioml_reaction (BioMLReaction): A reaction intance of BioMLReaction class.
+
+            Returns:
+                bool: True if the kinetic law follows Mass Action Kinetics, False otherwise.
+                str: the tier which decided, "structural", "cancelled" or "simplified"
+
+            Raises:
+                SymbolicTimeout: if the Sympy operations on the law run out of the symbolic budget of the checker
+        """
+
+        model_species = [bm_species.get_id() for bm_species in biomlmodel.get_list_of_species()]
+
+        reactants = [reactant_class.get_id() for reactant_class in bioml_reaction.get_list_of_reactants()]
+
+        products = [product_class.get_id() for product_class in bioml_reaction.get_list_of_products()]
+
+        species = set(model_species + reactants + products)
+
+        species_in_kinetic_law = [klaw_variable for klaw_variable in (bioml_reaction.klaw_variables or []) if klaw_variable in model_species]
+
+        kinetic_formula = bioml_reaction.expanded_kinetic_law if bioml_reaction.expanded_kinetic_law else bioml_reaction.kinetic_law
+
+        if species and kinetic_formula:
+
+            try:
+
+                parsed_kinetic_law = bioml_reaction.get_sympy_kinetic_law(cn.KINETIC_LAW_FORM_PARSED)
+
+                if ModelChecker._is_structural_mass_action(parsed_kinetic_law, species):
+                    return self._follows_species_rules(kinetic_formula, str(parsed_kinetic_law), species_in_kinetic_law, reactants, products), cn.MASS_ACTION_TIER_STRUCTURAL
+
+                _, denominator = bioml_reaction.get_sympy_kinetic_law(cn.KINETIC_LAW_FORM_CANCELLED, self._symbolic_budget).as_numer_denom()
+
+                if {str(symbol) for symbol in denominator.free_symbols} & species:
+                    return False, cn.MASS_ACTION_TIER_CANCELLED
+
+                expanded_kinetic_law = bioml_reaction.get_sympy_kinetic_law(cn.KINETIC_LAW_FORM_EXPANDED, self._symbolic_budget)
+
+                if ModelChecker._is_structural_mass_action(expanded_kinetic_law, species):
+                    return self._follows_species_rules(kinetic_formula, str(expanded_kinetic_law), species_in_kinetic_law, reactants, products), cn.MASS_ACTION_TIER_CANCELLED
+
+            except exceptions.SymbolicTimeout:
+                raise
+
+            except Exception:
+                # laws which cannot be parsed are left to the string heuristics
+                pass
+
+        args = self._make_checking_args( biomlmodel, bioml_reaction )
+
+        return self._check_kinetic_law(**args), cn.MASS_ACTION_TIER_SIMPLIFIED
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def _classify_kinetic_law_ast(self, biomlmodel: BioMLModel, bioml_reaction: object) -> tuple[bool, str]:
+        """
+            Decides whether the kinetic law of a reaction follows Mass Action Kinetics by walking its libsbml expression tree, without SymPy.
+            The law is split into signed product terms (AST_PLUS, AST_MINUS, AST_TIMES, AST_DIVIDE, AST_POWER); it is Mass Action if it is
+            a single positive product or a positive minus a negative product, with every species as a plain factor raised to a positive number,
+            and it passes the species rules of _check_kinetic_law (see _follows_species_rules).
+            The species exponents of the forward and reverse terms are stored on the reaction if the reader did not set them;
+            they are not structural, so only the cached kinetic-order matrices of the model are dropped.
+            Laws which are not of this form are passed on to the SymPy tiers of _classify_kinetic_law.
+
+            Args:
+                biomlmodel (BioMLModel): A model of the BioML class containing species and reactions.
+                bioml_reaction (BioMLReaction): A reaction intance of BioMLReaction class.
+
+            Returns:
+                bool: True if the kinetic law follows Mass Action Kinetics, False otherwise.
+                str: the tier which decided, "ast" or one of the tiers of _classify_kinetic_law
+        """
+
+        model_species = [bm_species.get_id() for bm_species in biomlmodel.get_list_of_species()]
+
+        reactants = [reactant_class.get_id() for reactant_class in bioml_reaction.get_list_of_reactants()]
+
+        products = [product_class.get_id() for product_class in bioml_reaction.get_list_of_products()]
+
+        species = set(model_species + reactants + products)
+
+        kinetic_formula = bioml_reaction.expanded_kinetic_law if bioml_reaction.expanded_kinetic_law else bioml_reaction.kinetic_law
+
+        ast_node = libsbml.parseL3Formula(kinetic_formula) if kinetic_formula and species else None
+
+        terms = ModelChecker._ast_terms(ast_node, species) if ast_node is not None else None
+
+        if terms is not None:
+
+            signs = sorted(sign for sign, _ in terms)
+
+            if signs == [1] or signs == [-1, 1]:
+
+                species_in_kinetic_law = [name for name in ModelChecker._ast_names(ast_node) if name in model_species]
+
+                if not self._follows_species_rules(kinetic_formula, libsbml.formulaToL3String(ast_node), species_in_kinetic_law, reactants, products):
+                    return False, cn.MASS_ACTION_TIER_AST
+
+                orders = {sign: term_orders for sign, term_orders in terms}
+
+                if bioml_reaction.forward_kinetic_orders is None:
+                    bioml_reaction.forward_kinetic_orders = orders[1]
+
+                if bioml_reaction.reverse_kinetic_orders is None:
+                    bioml_reaction.reverse_kinetic_orders = orders.get(-1, {})
+
+                return True, cn.MASS_ACTION_TIER_AST
+
+        return self._classify_kinetic_law(biomlmodel, bioml_reaction)
+
+
+
+    @staticmethod
+    def _ast_names(ast_node: libsbml.ASTNode) -> set[str]:
+
+        if ast_node.getType() == libsbml.AST_NAME:
+            return {ast_node.getName()}
+
+        names = set()
+
+        for idx in range(ast_node.getNumChildren()):
+            names |= ModelChecker._ast_names(ast_node.getChild(idx))
+
+        return names
+
+
+
+    @staticmethod
+    def _ast_sign(ast_node: libsbml.ASTNode) -> int:
+
+        # parameters are taken as positive, so only numbers and negations carry a sign
+        node_type = ast_node.getType()
+
+        if ast_node.isNumber():
+            return -1 if ast_node.getValue() < 0 else 1
+
+        if node_type == libsbml.AST_MINUS and ast_node.getNumChildren() == 1:
+            return -ModelChecker._ast_sign(ast_node.getChild(0))
+
+        if node_type in (libsbml.AST_TIMES, libsbml.AST_DIVIDE):
+
+            sign = 1
+
+            for idx in range(ast_node.getNumChildren()):
+                sign *= ModelChecker._ast_sign(ast_node.getChild(idx))
+
+            return sign
+
+        return 1
+
+
+
+    @staticmethod
+    def _ast_terms(ast_node: libsbml.ASTNode, species: set[str]) -> list[tuple[int, dict]]:
+        """
+            Splits an expression tree into signed product terms, each with the exponents of its species;
+            returns None if a species is not a plain factor with a positive numeric exponent or if there are more than two terms
+        """
+
+        if not ModelChecker._ast_names(ast_node) & species:
+            return [(ModelChecker._ast_sign(ast_node), {})]
+
+        node_type = ast_node.getType()
+
+        children = [ast_node.getChild(idx) for idx in range(ast_node.getNumChildren())]
+
+        if node_type == libsbml.AST_NAME:
+            return [(1, {ast_node.getName(): 1.0})]
+
+        if node_type == libsbml.AST_MINUS and len(children) == 1:
+
+            terms = ModelChecker._ast_terms(children[0], species)
+
+            return None if terms is None else [(-sign, orders) for sign, orders in terms]
+
+        if node_type in (libsbml.AST_PLUS, libsbml.AST_MINUS):
+
+            terms = []
+
+            for idx, child in enumerate(children):
+
+                child_terms = ModelChecker._ast_terms(child, species)
+
+                if child_terms is None:
+                    return None
+
+                # the second operand of a binary minus is subtracted
+                if node_type == libsbml.AST_MINUS and idx == 1:
+                    child_terms = [(-sign, orders) for sign, orders in child_terms]
+
+                terms.extend(child_terms)
+
+            return terms if len(terms) <= 2 else None
+
+        if node_type == libsbml.AST_TIMES:
+
+            terms = [(1, {})]
+
+            for child in children:
+
+                child_terms = ModelChecker._ast_terms(child, species)
+
+                if child_terms is None:
+                    return None
+
+                terms = [(sign * child_sign, ModelChecker._merge_orders(orders, child_orders)) for sign, orders in terms for child_sign, child_orders in child_terms]
+
+                if len(terms) > 2:
+                    return None
+
+            return terms
+
+        if node_type == libsbml.AST_DIVIDE and len(children) == 2:
+
+            # a species in a denominator is left to the SymPy tiers, which may cancel it
+            if ModelChecker._ast_names(children[1]) & species:
+                return None
+
+            terms = ModelChecker._ast_terms(children[0], species)
+
+            denominator_sign = ModelChecker._ast_sign(children[1])
+
+            return None if terms is None else [(sign * denominator_sign, orders) for sign, orders in terms]
+
+        if node_type in (libsbml.AST_POWER, libsbml.AST_FUNCTION_POWER) and len(children) == 2:
+
+            base, exponent = children
+
+            if base.getType() == libsbml.AST_NAME and base.getName() in species and exponent.isNumber() and exponent.getValue() > 0:
+                return [(1, {base.getName(): float(exponent.getValue())})]
+
+        return None
+
+
+
+    @staticmethod
+    def _merge_orders(orders: dict, other_orders: dict) -> dict:
+
+        merged = dict(orders)
+
+        for name, order in other_orders.items():
+            merged[name] = merged.get(name, 0.0) + order
+
+        return merged
+
+
+
+    @staticmethod
+    def _is_species_monomial(term: sp.Basic, species: set[str]) -> bool:
+
+        for factor in sp.Mul.make_args(term):
+
+            if not {str(symbol) for symbol in factor.free_symbols} & species:
+                continue
+
+            base, exponent = factor.as_base_exp()
+
+            if not (base.is_Symbol and str(base) in species and exponent.is_number and exponent.is_positive):
+                return False
+
+        return True
+
+
+
+    @staticmethod
+    def _is_structural_mass_action(expression: sp.Basic, species: set[str]) -> bool:
+
+        # a factor common to both terms, e.g. a compartment volume, may be pulled out of the difference
+        if expression.is_Mul:
+
+            sums = [factor for factor in expression.args if factor.is_Add and {str(symbol) for symbol in factor.free_symbols} & species]
+
+            if len(sums) > 1:
+                return False
+
+            if len(sums) == 1:
+
+                if not ModelChecker._is_species_monomial(sp.Mul(*[factor for factor in expression.args if factor is not sums[0]]), species):
+                    return False
+
+                expression = sums[0]
+
+        if not expression.is_Add:
+            return ModelChecker._is_species_monomial(expression, species)
+
+        terms = expression.args
+
+        if len(terms) != 2 or sum(term.could_extract_minus_sign() for term in terms) != 1:
+            return False
+
+        return all(ModelChecker._is_species_monomial(term, species) for term in terms)
+
+
+
+
+
     # ********************************
     # *           Function           *
     # ********************************
@@ -193,7 +564,7 @@ class ModelChecker(object):
 
             Finds all variables used in the kinetic law and stores all ina list.
             Classifies variables used in the kinetic law of the reaction as species, parameters, and compartments.
-            Simplifies the kinetic law using Sympy's Simplify function
+            Simplifies the kinetic law using Sympy's Simplify function (the simplified form is cached on the reaction)
 
             Args:
                 biomlmodel (BioMLModel): A model of the BioML class containing species and reactions.
@@ -209,6 +580,7 @@ class ModelChecker(object):
                     - "products": list of product species,
                     - "kinetic_formula": the original kinetic law expression,
                     - "simp_kinetic_formula": the simplified kinetic law expression,
+                    - "sp_simp_kinetic_formula": the simplified kinetic law as a Sympy expression (None if it cannot be parsed),
                     - "klaw_variables": all variables used in the kinetic law.
         """
 
@@ -291,17 +663,21 @@ class ModelChecker(object):
 
             raise ValueError(f"There is not a kinetic formula for reaction {bioml_reaction.get_id()}")
 
-        # Prepare a space-separated and comma-separated version
-        symbol_dict = {klaw_variable: sp.symbols(klaw_variable) for klaw_variable in klaw_variables}
-
+        # the simplified form is parsed and simplified once per kinetic law and cached on the reaction
         try:
 
-            symp_kinetic_formula = sp.sympify(kinetic_formula.replace("^", "**"), locals = symbol_dict)
+            sp_simp_kinetic_formula = bioml_reaction.get_sympy_kinetic_law(cn.KINETIC_LAW_FORM_SIMPLIFIED, self._symbolic_budget)
+
+            simp_kinetic_formula = str(sp_simp_kinetic_formula)
+
+        except exceptions.SymbolicTimeout:
 
-            simp_kinetic_formula = str(sp.simplify(symp_kinetic_formula))
+            raise
 
         except:
 
+            sp_simp_kinetic_formula = None
+
             simp_kinetic_formula = ''
 
         return {
@@ -313,6 +689,7 @@ class ModelChecker(object):
             "products": products,
             "kinetic_formula": kinetic_formula,
             "simp_kinetic_formula": simp_kinetic_formula,
+            "sp_simp_kinetic_formula": sp_simp_kinetic_formula,
             "klaw_variables": bioml_reaction.klaw_variables
         }
 
@@ -340,6 +717,38 @@ class ModelChecker(object):
 
             
 
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def _follows_species_rules(self, kinetic_formula: str, simp_kinetic_formula: str, species_in_kinetic_law: list[str], reactants: list[str], products: list[str]) -> bool:
+        """
+            Checks the rules a Mass Action law must follow for the species of its reaction: the law and its reactants and products have at least one species,
+            and if they have exactly one, it is written exactly once in the law and in its simplified form
+
+            Args:
+                kinetic_formula (str): kinetic law of a reaction
+                simp_kinetic_formula (str): a simplified (or otherwise rewritten by Sympy) kinetic law of the reaction
+                species_in_kinetic_law (list[str]): the species used in the kinetic law
+                reactants (list[str]): the reactant names of the reaction
+                products (list[str]): the product names of the reaction
+
+            Returns:
+               bool: True if the rules are followed, False otherwise.
+        """
+
+        species_in_kinetic_law = list(dict.fromkeys(species_in_kinetic_law + reactants + products))
+
+        if self._num_klaw_species( species_in_kinetic_law ) == 0:
+            return False
+
+        if self._num_klaw_species( species_in_kinetic_law ) == 1:
+            return kinetic_formula.count(species_in_kinetic_law[0]) == 1 and simp_kinetic_formula.count(species_in_kinetic_law[0]) == 1
+
+        return True
+
+
+
+
     # ********************************
     # *           Function           *
     # ********************************
@@ -401,12 +810,12 @@ class ModelChecker(object):
     # ********************************
     # *           Function           *
     # ********************************
-    def _find_frac_parts( self, simp_kinetic_formula: str, klaw_variables: list[str] ) -> dict:
+    def _find_frac_parts( self, simp_kinetic_formula: Union[str, sp.Basic], klaw_variables: list[str] ) -> dict:
         """
             Finds the numerator and denominator of a fraction in a kinetic law string.
 
             Keyword Args:
-                simp_cellml_eq (str): Simplified CellMl equation using Sympy simplification method
+                simp_cellml_eq (str or sympy.Basic): Simplified CellMl equation using Sympy simplification method; a Sympy expression is used as it is, without parsing it again
                 cellml_vars (list[str]): A list containing CellML variables as strings
 
             Returns:
@@ -418,8 +827,11 @@ class ModelChecker(object):
         fracs = {"numerator": '', "denominator": ''}
 
         try:
-            symbol_dict = {klaw_variable: sp.symbols(klaw_variable) for klaw_variable in klaw_variables}
-            kinetics_sympy_eq = sp.sympify(simp_kinetic_formula, locals=symbol_dict)
+            if isinstance(simp_kinetic_formula, sp.Basic):
+                kinetics_sympy_eq = simp_kinetic_formula
+            else:
+                symbol_dict = {klaw_variable: sp.symbols(klaw_variable) for klaw_variable in klaw_variables}
+                kinetics_sympy_eq = sp.sympify(simp_kinetic_formula, locals=symbol_dict)
             numerator, denominator = kinetics_sympy_eq.as_numer_denom()
             fracs["numerator"] = str(numerator)
             fracs["denominator"] = str(denominator)
@@ -443,6 +855,7 @@ class ModelChecker(object):
                 kwargs (dict): a dictionary containing the following arguments:
                     - "kinetic_formula": A string representing the equation for the kinetic law
                     - "simp_kinetic_formula": A string of the simplified equation of the kinetic law
+                    - "sp_simp_kinetic_formula": The simplified equation of the kinetic law as a Sympy expression (optional)
                     - "species_in_kinetic_law": A list containing the species in the kinetic law
                     - "klaw_variables": A list containing all variables in the kinetic law
                     - "reactants": A list containig all the reactant names of the reaction
@@ -460,28 +873,18 @@ class ModelChecker(object):
         reactants = kwargs["reactants"]
         products = kwargs["products"]
 
-        species_in_kinetic_law = species_in_kinetic_law + reactants + products
-
-        species_in_kinetic_law = list(dict.fromkeys(species_in_kinetic_law))
-
-    
-
         flag = False
 
         if self._single_product( kinetic_formula, simp_kinetic_formula ) or \
             self._diff_of_products( kinetic_formula, simp_kinetic_formula ):
 
-                if self._num_klaw_species( species_in_kinetic_law ) != 0:
-
-                    flag = True
-
-                    if self._num_klaw_species( species_in_kinetic_law ) == 1:
+                flag = self._follows_species_rules( kinetic_formula, simp_kinetic_formula, species_in_kinetic_law, reactants, products )
 
-                        if kinetic_formula.count(species_in_kinetic_law[0]) != 1 or simp_kinetic_formula.count(species_in_kinetic_law[0]) != 1:
-                            flag = False
+        species_in_kinetic_law = list(dict.fromkeys(species_in_kinetic_law + reactants + products))
         
         try:
-            fracs = self._find_frac_parts(simp_kinetic_formula, klaw_variables)
+            sp_simp_kinetic_formula = kwargs.get("sp_simp_kinetic_formula")
+            fracs = self._find_frac_parts(sp_simp_kinetic_formula if sp_simp_kinetic_formula is not None else simp_kinetic_formula, klaw_variables)
             if len(species_in_kinetic_law) > 0:
                 for i in range(len(species_in_kinetic_law)):
                     if species_in_kinetic_law[i] in fracs["denominator"]:
@@ -0,0 +1,349 @@
+import numpy as np
+from scipy import sparse
+
+
+
+
+class ReducedNetwork:
+    """
+        The result of a structural reduction of a stoichiometric matrix.
+        Every row of the reduced matrix stands for a group of merged species and every column for a group of lumped reactions,
+        so verdicts found on the reduced network can be mapped back to the species and reactions of the original model.
+    """
+
+
+    def __init__(self, stoichiometric_matrix, species_groups: list[np.ndarray], reaction_groups: list[np.ndarray], reaction_signs: list[np.ndarray],
+                 lumped_pairs: np.ndarray, pruned_species: np.ndarray, pruned_reaction_groups: list[np.ndarray], original_shape: tuple):
+
+        self._stoichiometric_matrix = stoichiometric_matrix
+        self._species_groups: list[np.ndarray] = species_groups
+        self._reaction_groups: list[np.ndarray] = reaction_groups
+        self._reaction_signs: list[np.ndarray] = reaction_signs
+        self._lumped_pairs: np.ndarray = lumped_pairs
+        self._pruned_species: np.ndarray = pruned_species
+        self._pruned_reaction_groups: list[np.ndarray] = pruned_reaction_groups
+        self._original_shape: tuple = original_shape
+
+
+    @property
+    def stoichiometric_matrix(self):
+        return self._stoichiometric_matrix
+
+    @property
+    def shape(self):
+        return self._stoichiometric_matrix.shape
+
+    @property
+    def original_shape(self):
+        return self._original_shape
+
+    @property
+    def species_groups(self):
+        """The original species (row) indices merged into each row of the reduced matrix; the first one is the representative"""
+        return self._species_groups
+
+    @property
+    def reaction_groups(self):
+        """The original reaction (column) indices lumped into each column of the reduced matrix; the first one is the representative"""
+        return self._reaction_groups
+
+    @property
+    def reaction_signs(self):
+        """For each reaction group, +1 if the reaction has the direction of the representative and -1 if it is its reverse"""
+        return self._reaction_signs
+
+    @property
+    def lumped_pairs(self):
+        """An array of (reaction, representative, sign) rows, one per reaction lumped into another one"""
+        return self._lumped_pairs
+
+    @property
+    def pruned_species(self):
+        return self._pruned_species
+
+    @property
+    def pruned_reaction_groups(self):
+        """The groups of lumped reactions removed as dead ends; the first one of each group is the representative"""
+        return self._pruned_reaction_groups
+
+    @property
+    def pruned_reactions(self):
+        if not self._pruned_reaction_groups:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate(self._pruned_reaction_groups))
+
+    @property
+    def species(self):
+        """The original row index of the representative of each reduced row"""
+        return np.array([group[0] for group in self._species_groups], dtype=np.int64)
+
+    @property
+    def reactions(self):
+        """The original column index of the representative of each reduced column"""
+        return np.array([group[0] for group in self._reaction_groups], dtype=np.int64)
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def lumping_deviation(self, logn_kinetic_rates_vector: np.ndarray) -> np.ndarray:
+        """
+            Returns the Wegscheider deviations of the lumped reactions.
+            A reaction lumped into its representative (or into its reverse) closes a two-reaction cycle, so ln(k+/k-) of the pair must be equal (or opposite).
+            The deviation is the projection of ln(k+/k-) onto the unit null-space vector of that cycle and is compared with the same tolerance as the other engines.
+
+            Args:
+                logn_kinetic_rates_vector (np.ndarray): ln(k+/k-) for all reactions of the original model
+
+            Returns:
+                np.ndarray: one deviation per row of lumped_pairs
+        """
+
+        logn_kinetic_rates_vector = np.asarray(logn_kinetic_rates_vector, dtype=np.float64).ravel()
+
+        if len(self._lumped_pairs) == 0:
+            return np.zeros(0)
+
+        members, representatives, signs = self._lumped_pairs.T
+
+        return (logn_kinetic_rates_vector[members] - signs * logn_kinetic_rates_vector[representatives]) / np.sqrt(2)
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def species_merger(self) -> sparse.csr_matrix:
+        """
+            Returns the 0/1 matrix (original species x reduced rows) which sums the columns of a species-indexed matrix over the merged species.
+            Merged species have identical stoichiometric rows, so the elemental matrix E of the model gives the same E @ S once it is summed this way.
+
+            Returns:
+                sparse.csr_matrix: the merger matrix
+        """
+
+        rows = np.concatenate(self._species_groups) if self._species_groups else np.zeros(0, dtype=np.int64)
+        columns = np.repeat(np.arange(len(self._species_groups)), [len(group) for group in self._species_groups])
+
+        return sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, columns)), shape=(self._original_shape[0], len(self._species_groups)))
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def original_reactions(self, reduced_columns) -> np.ndarray:
+        """
+            Maps columns of the reduced matrix back to the original reactions they stand for
+
+            Args:
+                reduced_columns (iterable of int): column indices of the reduced matrix
+
+            Returns:
+                np.ndarray: the sorted original column indices
+        """
+
+        groups = [self._reaction_groups[column] for column in reduced_columns]
+
+        if not groups:
+            return np.zeros(0, dtype=np.int64)
+
+        return np.unique(np.concatenate(groups))
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def original_species(self, reduced_rows) -> np.ndarray:
+        """
+            Maps rows of the reduced matrix back to the original species they stand for
+
+            Args:
+                reduced_rows (iterable of int): row indices of the reduced matrix
+
+            Returns:
+                np.ndarray: the sorted original row indices
+        """
+
+        groups = [self._species_groups[row] for row in reduced_rows]
+
+        if not groups:
+            return np.zeros(0, dtype=np.int64)
+
+        return np.unique(np.concatenate(groups))
+
+
+
+
+class ModelReducer:
+    """
+        Shrinks a stoichiometric matrix before any linear algebra runs on it, without changing the verdicts of the checks:
+            - dead-end pruning: a species taking part in a single reaction forces that reaction out of every cycle,
+              so both are dropped from the Wegscheider check (repeatedly, as pruning creates new dead ends)
+            - reaction lumping: duplicate or exactly reversed reactions are kept once and the two-reaction cycles they form are checked separately
+            - species merging: species with identical stoichiometric rows are kept once, their elemental columns are summed for the mass balance check
+        Dead-end pruning drops reactions, so it must be switched off when the reduced network is used for per-reaction checks such as mass balance.
+    """
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    @staticmethod
+    def reduce(stoichiometric_matrix, prune_dead_ends: bool = True, lump_reactions: bool = True, merge_species: bool = True) -> ReducedNetwork:
+        """
+            Reduces a stoichiometric matrix
+
+            Args:
+                stoichiometric_matrix (np.ndarray or scipy.sparse matrix): the stoichiometric matrix S (species x reactions)
+                prune_dead_ends (bool): if this value is True, dead-end species and their reactions are removed
+                lump_reactions (bool): if this value is True, duplicate and exactly reversed reactions are lumped
+                merge_species (bool): if this value is True, species with identical stoichiometric rows are merged
+
+            Returns:
+                ReducedNetwork: the reduced matrix (CSR, int64) and the mapping back to the original rows and columns
+        """
+
+        matrix = sparse.csc_matrix(stoichiometric_matrix, dtype=np.int64)
+        matrix.eliminate_zeros()
+        matrix.sort_indices()
+
+        rows, columns = matrix.shape
+
+        pattern = sparse.csr_matrix(matrix)
+        pattern.data[:] = 1
+
+        active_species = np.ones(rows, dtype=bool)
+        active_reactions = np.ones(columns, dtype=bool)
+
+        members = {column: [column] for column in range(columns)}
+        signs = {column: [1] for column in range(columns)}
+        lumped_pairs = []
+
+        changed = True
+
+        while changed:
+
+            changed = False
+
+            if prune_dead_ends:
+                changed |= ModelReducer._prune_dead_ends(pattern, active_species, active_reactions)
+
+            if lump_reactions:
+                changed |= ModelReducer._lump_reactions(matrix, active_reactions, members, signs, lumped_pairs)
+
+        if prune_dead_ends:
+            # species left without any reaction carry no Wegscheider condition
+            active_species &= (pattern @ active_reactions.astype(np.int64)) > 0
+
+        kept_reactions = np.flatnonzero(active_reactions)
+        kept_species = np.flatnonzero(active_species)
+
+        reduced = sparse.csr_matrix(matrix[:, kept_reactions])[kept_species]
+
+        if merge_species:
+            species_groups, representatives = ModelReducer._merge_species(reduced, kept_species)
+            reduced = reduced[representatives]
+        else:
+            species_groups = [np.array([row], dtype=np.int64) for row in kept_species]
+
+
+        return ReducedNetwork(
+            stoichiometric_matrix=sparse.csr_matrix(reduced),
+            species_groups=species_groups,
+            reaction_groups=[np.array(members[column], dtype=np.int64) for column in kept_reactions],
+            reaction_signs=[np.array(signs[column], dtype=np.int64) for column in kept_reactions],
+            lumped_pairs=np.array(lumped_pairs, dtype=np.int64).reshape(-1, 3),
+            pruned_species=np.flatnonzero(~active_species),
+            pruned_reaction_groups=[np.array(members[column], dtype=np.int64) for column in np.flatnonzero(~active_reactions) if column in members],
+            original_shape=(rows, columns)
+        )
+
+
+
+    @staticmethod
+    def _prune_dead_ends(pattern: sparse.csr_matrix, active_species: np.ndarray, active_reactions: np.ndarray) -> bool:
+
+        changed = False
+
+        while True:
+
+            degree = pattern @ active_reactions.astype(np.int64)
+
+            dead_ends = np.flatnonzero(active_species & (degree == 1))
+
+            if len(dead_ends) == 0:
+                return changed
+
+            dead_reactions = np.unique(pattern[dead_ends].indices)
+
+            active_reactions[dead_reactions[active_reactions[dead_reactions]]] = False
+            active_species[dead_ends] = False
+
+            changed = True
+
+
+
+    @staticmethod
+    def _lump_reactions(matrix: sparse.csc_matrix, active_reactions: np.ndarray, members: dict, signs: dict, lumped_pairs: list) -> bool:
+
+        changed = False
+
+        seen = {}
+
+        for column in np.flatnonzero(active_reactions):
+
+            start, end = matrix.indptr[column], matrix.indptr[column + 1]
+
+            indices, data = matrix.indices[start:end], matrix.data[start:end]
+
+            # a reaction and its reverse get the same key, the sign tells them apart
+            sign = -1 if len(data) and data[0] < 0 else 1
+
+            key = (indices.tobytes(), (sign * data).tobytes())
+
+            if key not in seen:
+                seen[key] = (column, sign)
+                continue
+
+            representative, representative_sign = seen[key]
+
+            relative_sign = sign * representative_sign
+
+            lumped_pairs.append((column, representative, relative_sign))
+
+            members[representative].extend(members.pop(column))
+            signs[representative].extend(relative_sign * value for value in signs.pop(column))
+
+            active_reactions[column] = False
+
+            changed = True
+
+        return changed
+
+
+
+    @staticmethod
+    def _merge_species(reduced: sparse.csr_matrix, kept_species: np.ndarray) -> tuple[list[np.ndarray], np.ndarray]:
+
+        reduced.sort_indices()
+
+        groups = {}
+
+        for row in range(reduced.shape[0]):
+
+            start, end = reduced.indptr[row], reduced.indptr[row + 1]
+
+            key = (reduced.indices[start:end].tobytes(), reduced.data[start:end].tobytes())
+
+            groups.setdefault(key, []).append(row)
+
+        representatives = np.array([group[0] for group in groups.values()], dtype=np.int64)
+
+        order = np.argsort(representatives)
+
+        species_groups = [kept_species[np.array(group)] for group in groups.values()]
+
+        return [species_groups[position] for position in order], representatives[order]
@@ -0,0 +1,142 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from _modules._constants import *
+
+
+
+
+_worker_arrays: dict = {}     # the shared arrays a worker process is attached to, set by _attach
+
+
+
+
+# ********************************
+# *           Function           *
+# ********************************
+def iterate_thermo_sweep(basis: np.ndarray, logn_ratios: np.ndarray, max_workers: int = None, chunk_size: int = None):
+    """
+        Evaluates a thermodynamic parameter sweep on a pool of processes and yields the results chunk by chunk, in the order of the candidates.
+        The thermodynamic basis and the ln(k+/k-) block are copied once into multiprocessing.shared_memory,
+        so the workers read them in place and only the (start, stop) bounds of each chunk and its small result are pickled.
+
+        Args:
+            basis (np.ndarray): the thermodynamic basis (reactions x cycles), see MatrixConstructor.thermodynamic_basis
+            logn_ratios (np.ndarray): ln(k+/k-) of the candidates (candidates x reactions)
+            max_workers (int): the number of worker processes. Defaults to the number of CPUs
+            chunk_size (int): the number of candidates evaluated by one task. Defaults to THERMO_SWEEP_CHUNK_SIZE
+
+        Yields:
+            slice: the candidates of the chunk
+            np.ndarray: a boolean vector, True for the compatible candidates of the chunk
+            np.ndarray: the residual norms of the candidates of the chunk
+    """
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    if chunk_size is None:
+        chunk_size = THERMO_SWEEP_CHUNK_SIZE
+
+    if not isinstance(max_workers, int) or max_workers < 1:
+        raise ValueError("The number of sweep workers must be a positive integer")
+
+    if not isinstance(chunk_size, int) or chunk_size < 1:
+        raise ValueError("The sweep chunk size must be a positive integer")
+
+    candidates = len(logn_ratios)
+
+    bounds = [(start, min(start + chunk_size, candidates)) for start in range(0, candidates, chunk_size)]
+
+    if not bounds:
+        return
+
+    blocks = []
+
+    try:
+        descriptions = {}
+
+        for name, array in (("basis", basis), ("logn_ratios", logn_ratios)):
+
+            block, description = _share(np.ascontiguousarray(array, dtype=np.float64))
+
+            blocks.append(block)
+            descriptions[name] = description
+
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(bounds)), initializer=_attach, initargs=(descriptions,)) as executor:
+
+            for (start, stop), (compatible, residual_norms) in zip(bounds, executor.map(_evaluate_chunk, bounds)):
+
+                yield slice(start, stop), compatible, residual_norms
+
+    finally:
+
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+
+# ********************************
+# *           Function           *
+# ********************************
+def parallel_thermo_sweep(basis: np.ndarray, logn_ratios: np.ndarray, max_workers: int = None, chunk_size: int = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+        Evaluates a thermodynamic parameter sweep on a pool of processes and collects the results (see iterate_thermo_sweep)
+
+        Args:
+            basis (np.ndarray): the thermodynamic basis (reactions x cycles)
+            logn_ratios (np.ndarray): ln(k+/k-) of the candidates (candidates x reactions)
+            max_workers (int): the number of worker processes. Defaults to the number of CPUs
+            chunk_size (int): the number of candidates evaluated by one task. Defaults to THERMO_SWEEP_CHUNK_SIZE
+
+        Returns:
+            np.ndarray: a boolean vector, True for the compatible candidates
+            np.ndarray: the residual norm of each candidate
+    """
+
+    compatible = np.zeros(len(logn_ratios), dtype=bool)
+    residual_norms = np.zeros(len(logn_ratios))
+
+    for chunk, chunk_compatible, chunk_residual_norms in iterate_thermo_sweep(basis, logn_ratios, max_workers, chunk_size):
+
+        compatible[chunk] = chunk_compatible
+        residual_norms[chunk] = chunk_residual_norms
+
+    return compatible, residual_norms
+
+
+
+def _share(array: np.ndarray) -> tuple[shared_memory.SharedMemory, tuple]:
+
+    # a shared block cannot be empty
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+
+def _attach(descriptions: dict) -> None:
+
+    for name, (block_name, shape, dtype) in descriptions.items():
+
+        block = shared_memory.SharedMemory(name=block_name)
+
+        # the block is kept referenced for the life of the worker, the parent process unlinks it
+        _worker_arrays[name + "_block"] = block
+        _worker_arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+
+def _evaluate_chunk(bounds: tuple[int, int]) -> tuple[np.ndarray, np.ndarray]:
+
+    start, stop = bounds
+
+    residual_norms = np.linalg.norm(_worker_arrays["logn_ratios"][start:stop] @ _worker_arrays["basis"], axis=1)
+
+    return residual_norms <= THERMO_TOLERANCE, residual_norms
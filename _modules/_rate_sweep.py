@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from _modules._constants import *
+
+
+
+
+# ********************************
+# *           Function           *
+# ********************************
+def read_rate_constants(file_path: str, reaction_ids: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+        Reads the candidate rate constants of a parameter sweep from a CSV or Parquet table.
+        Every row is one candidate; the forward and reverse rate constants of reaction <ID> are in the columns "k_forward_<ID>" and "k_reverse_<ID>".
+        Other columns (e.g. a sample name or a score) are ignored. Reading Parquet files needs pyarrow or fastparquet.
+
+        Args:
+            file_path (str): the path of a .csv, .parquet or .pq file
+            reaction_ids (list[str]): the reaction IDs in column order of the stoichiometric matrix
+
+        Returns:
+            np.ndarray: the forward rate constants (candidates x reactions)
+            np.ndarray: the reverse rate constants (candidates x reactions)
+    """
+
+    extension = os.path.splitext(file_path)[1].lower()
+
+    if extension == ".csv":
+        table = pd.read_csv(file_path)
+
+    elif extension in (".parquet", ".pq"):
+
+        try:
+            table = pd.read_parquet(file_path)
+
+        except ImportError as e:
+            raise ImportError(f"Reading the Parquet file {file_path} needs pyarrow or fastparquet: {e}")
+
+    else:
+        raise ValueError(f"Rate constants can be read from .csv or .parquet files, not from {file_path}")
+
+    forward_columns = [SWEEP_FORWARD_COLUMN_PREFIX + reaction_id for reaction_id in reaction_ids]
+    reverse_columns = [SWEEP_REVERSE_COLUMN_PREFIX + reaction_id for reaction_id in reaction_ids]
+
+    missing = [column for column in forward_columns + reverse_columns if column not in table.columns]
+
+    if missing:
+        raise ValueError(f"The rate constant table {file_path} has no column for: {', '.join(missing)}")
+
+    return table[forward_columns].to_numpy(dtype=np.float64), table[reverse_columns].to_numpy(dtype=np.float64)
+
+
+
+# ********************************
+# *           Function           *
+# ********************************
+def logn_rate_ratios(forward_rates, reverse_rates) -> tuple[np.ndarray, np.ndarray]:
+    """
+        Returns ln(k+/k-) for a batch of rate-constant vectors
+
+        Args:
+            forward_rates (array-like): the forward rate constants (candidates x reactions), or a single vector
+            reverse_rates (array-like): the reverse rate constants, with the same shape
+
+        Returns:
+            np.ndarray: ln(k+/k-) (candidates x reactions); the rows of invalid candidates are zero
+            np.ndarray: a boolean vector, False for the candidates having a rate constant which is not a positive finite number
+    """
+
+    forward_rates = np.atleast_2d(np.asarray(forward_rates, dtype=np.float64))
+    reverse_rates = np.atleast_2d(np.asarray(reverse_rates, dtype=np.float64))
+
+    if forward_rates.shape != reverse_rates.shape:
+        raise ValueError(f"The forward rate constants {forward_rates.shape} and the reverse rate constants {reverse_rates.shape} must have the same shape")
+
+    valid = np.all(np.isfinite(forward_rates) & (forward_rates > 0) & np.isfinite(reverse_rates) & (reverse_rates > 0), axis=1)
+
+    logn_ratios = np.zeros(forward_rates.shape)
+
+    logn_ratios[valid] = np.log(forward_rates[valid]) - np.log(reverse_rates[valid])
+
+    return logn_ratios, valid
@@ -16,10 +16,13 @@ import os
 import _modules._exceptions as exceptions
 import time
 
+import _modules._chebi_resolver as chebi_resolver
+import _modules._kinetic_orders as kinetic_orders
+import _modules._ast_to_sympy as ast_to_sympy
 import chemparse as chp
-import libchebipy as chb
 
 import _modules._model_checker as model_checker
+from _modules._symbolic_budget import SymbolicBudget
 
 
 
@@ -33,13 +36,16 @@ class SbmlReader:
     # ********************************
     # *           Function           *
     # ********************************
-    def read_file(self, file_path: str) -> BioMLModel:
+    def read_file(self, file_path: str, mass_action_engine: str = MASS_ACTION_ENGINE_SYMPY, symbolic_budget: SymbolicBudget = None) -> BioMLModel:
 
         """
             Reads an SBML file using libSBML.
 
             Args:
                 file_path (str): the full path to the file including file name
+                mass_action_engine (str): the engine of the mass-action check run on the model, "sympy" or "ast" (see ModelChecker)
+                symbolic_budget (SymbolicBudget): the time budget of the Sympy operations of the mass-action check and of the search for the rate constants;
+                                                  if a reaction runs out of it, it is marked "undetermined" and "is_mass_action" of the model is left unset
 
             Returns:
                 BioMLModel: An instance of BioML Model where all contents of SBML file have been converted to BioML specific counterparts
@@ -61,24 +67,32 @@ class SbmlReader:
             biomlmodel.reactions = self._transfer_sbml_reactions_to_biomlmodel(sbmodel, biomlmodel.function_definitions)
             biomlmodel.parameters = self._transfer_sbml_parameters_to_biomlmodel(sbmodel)
             biomlmodel.compartments = self._get_list_of_sbml_compartments(sbmodel)
+            biomlmodel.compartment_sizes = {compartment.getId(): compartment.getSize() for compartment in sbmodel.getListOfCompartments() if compartment.isSetSize()}
 
-            _model_checker = model_checker.ModelChecker()
+            _model_checker = model_checker.ModelChecker(mass_action_engine, symbolic_budget)
 
-            if (_model_checker.check_mass_action_kinetics(biomlmodel, immediate_return=True)):
+            is_mass_action = _model_checker.check_mass_action_kinetics(biomlmodel, immediate_return=True)
+
+            if is_mass_action:
 
                 try:
 
-                    biomlmodel.is_mass_action = True
+                    self._find_forward_reverse_rate_constants(biomlmodel, symbolic_budget=_model_checker.symbolic_budget)
 
-                    self._find_forward_reverse_rate_constants(biomlmodel)
-                    
-                    return biomlmodel
-                
                 except Exception:
 
-                    return biomlmodel
+                    pass
+
+                if all(reaction.mass_action_tier != MASS_ACTION_TIER_UNDETERMINED for reaction in biomlmodel.get_list_of_reactions()):
+                    biomlmodel.is_mass_action = True
+
+                return biomlmodel
+
+            elif is_mass_action is None:
+
+                # some reactions ran out of the symbolic budget, they are marked "undetermined"
+                return biomlmodel
 
-            
             else:
 
                 biomlmodel.is_mass_action = False
@@ -121,31 +135,17 @@ class SbmlReader:
 
             biomlmodel_species.compartment = libsbml_species_class.getCompartment()
 
+            SbmlReader._set_composition_and_charge(biomlmodel_species, libsbml_species_class)
+
             annotations = SbmlReader._get_chebi_annotations(libsbml_species_class)
 
             if annotations:
 
                 biomlmodel_species.annotations['chebi'] = annotations
 
-                for annotation in annotations:
-
-                    formula, charge, composition = SbmlReader._parse_using_chebi(annotation)
-
-                    if formula is not None or charge is not None or composition is not None:
-                        break
-
-                if formula is not None:
-                    biomlmodel_species.compound = formula
-
-                if composition is not None:
-                    biomlmodel_species.composition = composition
-
-                if libsbml_species_class.getCharge():
-                    biomlmodel_species.charge = libsbml_species_class.getCharge()
-                else:
-                    if charge:
-                        biomlmodel_species.charge = charge
-
+                # ChEBI is only queried for what the model itself does not give, and only if it is needed, e.g. for mass or charge balance
+                if biomlmodel_species.composition_source is None or biomlmodel_species.charge_source is None:
+                    biomlmodel_species.defer_chebi_resolution(annotations)
 
             self._biomlmodel_species_list.append(biomlmodel_species)
 
@@ -239,6 +239,8 @@ class SbmlReader:
 
         libsbml_reactions = libsbml_model.getListOfReactions()
 
+        function_definitions = {function_definition.ID: function_definition for function_definition in bioml_function_definitions}
+
         for libsbml_reaction_class in libsbml_reactions:
 
             biomlmodel_products_list =[]
@@ -273,6 +275,13 @@ class SbmlReader:
 
             biomlmodel_reaction.expanded_kinetic_law , _ = SbmlReader._expand_formula(biomlmodel_reaction.kinetic_law, bioml_function_definitions)
 
+            try:
+                # the Sympy form is built from the libsbml tree of the law, with the function definitions expanded, so the law string is never parsed
+                biomlmodel_reaction.sp_kinetic_law = ast_to_sympy.ast_to_sympy(libsbml_klaw.getMath(), function_definitions)
+
+            except exceptions.NotParsable:
+                pass
+
             sbml_level = libsbml_model.getLevel()
 
             if sbml_level == 3:
@@ -504,7 +513,7 @@ class SbmlReader:
     # ********************************
     # *           Function           *
     # ********************************
-    def _find_forward_reverse_rate_constants(self, biomlmodel: BioMLModel, printing: bool = False) -> dict:
+    def _find_forward_reverse_rate_constants(self, biomlmodel: BioMLModel, printing: bool = False, symbolic_budget: SymbolicBudget = None) -> dict:
         """
             Extracts the rate constants for each reaction in the given model, 
             including both forward and reverse directions.
@@ -522,6 +531,7 @@ class SbmlReader:
             Args:
                 biomlmodel (BioMLModel): A model of the BioML class containing species and reactions.
                 printing (bool): If True, displays the reaction rate constants for each reaction as they are found
+                symbolic_budget (SymbolicBudget): the time budget of sympy.cancel and sympy.expand; a reaction which runs out of it is marked "undetermined" and skipped
 
             Returns:
                 dict: A dictionary containing reaction names as keys and another dictionary containing forard and reverse reaction rate names mapped to their values as the dictionary's value
@@ -819,7 +829,6 @@ class SbmlReader:
         parameter_classes_list = biomlmodel.get_list_of_parameters()
         reaction_classes_list = biomlmodel.get_list_of_reactions()
         function_definitions_list = biomlmodel.get_list_of_function_definitions()
-        compartments_list = biomlmodel.get_list_of_compartments()
 
         empty_species_list = False
 
@@ -834,26 +843,12 @@ class SbmlReader:
 
 
 
-        string_to_sympy_symbols = {} # THERE ARE SOME BUILT-IN FUNCTIONS IN SYMPY THAT INTERFERE WITH VARIABLE NAMES AND THE STRING TO ... \
-                                        # SYMPY EXPRESSIONS AND THE EXECUTION FAILS. TO PREVENT IT, I HAVE DEFINED SOME BUILT-IN FUNCTIONS AS ... \
-                                        # SYMPY VARIABLES BEFOREHAND
-
-        for individual_species_class in species_classes_list:
-            species_name = individual_species_class.get_id()
-            string_to_sympy_symbols[species_name] = sp.symbols(species_name)
-
-            string_to_sympy_symbols.update({
-                name: sp.symbols(name) for name in compartments_list
-            })
-
-
         parameters_values = {}  # This list stores the names of the parameters and their values
 
         for individual_parameter_class in parameter_classes_list:
 
             parameter_name = individual_parameter_class.get_id()
             parameter_value = individual_parameter_class.get_value()
-            string_to_sympy_symbols[parameter_name] = sp.symbols(parameter_name)
             parameters_values[parameter_name] = parameter_value
 
 
@@ -869,7 +864,6 @@ class SbmlReader:
 
                     local_parameter_name = local_parameter_class.get_id()
                     local_parameter_value = local_parameter_class.get_value()
-                    string_to_sympy_symbols[local_parameter_name] = sp.symbols(local_parameter_name)
                     local_parameters_values[local_parameter_name] = local_parameter_value
 
                 parameters_values.update(local_parameters_values)
@@ -881,34 +875,38 @@ class SbmlReader:
                 
             reactant_classes_list = individual_reaction_class.get_list_of_reactants()
                 
-            for individual_reactant_class in reactant_classes_list:
-                reactant_name = individual_reactant_class.get_id()
-                string_to_sympy_symbols[reactant_name] = sp.symbols(reactant_name)
+            if reactant_classes_list:
                 empty_species_list = False
 
             product_classes_list = individual_reaction_class.get_list_of_products()
                 
-            for individual_product_class in product_classes_list:
-                product_name = individual_product_class.get_id()
-                string_to_sympy_symbols[product_name] = sp.symbols(product_name)
+            if product_classes_list:
                 empty_species_list = False
 
             if empty_species_list:
-                raise ValueError(f"There are no species to be checked for reaction {reactant_name}")
+                raise ValueError(f"There are no species to be checked for reaction {individual_reaction_class.get_id()}")
 
 
             reaction_name = individual_reaction_class.get_id()
-            reaction_rate_formula = individual_reaction_class.get_kinetic_law()
 
-            reaction_rate_formula, function_symbols = SbmlReader._expand_formula(reaction_rate_formula, function_definitions_list)
+            if not individual_reaction_class.expanded_kinetic_law:
+
+                individual_reaction_class.expanded_kinetic_law, _ = SbmlReader._expand_formula(individual_reaction_class.get_kinetic_law(), function_definitions_list)
+
+            # the kinetic law is parsed, cancelled and expanded once and cached on the reaction, the mass-action checker reuses the parsed form
+            try:
+
+                simplified_formula = individual_reaction_class.get_sympy_kinetic_law(KINETIC_LAW_FORM_CANCELLED, symbolic_budget)
+
+                expanded_formula = individual_reaction_class.get_sympy_kinetic_law(KINETIC_LAW_FORM_EXPANDED, symbolic_budget)
 
-            string_to_sympy_symbols.update(function_symbols)
+            except exceptions.SymbolicTimeout as e:
 
-            sp_reaction_rate_formula = sp.sympify(reaction_rate_formula, locals = string_to_sympy_symbols, evaluate = False)
+                individual_reaction_class.mass_action_tier = MASS_ACTION_TIER_UNDETERMINED
 
-            simplified_formula = sp.cancel(sp_reaction_rate_formula)
+                utility.add_warning(f"\n{e}, so its forward and reverse rate constants are not known")
 
-            expanded_formula = sp.expand(simplified_formula)
+                continue
 
             if printing:
                 utility.printer(f"\nThe simplified reaction rate expression for reaction {reaction_name} is:\n", simplified_formula)
@@ -925,7 +923,18 @@ class SbmlReader:
             
             forward_rate_expression = forward_rate_expressions[0]
 
-            forward_variables_symbols = sp.sympify(forward_rate_expression, locals = string_to_sympy_symbols, evaluate = False).free_symbols
+            # kinetic orders are defined for rate laws with a single product term per direction (mass action)
+            reverse_rate_expressions = forward_reverse_rate_equations.get("reverse_rate", [])
+
+            if len(forward_rate_expressions) == 1 and len(reverse_rate_expressions) <= 1:
+
+                species_names = [individual_species_class.get_id() for individual_species_class in species_classes_list]
+                species_names += [species_reference.get_id() for species_reference in reactant_classes_list + product_classes_list]
+
+                individual_reaction_class.forward_kinetic_orders = kinetic_orders.kinetic_orders(forward_rate_expression, species_names)
+                individual_reaction_class.reverse_kinetic_orders = kinetic_orders.kinetic_orders(reverse_rate_expressions[0], species_names) if reverse_rate_expressions else {}
+
+            forward_variables_symbols = forward_rate_expression.free_symbols
             forward_variables_as_strings = [str(symbol) for symbol in forward_variables_symbols]
             forward_rate_matching_parameters = set(forward_variables_as_strings) & set(parameters_values.keys())
 
@@ -962,7 +971,7 @@ class SbmlReader:
 
             for forward_rate_expression in forward_rate_expressions[1:]:
 
-                forward_variables_symbols = sp.sympify(forward_rate_expression, locals = string_to_sympy_symbols, evaluate = False).free_symbols
+                forward_variables_symbols = forward_rate_expression.free_symbols
                 forward_variables_as_strings = [str(symbol) for symbol in forward_variables_symbols]
                 forward_rate_matching_parameters = set(forward_variables_as_strings) & set(parameters_values.keys())
 
@@ -1015,7 +1024,7 @@ class SbmlReader:
 
                     reverse_rate_expression = reverse_rate_expressions[0]
 
-                    reverse_variables_symbols = sp.sympify(reverse_rate_expression, locals = string_to_sympy_symbols, evaluate = False).free_symbols
+                    reverse_variables_symbols = reverse_rate_expression.free_symbols
                 
                     reverse_variables_as_strings = [str(symbol) for symbol in reverse_variables_symbols]
 
@@ -1053,7 +1062,7 @@ class SbmlReader:
 
                     for reverse_rate_expression in reverse_rate_expressions[1:]:
 
-                        reverse_variables_symbols = sp.sympify(reverse_rate_expression, locals = string_to_sympy_symbols, evaluate = False).free_symbols
+                        reverse_variables_symbols = reverse_rate_expression.free_symbols
                 
                         reverse_variables_as_strings = [str(symbol) for symbol in reverse_variables_symbols]
 
@@ -1125,7 +1134,7 @@ class SbmlReader:
 
                 if forward_reverse_rate_equations.get("reverse_rate"):
 
-                    forward_variables_symbols = sp.sympify(simplified_formula, locals = string_to_sympy_symbols, evaluate = False).free_symbols
+                    forward_variables_symbols = simplified_formula.free_symbols
                     forward_variables_as_strings = [str(symbol) for symbol in forward_variables_symbols]
                     common_rate_constant = next(iter(set(forward_variables_as_strings) & set(parameters_values.keys())), None)
 
@@ -1223,6 +1232,44 @@ class SbmlReader:
     
 
 
+    @staticmethod
+    def _set_composition_and_charge(biomlmodel_species: BioMLSpecies, libsbml_species: libsbml.Species) -> None:
+        """
+            Sets the compound, composition and charge of a species from the SBML model itself, before ChEBI is considered:
+                - the fbc:chemicalFormula and fbc:charge attributes of the FBC plugin
+                - the charge attribute of the species
+            The source of each value is recorded on the species.
+
+            Args:
+                biomlmodel_species (BioMLSpecies): the species to be filled
+                libsbml_species (libsbml.Species): the corresponding libsbml species
+
+            Returns:
+                None
+        """
+
+        fbc_plugin = libsbml_species.getPlugin("fbc")
+
+        if fbc_plugin is not None and fbc_plugin.isSetChemicalFormula() and fbc_plugin.getChemicalFormula().strip():
+
+            formula = fbc_plugin.getChemicalFormula().strip()
+
+            biomlmodel_species.compound = formula
+            biomlmodel_species.composition = chp.parse_formula(formula)
+            biomlmodel_species.composition_source = SOURCE_FBC
+
+        if fbc_plugin is not None and fbc_plugin.isSetCharge():
+
+            biomlmodel_species.charge = fbc_plugin.getCharge()
+            biomlmodel_species.charge_source = SOURCE_FBC
+
+        elif libsbml_species.isSetCharge():
+
+            biomlmodel_species.charge = libsbml_species.getCharge()
+            biomlmodel_species.charge_source = SOURCE_SBML_CHARGE
+
+
+
     @staticmethod
     def _get_chebi_annotations(libsbml_species: libsbml.Species):
         """
@@ -1264,6 +1311,7 @@ class SbmlReader:
             This function receives a string which includes ChEBI code for the compound and uses EBI API to search for the compounds chemical composition and fetches it
             Then using the chemparse package decomposes the chemical formula to its elements and returns it as a dictionary
             It should be mentioned that some ChEBI compounds don't have chemical formula registered for them and some have two different chemical compositions assigned to them
+            The lookup goes through the shared ChEBI resolver, so entries found in the persistent ChEBI cache are not fetched again
 
             Args:
                 chebi_code (str): a 5 digit code as a string
@@ -1274,24 +1322,4 @@ class SbmlReader:
                 dict: A dictionary mapping molecule names (str) to their integer counts (int).
         """
 
-        chebi_entity = chb.ChebiEntity(chebi_code)
-        name = chebi_entity.get_name()
-
-        parsed_compound={}
-
-
-        formulae = chebi_entity.get_formulae() # There are two methods to fetch chemical composition of a compound: get_formulae is used when more than one composition is registerd for the compound
-                                                # It returns a list containing 'Formula' classes and Getting list's length will show us that if there is one or more chemical compositions registered
-        if len(formulae) == 0: # Sometimes no chemical formula is registered so the length of the list will be zero
-
-            parsed_compound = None
-            formula = None
-            charge = None
-
-        else:
-
-            formula = chebi_entity.get_formula()
-            charge = chebi_entity.get_charge()
-            parsed_compound = chp.parse_formula(formula)
-
-        return formula, charge, parsed_compound
\ No newline at end of file
+        return chebi_resolver.get_default_resolver().parse(chebi_code)
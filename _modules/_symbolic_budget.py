@@ -0,0 +1,266 @@
+import multiprocessing
+import time
+
+import _modules._exceptions as exceptions
+
+
+
+
+class SymbolicBudget:
+    """
+        A time budget for the symbolic operations (sympy.simplify, cancel, expand) of one model, per reaction and for the whole model.
+        With a budget the operations run in one long-lived worker process, which is killed when the time left for a reaction or for the model runs out,
+        so one pathological kinetic law cannot block a batch; the next operation starts a new worker. Only the operations are charged to the budget,
+        not the start of a worker. Without a budget (both limits None) the operations run in the calling process.
+    """
+
+
+    def __init__(self, reaction_time_budget: float = None, model_time_budget: float = None):
+
+        for budget in (reaction_time_budget, model_time_budget):
+
+            if budget is not None and (not isinstance(budget, (int, float)) or isinstance(budget, bool) or budget <= 0):
+                raise ValueError(f"A symbolic time budget must be a positive number of seconds or None, not {budget!r}")
+
+        self._reaction_time_budget: float = reaction_time_budget
+        self._model_time_budget: float = model_time_budget
+
+        self._reaction_times: dict[str, float] = {}     # reaction ID -> seconds spent on its symbolic operations
+        self._model_time: float = 0.0
+        self._timed_out: list[str] = []
+
+        self._worker = None     # the worker process, started by the first operation and again after it was killed
+        self._connection = None     # the end of the duplex pipe to the worker
+
+
+    @property
+    def reaction_time_budget(self):
+        return self._reaction_time_budget
+
+    @property
+    def model_time_budget(self):
+        return self._model_time_budget
+
+    @property
+    def limited(self):
+        """True if any of the two budgets is set, i.e. the operations run in killable workers"""
+        return self._reaction_time_budget is not None or self._model_time_budget is not None
+
+    @property
+    def timed_out(self):
+        """The IDs of the reactions whose symbolic operations ran out of time, in the order they timed out"""
+        return self._timed_out
+
+
+
+    @staticmethod
+    def _serve(connection) -> None:
+
+        # sympy is imported before the worker reports that it is ready, so the import is not charged to the first operation
+        import sympy
+
+        connection.send(None)
+
+        while True:
+
+            try:
+                function, args = connection.recv()
+
+            except EOFError:
+                # the budget was closed
+                break
+
+            try:
+                connection.send((True, function(*args)))
+
+            except BaseException as e:
+                connection.send((False, e))
+
+        connection.close()
+
+
+
+    def _start_worker(self, reaction_id: str) -> None:
+
+        context = multiprocessing.get_context()
+
+        self._connection, worker_connection = context.Pipe()
+
+        self._worker = context.Process(target=SymbolicBudget._serve, args=(worker_connection,), daemon=True)
+
+        self._worker.start()
+
+        worker_connection.close()
+
+        try:
+            self._connection.recv()
+
+        except EOFError:
+            exitcode = self._stop_worker()
+            raise RuntimeError(f"The worker of the symbolic operations on reaction {reaction_id} died on start-up (exit code {exitcode})")
+
+
+
+    def _stop_worker(self) -> int:
+
+        worker, self._worker = self._worker, None
+
+        if worker.is_alive():
+            worker.kill()
+
+        worker.join()
+
+        self._connection.close()
+        self._connection = None
+
+        return worker.exitcode
+
+
+
+    def close(self) -> None:
+        """Stops the worker process, if one is running; a later operation starts a new one"""
+
+        if self._worker is None:
+            return
+
+        # closing the pipe ends the loop of the worker
+        self._connection.close()
+
+        self._worker.join(timeout=1)
+
+        self._stop_worker()
+
+
+
+    def __del__(self):
+
+        try:
+            self.close()
+
+        except Exception:
+            pass
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def time_left(self, reaction_id: str) -> float:
+        """
+            Returns the time left for the symbolic operations on a reaction
+
+            Args:
+                reaction_id (str): the ID of the reaction
+
+            Returns:
+                float: the seconds left, the smaller of the time left for the reaction and for the model, or None if neither is limited
+        """
+
+        time_left = None
+
+        if self._reaction_time_budget is not None:
+            time_left = self._reaction_time_budget - self._reaction_times.get(reaction_id, 0.0)
+
+        if self._model_time_budget is not None:
+            model_time_left = self._model_time_budget - self._model_time
+            time_left = model_time_left if time_left is None else min(time_left, model_time_left)
+
+        return time_left
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def run(self, reaction_id: str, function, *args):
+        """
+            Runs a symbolic operation on a reaction within the time left for it (see time_left)
+
+            Args:
+                reaction_id (str): the ID of the reaction the operation is charged to
+                function (callable): the operation, e.g. sympy.simplify; it and its arguments must be picklable
+                *args: the arguments of the operation
+
+            Returns:
+                the result of the operation
+
+            Raises:
+                SymbolicTimeout: if the operation did not finish in time; a worker still running is killed and the reaction is recorded in timed_out
+            RuntimeError: if the worker died without a result, e.g. killed by the system for its memory
+        """
+
+        if not self.limited:
+            return function(*args)
+
+        time_left = self.time_left(reaction_id)
+
+        if time_left <= 0:
+            self._time_out(reaction_id)
+
+        # a worker which exited since the last operation is replaced as well
+        if self._worker is not None and not self._worker.is_alive():
+            self._stop_worker()
+
+        if self._worker is None:
+            self._start_worker(reaction_id)
+
+        self._connection.send((function, args))
+
+        start = time.perf_counter()
+
+        finished, died = False, False
+
+        try:
+
+            finished = self._connection.poll(time_left)
+
+            if finished:
+
+                try:
+                    succeeded, result = self._connection.recv()
+
+                except EOFError:
+                    # the pipe was closed without a result, the worker died
+                    died = True
+
+        finally:
+
+            elapsed = time.perf_counter() - start
+
+            self._charge(reaction_id, elapsed)
+
+            # a worker which is still busy or died is replaced by the next operation
+            if not finished or died:
+                exitcode = self._stop_worker()
+
+        if not finished:
+            self._time_out(reaction_id)
+
+        if died:
+            raise RuntimeError(f"The worker of the symbolic operations on reaction {reaction_id} died without a result (exit code {exitcode})")
+
+        # the pipe is polled with a resolution of about a millisecond, so a result which came later than the time left is discarded
+        if elapsed > time_left:
+            self._time_out(reaction_id)
+
+        if not succeeded:
+            raise result
+
+        return result
+
+
+
+    def _charge(self, reaction_id: str, seconds: float) -> None:
+
+        self._reaction_times[reaction_id] = self._reaction_times.get(reaction_id, 0.0) + seconds
+
+        self._model_time += seconds
+
+
+
+    def _time_out(self, reaction_id: str) -> None:
+
+        if reaction_id not in self._timed_out:
+            self._timed_out.append(reaction_id)
+
+        raise exceptions.SymbolicTimeout(f"The symbolic operations on reaction {reaction_id} ran out of their time budget")
@@ -0,0 +1,196 @@
+import numpy as np
+import sympy as sp
+
+from _modules._constants import *
+import _modules._ast_to_sympy as ast_to_sympy
+
+
+
+
+class WegscheiderConditions:
+    """
+        The explicit Wegscheider conditions of a network topology: one condition per vector v of an integer basis of the null space of S,
+
+            prod_j (k+_j / k-_j) ** v_j = 1
+
+        written as a ratio of products of rate constants. The conditions are derived once, can be checked symbolically when only some
+        (or none) of the rate constants have values, and are compiled with sympy.lambdify to a NumPy function for evaluating many parameter sets.
+    """
+
+
+    def __init__(self, basis: np.ndarray, forward_rate_constants: list[str], reverse_rate_constants: list[str], reaction_ids: list[str]):
+
+        if basis.shape[0] != len(forward_rate_constants) or basis.shape[0] != len(reverse_rate_constants):
+            raise ValueError(f"The null-space basis has {basis.shape[0]} rows but {len(forward_rate_constants)} reactions were given")
+
+        self._basis: np.ndarray = basis
+        self._reaction_ids: list[str] = list(reaction_ids)
+
+        self._forward_expressions: list = [WegscheiderConditions._to_expression(rate_constant) for rate_constant in forward_rate_constants]
+        self._reverse_expressions: list = [WegscheiderConditions._to_expression(rate_constant) for rate_constant in reverse_rate_constants]
+
+        self._ratios: list = []
+        self._log_residuals: list = []
+
+        for cycle in basis.T:
+
+            numerator, denominator, log_residual = sp.Integer(1), sp.Integer(1), sp.Integer(0)
+
+            for reaction, exponent in enumerate(cycle):
+
+                exponent = int(exponent)
+
+                if exponent == 0:
+                    continue
+
+                forward, reverse = self._forward_expressions[reaction], self._reverse_expressions[reaction]
+
+                if exponent > 0:
+                    numerator *= forward ** exponent
+                    denominator *= reverse ** exponent
+                else:
+                    numerator *= reverse ** -exponent
+                    denominator *= forward ** -exponent
+
+                log_residual += exponent * (sp.log(forward) - sp.log(reverse))
+
+            self._ratios.append(numerator / denominator)
+            self._log_residuals.append(log_residual)
+
+        # rate constants of reactions outside every cycle take no part in the conditions
+        self._symbols: tuple = tuple(sorted(set().union(*(ratio.free_symbols for ratio in self._ratios)), key=str))
+
+        # the cycles are scaled to unit length, so the tolerance means the same as for the other thermodynamic engines
+        self._norms: np.ndarray = np.linalg.norm(basis.astype(np.float64), axis=0)
+
+        self._function = None
+
+
+    @property
+    def basis(self):
+        return self._basis
+
+    @property
+    def reaction_ids(self):
+        """The reaction of each row of the basis"""
+        return self._reaction_ids
+
+    @property
+    def symbols(self):
+        """The rate-constant symbols of the conditions, in the order of the arguments of the compiled function"""
+        return self._symbols
+
+    @property
+    def ratios(self):
+        """The left-hand side of each condition, a ratio of products of rate constants"""
+        return self._ratios
+
+    @property
+    def conditions(self):
+        """The conditions as sympy equations, ratio = 1"""
+        return [sp.Eq(ratio, 1, evaluate=False) for ratio in self._ratios]
+
+    @property
+    def function(self):
+        """The compiled conditions: a NumPy function of the rate constants (in the order of symbols) returning ln(ratio) of each condition"""
+
+        if self._function is None:
+            self._function = sp.lambdify(self._symbols, self._log_residuals, modules="numpy")
+
+        return self._function
+
+
+    def __len__(self):
+        return len(self._ratios)
+
+
+
+    @staticmethod
+    def _to_expression(rate_constant: str):
+
+        # parsed as an SBML formula, so parameter names like "lambda", "if", "beta" or "E" are plain symbols and not Python keywords or sympy functions
+        expression = ast_to_sympy.formula_to_sympy(rate_constant)
+
+        return expression.xreplace({symbol: sp.Symbol(symbol.name, positive=True) for symbol in expression.free_symbols})
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def evaluate(self, parameter_values: dict) -> tuple[np.ndarray, np.ndarray]:
+        """
+            Evaluates the compiled conditions for one or many parameter sets
+
+            Args:
+                parameter_values (dict): maps the name of every symbol to a number or to an array of values (one per parameter set);
+                                         arrays are broadcast against each other
+
+            Returns:
+                np.ndarray: a boolean array, True for the compatible parameter sets
+                np.ndarray: the deviation of each condition (conditions x parameter sets), ln(ratio) divided by the length of the cycle
+        """
+
+        missing = [str(symbol) for symbol in self._symbols if str(symbol) not in parameter_values]
+
+        if missing:
+            raise ValueError(f"No values were given for: {', '.join(missing)}")
+
+        arguments = [np.asarray(parameter_values[str(symbol)], dtype=np.float64) for symbol in self._symbols]
+
+        shape = np.broadcast_shapes(*(argument.shape for argument in arguments)) if arguments else ()
+
+        if len(self) == 0:
+            return np.ones(shape, dtype=bool), np.zeros((0,) + shape)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_residuals = [np.broadcast_to(np.asarray(value, dtype=np.float64), shape) for value in self.function(*arguments)]
+
+        deviation = np.stack(log_residuals) / self._norms.reshape((-1,) + (1,) * len(shape))
+
+        # NaN (a rate constant which is not positive) is never within the tolerance
+        return np.all(np.abs(deviation) <= THERMO_TOLERANCE, axis=0), deviation
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def check_symbolic(self, parameter_values: dict = None) -> list:
+        """
+            Substitutes the known rate constants into the conditions and simplifies them
+
+            Args:
+                parameter_values (dict): maps symbol names to numbers or sympy expressions; the other symbols stay free
+
+            Returns:
+                list: for each condition, True if it holds identically, False if it cannot hold,
+                      or the simplified sympy equation which the remaining symbols must satisfy
+        """
+
+        substitutions = {}
+
+        for name, value in (parameter_values or {}).items():
+            substitutions[sp.Symbol(name, positive=True)] = sp.sympify(value)
+
+        verdicts = []
+
+        for ratio, norm in zip(self._ratios, self._norms):
+
+            ratio = sp.simplify(ratio.subs(substitutions))
+
+            if ratio.free_symbols:
+                verdicts.append(sp.Eq(ratio, 1))
+
+            elif ratio.is_number and ratio.is_real and ratio > 0:
+                verdicts.append(bool(abs(float(sp.log(ratio))) / norm <= THERMO_TOLERANCE))
+
+            else:
+                verdicts.append(False)
+
+        return verdicts
+
+
+
+    def __str__(self):
+        return "\n".join(f"{sp.sstr(ratio)} = 1" for ratio in self._ratios)
@@ -7,9 +7,17 @@ import _modules._matrix_constructor as matrix_constructor
 import _modules._model_checker as model_checker
 import _modules._exceptions as exceptions
 import _modules._utility as utility
+import _modules._chebi_cache as chebi_cache
+import _modules._chebi_index as chebi_index
+import _modules._chebi_resolver as chebi_resolver
+import _modules._integer_null_space as integer_null_space
+import _modules._rate_sweep as rate_sweep
+from _modules._symbolic_budget import SymbolicBudget
+from _modules._constants import *
 
 import numpy as np
 import pandas as pd
+from scipy import sparse
 
 
 from _classes.cBioMLReaction import *
@@ -26,7 +34,11 @@ class BioML(object):
     """
         
 
-    def __init__(self):
+    def __init__(self, matrix_backend: str = MATRIX_BACKEND_AUTO, mass_action_engine: str = MASS_ACTION_ENGINE_SYMPY,
+                 reaction_time_budget: float = SYMBOLIC_REACTION_TIME_BUDGET, model_time_budget: float = SYMBOLIC_MODEL_TIME_BUDGET):
+        self._matrix_backend: str = matrix_backend
+        self._mass_action_engine: str = mass_action_engine
+        self._symbolic_budget: SymbolicBudget = SymbolicBudget(reaction_time_budget, model_time_budget)
         self._initialize_fields()
 
     def _initialize_fields(self):
@@ -39,8 +51,8 @@ class BioML(object):
         self._file_name: str = None
         self._file_format: str = None
         self._biomlmodel: BioMLModel = None
-        self._matrix_constructor = matrix_constructor.MatrixConstructor()
-        self._model_checker = model_checker.ModelChecker()
+        self._matrix_constructor = matrix_constructor.MatrixConstructor(self._matrix_backend)
+        self._model_checker = model_checker.ModelChecker(self._mass_action_engine, self._new_symbolic_budget())
         self._sbml_reader = sbml_reader.SbmlReader()
         self._cellml_reader = cellml_reader.CellmlReader()
 
@@ -72,6 +84,41 @@ class BioML(object):
     def file_name(self):
         return self._file_name
 
+    @property
+    def matrix_backend(self):
+        return self._matrix_backend
+
+    @property
+    def mass_action_engine(self):
+        return self._mass_action_engine
+
+    @property
+    def symbolic_time_budget(self):
+        """The seconds the symbolic operations may take per reaction and per model, None for no limit"""
+        return self._symbolic_budget.reaction_time_budget, self._symbolic_budget.model_time_budget
+
+
+
+    def _new_symbolic_budget(self) -> SymbolicBudget:
+
+        # each model gets its own budget, with the limits of this instance
+        return SymbolicBudget(self._symbolic_budget.reaction_time_budget, self._symbolic_budget.model_time_budget)
+
+
+
+    def _undetermined_reactions(self) -> list[str]:
+
+        # the reactions whose symbolic operations ran out of their time budget
+        if self._biomlmodel is None: return []
+
+        return [reaction.ID for reaction in self._biomlmodel.get_list_of_reactions() if reaction.mass_action_tier == MASS_ACTION_TIER_UNDETERMINED]
+
+
+
+    def _print_undetermined_mass_action(self) -> None:
+
+        utility.message_printer(f"\nThe \"Mass Action\" check is undetermined, the symbolic operations on reaction(s) {', '.join(self._undetermined_reactions())} ran out of their time budget\n", color='yellow')
+
 
 
 
@@ -129,7 +176,7 @@ class BioML(object):
 
                     utility.message_printer(f"\n\u27A4\u27A4\u27A4 The input file: {self._file_name} is a SBML model \u27A4\u27A4\u27A4\n", color="cyan")
 
-                    self._biomlmodel =  self._sbml_reader.read_file(self._file_path)
+                    self._biomlmodel =  self._sbml_reader.read_file(self._file_path, self._mass_action_engine, self._new_symbolic_budget())
 
                     file_type = 'SBML'
 
@@ -137,7 +184,7 @@ class BioML(object):
 
                     utility.message_printer(f"\n\u27A4\u27A4\u27A4 The input file: {self._file_name} is a CellML model \u27A4\u27A4\u27A4\n", color="cyan")
 
-                    self._biomlmodel = self._cellml_reader.read_file(self._file_path)
+                    self._biomlmodel = self._cellml_reader.read_file(self._file_path, symbolic_budget=self._new_symbolic_budget())
 
                     file_type = 'CellML'
 
@@ -160,6 +207,260 @@ class BioML(object):
 
 
 
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def set_matrix_backend(self, backend: str) -> None:
+        """
+            Selects how the stoichiometric, elemental and charge matrices are stored
+
+            Args:
+                backend (str): "dense" for NumPy arrays, "sparse" for SciPy CSR matrices, or "auto" to use the sparse format for large models only
+
+            Returns:
+                None
+        """
+
+        try:
+
+            self._matrix_constructor.backend = backend
+
+            self._matrix_backend = backend
+
+        except Exception as e:
+            utility.error_handler(e, "set_matrix_backend")
+
+
+
+
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def set_mass_action_engine(self, engine: str) -> None:
+        """
+            Selects how check_mass_action_kinetics classifies the kinetic laws
+
+            Args:
+                engine (str): "sympy" to classify the laws with the SymPy tiers (structural, cancelled, simplified),
+                              or "ast" to classify them on their libsbml expression trees first, without SymPy.
+                              SBML models are checked while they are read, so the engine applies to the files read afterwards
+
+            Returns:
+                None
+        """
+
+        try:
+
+            self._model_checker.engine = engine
+
+            self._mass_action_engine = engine
+
+        except Exception as e:
+            utility.error_handler(e, "set_mass_action_engine")
+
+
+
+
+
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def set_symbolic_time_budget(self, reaction_time_budget: float = None, model_time_budget: float = None) -> None:
+        """
+            Limits the time the symbolic operations (sympy.simplify, cancel, expand) of the mass-action check may take.
+            With a limit the operations run in worker processes which are killed when the time runs out; the reaction is then marked "undetermined"
+            (its "mass_action_tier"), a warning names it and the remaining reactions are still checked.
+
+            Args:
+                reaction_time_budget (float): seconds for the operations on one reaction, or None for no limit
+                model_time_budget (float): seconds for the operations on all reactions of a model together, or None for no limit.
+                                           SBML models are checked while they are read, so the budget applies to the files read afterwards
+
+            Returns:
+                None
+        """
+
+        try:
+
+            self._symbolic_budget = SymbolicBudget(reaction_time_budget, model_time_budget)
+
+            self._model_checker.symbolic_budget = self._new_symbolic_budget()
+
+        except Exception as e:
+            utility.error_handler(e, "set_symbolic_time_budget")
+
+
+
+
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def configure_null_space_cache(self, cache_dir: str = None, max_entries: int = None) -> None:
+        """
+            Configures the cache of exact integer null spaces used by the "exact" thermodynamic engine.
+            Null spaces are keyed by the topology of the stoichiometric matrix, so models with the same network reuse them.
+
+            Args:
+                cache_dir (str): a directory where the null spaces are also saved, so they are reused across runs. Defaults to the BIOML_NULL_SPACE_CACHE_DIR environment variable; if neither is set they are kept in memory only
+                max_entries (int): the maximum number of null spaces kept in memory
+
+            Returns:
+                None
+        """
+
+        try:
+
+            integer_null_space.set_default_cache(integer_null_space.NullSpaceCache(cache_dir, max_entries))
+
+        except Exception as e:
+            utility.error_handler(e, "configure_null_space_cache")
+
+
+
+
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def get_integer_null_space(self, printing: bool = False) -> np.ndarray:
+        """
+            Returns the exact integer null space of the stoichiometric matrix: each column is the set of integer multipliers of one independent Wegscheider condition
+
+            Args:
+                printing (bool): if this value is True, a message will be displayed to show the result
+
+            Returns:
+                np.ndarray: A 2D integer array (reactions x nullity)
+                None: If an exception is raised during the execution.
+        """
+
+        try:
+
+            basis = self._matrix_constructor.construct_integer_null_space(self._biomlmodel)
+
+            if printing:
+                utility.printer("\nThe Integer Null Space is:\n", basis)
+
+            return basis
+
+        except Exception as e:
+            utility.error_handler(e, "get_integer_null_space")
+            return None
+
+
+
+
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def configure_chebi_cache(self, cache_dir: str = None, max_entries: int = None, ttl: float = None, enabled: bool = True) -> None:
+        """
+            Configures the persistent ChEBI cache shared by the SBML and CellML readers.
+            ChEBI entries (formula, charge and composition) are stored on disk so that they are fetched only once across runs.
+
+            Args:
+                cache_dir (str): the directory of the cache file. Defaults to "~/.bioml/chebi_cache" or the BIOML_CHEBI_CACHE_DIR environment variable
+                max_entries (int): the maximum number of entries kept; the least recently used entries are evicted above it
+                ttl (float): the number of seconds after which a cached entry is fetched again
+                enabled (bool): if this value is False, ChEBI entries are always fetched and never cached
+
+            Returns:
+                None
+        """
+
+        try:
+
+            if enabled:
+                cache = chebi_cache.ChebiCache(cache_dir, max_entries, ttl)
+                chebi_resolver.set_default_resolver(chebi_resolver.ChebiResolver(cache))
+            else:
+                chebi_resolver.set_default_resolver(chebi_resolver.ChebiResolver(use_cache=False))
+
+        except Exception as e:
+            utility.error_handler(e, "configure_chebi_cache")
+
+
+
+
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def build_chebi_index(self, chemical_data_path: str, compounds_path: str, index_dir: str) -> None:
+        """
+            Builds an offline ChEBI index from the ChEBI flat-file dumps, "chemical_data.tsv" and "compounds.tsv".
+            The index can then be used with configure_chebi_index to resolve ChEBI codes without network access.
+
+            Args:
+                chemical_data_path (str): the path to "chemical_data.tsv"
+                compounds_path (str): the path to "compounds.tsv"
+                index_dir (str): the directory the index is saved in
+
+            Returns:
+                None
+        """
+
+        try:
+
+            index = chebi_index.ChebiIndex.build(chemical_data_path, compounds_path, index_dir)
+
+            utility.message_printer(f"\nChEBI index with {len(index)} compounds has been saved to \"{index_dir}\"", color="green")
+
+        except Exception as e:
+            utility.error_handler(e, "build_chebi_index")
+
+
+
+
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def configure_chebi_index(self, index_dir: str) -> None:
+        """
+            Makes the SBML and CellML readers resolve ChEBI codes from an offline ChEBI index instead of libChEBIpy.
+            Codes which are not in the index are treated as compounds without a registered formula.
+
+            Args:
+                index_dir (str): the directory of an index built by build_chebi_index
+
+            Returns:
+                None
+        """
+
+        try:
+
+            index = chebi_index.ChebiIndex(index_dir)
+
+            chebi_resolver.set_default_resolver(chebi_resolver.ChebiResolver(mode=CHEBI_RESOLVER_OFFLINE, index=index))
+
+        except Exception as e:
+            utility.error_handler(e, "configure_chebi_index")
+
+
+
+
+
+
+
     # ********************************
     # *           Function           *
     # ********************************
@@ -172,21 +473,33 @@ class BioML(object):
 
             Returns:
                 bool: Boolean value showing if all reactions are governed by Mass Action Kinetics or not
-                None: If an exception is raised during the check.
+                None: If an exception is raised during the check, or if no reaction breaks Mass Action Kinetics but some are undetermined (see set_symbolic_time_budget).
         """
 
         try:
 
             if self._biomlmodel:
 
-                if self._biomlmodel.is_mass_action is None:
+                if self._biomlmodel.is_mass_action is None and not self._undetermined_reactions():
 
                     is_mass_action = False
 
+                    self._model_checker.symbolic_budget = self._new_symbolic_budget()
+
                     is_mass_action = self._model_checker.check_mass_action_kinetics(self._biomlmodel)
 
 
-                    if is_mass_action:
+                    if is_mass_action is None:
+
+                        if printing:
+
+                            self._print_undetermined_mass_action()
+
+                            time.sleep(5)
+
+                        return None
+
+                    elif is_mass_action:
 
                         if printing:
 
@@ -208,7 +521,18 @@ class BioML(object):
                     
                 else:
 
-                    if self._biomlmodel.is_mass_action:
+                    if self._biomlmodel.is_mass_action is None:
+
+                        # the reader left the check undetermined, some reactions ran out of their symbolic time budget
+                        if printing:
+
+                            self._print_undetermined_mass_action()
+
+                            time.sleep(5)
+
+                        return None
+
+                    elif self._biomlmodel.is_mass_action:
 
                         if printing:
 
@@ -383,41 +707,343 @@ class BioML(object):
             return stoichiometric_matrix
 
         except Exception as e:
-            utility.error_handler(e, "get_stoichiometric_matrix")
-            return None
-
+            utility.error_handler(e, "get_stoichiometric_matrix")
+            return None
+
+
+
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************    
+    def get_forward_stoichiometric_matrix(self, printing: bool = False) -> np.ndarray:
+        """
+            Returns a 2D numpy array representing the forward stoichiometric matrix of the reactions for the imported model: This array shows stoichiometric coefficients of reactants only (all values are positive in this array)
+
+            Args:
+                printing (bool): if this value is True, a message will be displayed to show the result
+
+            Returns:
+                np.ndarray: A 2D numpy array
+                None: If an exception is raised during the execution.
+        """
+
+        try:
+            forward_stoichiometric_matrix = self._matrix_constructor.construct_forward_stoichiometric_matrix(self._biomlmodel)
+
+            if printing:
+                utility.printer("\nThe Forward Stoichiometric Matrix is:\n", forward_stoichiometric_matrix)
+
+            return forward_stoichiometric_matrix
+
+        except Exception as e:
+            utility.error_handler(e, "get_forward_stoichiometric_matrix")
+            return None
+        
+
+
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def get_reverse_stoichiometric_matrix(self, printing: bool = False) -> np.ndarray:
+        """
+            Returns a 2D numpy array representing the reverse stoichiometric matrix of the reactions for the imported model: This array shows stoichiometric coefficients of products only (all values are positive in this array)
+
+            Args:
+                printing (bool): if this value is True, a message will be displayed to show the result
+
+            Returns:
+                np.ndarray: A 2D numpy array
+                None: If an exception is raised during the execution.
+        """
+
+        try:
+            reverse_stoichiometric_matrix = self._matrix_constructor.construct_reverse_stoichiometric_matrix(self._biomlmodel)
+
+            if printing:
+                utility.printer("\nThe Reverse Stoichiometric Matrix is:\n", reverse_stoichiometric_matrix)
+
+            return reverse_stoichiometric_matrix
+
+        except Exception as e:
+            utility.error_handler(e, "get_reverse_stoichiometric_matrix")
+            return None
+        
+    
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def get_kinetic_order_matrices(self, printing: bool = False) -> tuple:
+        """
+            Returns the forward and reverse kinetic-order matrices: the exponent of each species (row) in the forward and reverse terms of the rate law of each reaction (column)
+
+            Args:
+                printing (bool): if this value is True, a message will be displayed to show the result
+
+            Returns:
+                np.ndarray: the forward kinetic-order matrix
+                np.ndarray: the reverse kinetic-order matrix
+                None: If an exception is raised during the execution.
+        """
+
+        try:
+            forward_orders, reverse_orders, _ = self._matrix_constructor.construct_kinetic_order_matrices(self._biomlmodel)
+
+            if printing:
+                utility.printer("\nThe Forward Kinetic-Order Matrix is:\n", forward_orders)
+                utility.printer("\nThe Reverse Kinetic-Order Matrix is:\n", reverse_orders)
+
+            return forward_orders, reverse_orders
+
+        except Exception as e:
+            utility.error_handler(e, "get_kinetic_order_matrices")
+            return None
+
+
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def check_kinetic_orders(self, printing: bool = False) -> bool:
+        """
+            Returns True if the kinetic orders of all rate laws equal the stoichiometric coefficients of their reactions (mass action) and False if not.
+            The kinetic-order matrices are compared with the forward and reverse stoichiometric matrices in one array comparison.
+            Reactions whose rate law has more than one term per direction have no kinetic orders and are not checked.
+
+            Args:
+                printing (bool): if this value is True, a message will be displayed to show the result and the mismatching reactions
+
+            Returns:
+                bool: True if the kinetic orders match the stoichiometry, False otherwise
+                None: If an exception is raised during the check.
+        """
+
+        try:
+            mismatches = self._matrix_constructor.find_kinetic_order_mismatches(self._biomlmodel)
+
+            if len(mismatches) == 0:
+
+                if printing:
+                    utility.message_printer("\nThe kinetic orders of the rate laws match the stoichiometry\n", color='green')
+
+                return True
+
+            if printing:
+
+                column_names = self._matrix_constructor.get_stoichiometric_matrix_column_names(self._biomlmodel)
+
+                utility.message_printer("\nThe kinetic orders of the rate laws do not match the stoichiometry", color='red')
+
+                for column in mismatches:
+                    utility.message_printer(f"\nThe rate law of reaction {column_names.get(column, column)} is not the mass-action law of its stoichiometry", color='magenta')
+
+            return False
+
+        except Exception as e:
+            utility.error_handler(e, "check_kinetic_orders")
+            return None
+
+
+
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def get_stoichiometric_column_names_indices(self, printing: bool = False) -> dict:
+        """
+            Returns a dictionary containing the names of columns with their corresponding indices in the stoichiometric matrix
+
+            Args:
+                printing (bool): if this value is True, a message will be displayed to show the result
+
+            Returns:
+                dict: A dictionary mapping column index to column name
+        """
+
+        columns = self._matrix_constructor.get_stoichiometric_matrix_column_names(self._biomlmodel)
+
+        if printing:
+
+            utility.printer("\nThe Columns are:", columns )
+
+        return columns
+    
+
+
+
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def get_stoichiometric_row_names_indices(self, printing: bool = False) -> dict:
+        """
+            Returns a dictionary containing the names of rows with their corresponding indices in the stoichiometric matrix
+
+            Args:
+                printing (bool): if this value is True, a message will be displayed to show the result
+
+            Returns:
+                dict: A dictionary mapping row index to row name
+        """
+
+        rows = self._matrix_constructor.get_stoichiometric_matrix_row_names(self._biomlmodel)
+
+        if printing:
+
+            utility.printer("\nThe Rows are:", rows )
+
+        return rows
+    
+
+
+
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def get_element_information_in_stoichiometric_matrix(self, i: int, j: int, printing: bool = False) -> str:
+        """
+            Returns the element in the stoichiometric matrix
+
+            Args:
+                i (int): the row index
+                j (int): the column index 
+                printing (bool): if this value is True, a message will be displayed to show the result
+
+            Returns:
+                str: A value (string)
+                None: If an exception is raised during the execution.
+        """
+
+        try:
+
+            if self._biomlmodel is None:
+                raise exceptions.NoModel("No BioModel has been read!!!")
+
+            return self._matrix_constructor.get_stoichiometric_matrix_element_information(i, j, self._biomlmodel, printing = printing)
+        
+        except Exception as e:
+            utility.error_handler(e, "get_element_information_in_stoichiometric_matrix")
+            return None
+        
+
+
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def get_thermo_conversion_matrix(self, printing: bool = False) -> np.ndarray:
+        """
+            Returns a 2D numpy array that converts kinetic reaction rate constants to corresponding thermodynamic reaction rate constants
+
+            Args:
+                printing (bool): if this value is True, a message will be displayed to show the result
+
+            Returns:
+                np.ndarray: A 2D numpy array
+                None: If an exception is raised during the execution.
+        """
+
+        try:
+            conversion_matrix = self._matrix_constructor.construct_kinetic_thermo_conversion_matrix(self._biomlmodel, printing = printing)
+
+            return conversion_matrix
+            
+        except Exception as e:
+            utility.error_handler(e, "get_thermo_conversion_matrix")
+
+            return None
+
+    
+
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def get_kinetic_rate_constants_vector(self, printing: bool = False) -> np.ndarray:
+        """
+            Returns a 1D numpy array that contains the ratio of forward to reverse reaction rate constants
+
+            Args:
+                printing (bool): if this value is True, a message will be displayed to show the result
+
+            Returns:
+                np.ndarray: A 1D numpy array
+                None: If an exception is raised during the execution.
+        """
+
+        try:
+            kinetic_constants_vector = self._matrix_constructor.construct_kinetic_constants_vector(self._biomlmodel, printing)
+
+            return kinetic_constants_vector
+        
+        except Exception as e:
+            utility.error_handler(e, "get_kinetic_rate_constants_vector")
 
+            return None
 
+    
 
 
 
     # ********************************
     # *           Function           *
-    # ********************************    
-    def get_forward_stoichiometric_matrix(self, printing: bool = False) -> np.ndarray:
+    # ********************************
+    def get_flux_evaluator(self, printing: bool = False):
         """
-            Returns a 2D numpy array representing the forward stoichiometric matrix of the reactions for the imported model: This array shows stoichiometric coefficients of reactants only (all values are positive in this array)
+            Returns a NumPy evaluator of the fluxes v = k+ * prod c ** F - k- * prod c ** R of the model, compiled from the forward and reverse stoichiometric matrices
+            and the rate constants. The model must be governed by mass-action kinetics and its rate laws must have the kinetic orders of its stoichiometry.
+            Calling the evaluator with a (states x species) concentration array returns the (states x reactions) fluxes, computed in log space with matrix products.
 
             Args:
-                printing (bool): if this value is True, a message will be displayed to show the result
+                printing (bool): if this value is True, the rate constants of the evaluator will be displayed
 
             Returns:
-                np.ndarray: A 2D numpy array
+                FluxEvaluator: the flux evaluator
                 None: If an exception is raised during the execution.
         """
 
         try:
-            forward_stoichiometric_matrix = self._matrix_constructor.construct_forward_stoichiometric_matrix(self._biomlmodel)
+            if self.check_mass_action_kinetics(raise_error=True) is not True:
+                raise ValueError("Fluxes can only be evaluated for models governed by \"Mass Action\" kinetics")
+
+            mismatches = self._matrix_constructor.find_kinetic_order_mismatches(self._biomlmodel)
+
+            if len(mismatches) > 0:
+                column_names = self._matrix_constructor.get_stoichiometric_matrix_column_names(self._biomlmodel)
+                raise ValueError(f"The kinetic orders of the rate laws of {', '.join(str(column_names.get(column, column)) for column in mismatches)} do not match their stoichiometry")
+
+            flux_evaluator = self._matrix_constructor.construct_flux_evaluator(self._biomlmodel)
 
             if printing:
-                utility.printer("\nThe Forward Stoichiometric Matrix is:\n", forward_stoichiometric_matrix)
+                utility.printer("\nForward rate constants of the flux evaluator:\n", flux_evaluator.forward_rate_constants)
+                utility.printer("\nReverse rate constants of the flux evaluator:\n", flux_evaluator.reverse_rate_constants)
 
-            return forward_stoichiometric_matrix
+            return flux_evaluator
 
         except Exception as e:
-            utility.error_handler(e, "get_forward_stoichiometric_matrix")
+            utility.error_handler(e, "get_flux_evaluator")
             return None
-        
 
 
 
@@ -426,31 +1052,36 @@ class BioML(object):
     # ********************************
     # *           Function           *
     # ********************************
-    def get_reverse_stoichiometric_matrix(self, printing: bool = False) -> np.ndarray:
+    def evaluate_fluxes(self, concentrations, printing: bool = False) -> np.ndarray:
         """
-            Returns a 2D numpy array representing the reverse stoichiometric matrix of the reactions for the imported model: This array shows stoichiometric coefficients of products only (all values are positive in this array)
+            Evaluates the fluxes of all reactions for one or many concentration states (see get_flux_evaluator)
 
             Args:
-                printing (bool): if this value is True, a message will be displayed to show the result
+                concentrations (np.ndarray): one state (species) or a block of states (states x species); the columns follow the rows of the stoichiometric matrix
+                printing (bool): if this value is True, the fluxes will be displayed
 
             Returns:
-                np.ndarray: A 2D numpy array
+                np.ndarray: the fluxes (states x reactions, or reactions for a single state)
                 None: If an exception is raised during the execution.
         """
 
         try:
-            reverse_stoichiometric_matrix = self._matrix_constructor.construct_reverse_stoichiometric_matrix(self._biomlmodel)
+            flux_evaluator = self.get_flux_evaluator()
+
+            if flux_evaluator is None:
+                raise ValueError("The flux evaluator of the model could not be built")
+
+            fluxes = flux_evaluator.evaluate(concentrations)
 
             if printing:
-                utility.printer("\nThe Reverse Stoichiometric Matrix is:\n", reverse_stoichiometric_matrix)
+                utility.printer("\nThe fluxes are:\n", fluxes)
 
-            return reverse_stoichiometric_matrix
+            return fluxes
 
         except Exception as e:
-            utility.error_handler(e, "get_reverse_stoichiometric_matrix")
+            utility.error_handler(e, "evaluate_fluxes")
             return None
-        
-    
+
 
 
 
@@ -458,179 +1089,241 @@ class BioML(object):
     # ********************************
     # *           Function           *
     # ********************************
-    def get_stoichiometric_column_names_indices(self, printing: bool = False) -> dict:
+    def check_kinetic_constants_thermo_compatibility(self, printing: bool = False, raise_error: bool = False, engine: str = THERMO_ENGINE_NULL_SPACE,
+                                                     by_component: bool = False, parallel: bool = False, max_workers: int = None, reduce: bool = False) -> bool:
         """
-            Returns a dictionary containing the names of columns with their corresponding indices in the stoichiometric matrix
+            Checks the validity of Kinetic reaction rate constants in thermodynamic framework.
+            The function uses Wegscheider conditions to check thermodynamic compatibility of constants
 
             Args:
                 printing (bool): if this value is True, a message will be displayed to show the result
+                raise_error (bool): if this value is True, the exception is raised again after it is reported
+                engine (str): "null_space" (default) to use a null-space basis of the stoichiometric matrix,
+                              "lsqr"/"lsmr" to use the residual of an iterative sparse least-squares solver, which is faster on large networks,
+                              or "exact" to use the exact integer null space, which is cached by network topology
+                by_component (bool): if this value is True, each connected sub-network of species and reactions is checked on its own,
+                                     and the failing sub-networks can be found with get_thermodynamic_component_report
+                parallel (bool): if this value is True, the sub-networks are checked concurrently
+                max_workers (int): the maximum number of sub-networks checked at the same time
+                reduce (bool): if this value is True, dead ends are pruned, duplicate reactions lumped and identical species merged before the check
 
             Returns:
-                dict: A dictionary mapping column index to column name
+                bool: True if the reaction rate constants are compatible and meaningful, False otherwise
+                None: If an exception is raised during the execution.
         """
 
-        columns = self._matrix_constructor.get_stoichiometric_matrix_column_names(self._biomlmodel)
-
-        if printing:
-
-            utility.printer("\nThe Columns are:", columns )
-
-        return columns
-    
-
-
+        try:
+            compatibility = self._matrix_constructor.check_kinetic_rates_thermo_compatibility(self._biomlmodel, printing, engine, by_component, parallel, max_workers, reduce)
 
+            utility.display_warnings()
 
+            return compatibility
+        
+        except Exception as e:
+            utility.error_handler(e, "check_kinetic_constants_thermo_compatibility")
+            utility.printer("\nThermodynamic Compatibility Check: ","\nThe kinetic reaction rate constants are NOT compatible with thermodynamic constraints\n", text_color="red", text_style="bold")
+            if raise_error:
+                raise e
+            return None
+        
 
 
     # ********************************
     # *           Function           *
     # ********************************
-    def get_stoichiometric_row_names_indices(self, printing: bool = False) -> dict:
+    def check_kinetic_constants_thermo_compatibility_sweep(self, forward_rates = None, reverse_rates = None, file_path: str = None,
+                                                           engine: str = THERMO_ENGINE_NULL_SPACE, printing: bool = False,
+                                                           parallel: bool = False, max_workers: int = None) -> tuple[np.ndarray, np.ndarray]:
         """
-            Returns a dictionary containing the names of rows with their corresponding indices in the stoichiometric matrix
+            Checks many candidate vectors of kinetic rate constants for thermodynamic compatibility at once, without changing the rate constants of the model.
+            The null-space basis is computed once and all candidates are tested by batched matrix products.
+            The candidates are given either as two arrays or as a CSV/Parquet table with the columns "k_forward_<reaction ID>" and "k_reverse_<reaction ID>".
 
             Args:
-                printing (bool): if this value is True, a message will be displayed to show the result
+                forward_rates (array-like): the forward rate constants (candidates x reactions), columns in the order of the stoichiometric matrix
+                reverse_rates (array-like): the reverse rate constants, with the same shape
+                file_path (str): the path of a .csv or .parquet table of candidates, used instead of the arrays
+                engine (str): "null_space" (default) or "exact"
+                printing (bool): if this value is True, the number of compatible candidates will be displayed
+                parallel (bool): if this value is True, the candidates are split over a pool of processes which read them from shared memory
+                max_workers (int): the number of worker processes. Defaults to the number of CPUs
 
             Returns:
-                dict: A dictionary mapping row index to row name
+                np.ndarray: a boolean vector, True for the compatible candidates
+                np.ndarray: the residual norm of each candidate, NaN for the candidates with a rate constant which is not positive
+                None: If an exception is raised during the execution.
         """
 
-        rows = self._matrix_constructor.get_stoichiometric_matrix_row_names(self._biomlmodel)
+        try:
+            if file_path is not None:
 
-        if printing:
+                column_names = self._matrix_constructor.get_stoichiometric_matrix_column_names(self._biomlmodel)
 
-            utility.printer("\nThe Rows are:", rows )
+                reaction_ids = [column_names.get(index, str(index)) for index in range(BioMLReaction.get_current_index())]
 
-        return rows
-    
+                forward_rates, reverse_rates = rate_sweep.read_rate_constants(file_path, reaction_ids)
+
+            elif forward_rates is None or reverse_rates is None:
+                raise ValueError("Either the forward and reverse rate constants or the path of a rate constant table must be given!")
 
+            compatible, residual_norms = self._matrix_constructor.check_kinetic_rates_thermo_compatibility_sweep(self._biomlmodel, forward_rates, reverse_rates, engine, parallel, max_workers)
 
+            if printing:
+                utility.printer("\nThermodynamic Compatibility Sweep: ", f"{int(compatible.sum())} of {len(compatible)} candidates are compatible with thermodynamic constraints\n")
+
+            return compatible, residual_norms
 
+        except Exception as e:
+            utility.error_handler(e, "check_kinetic_constants_thermo_compatibility_sweep")
+            return None
 
 
 
     # ********************************
     # *           Function           *
     # ********************************
-    def get_element_information_in_stoichiometric_matrix(self, i: int, j: int, printing: bool = False) -> str:
+    def get_wegscheider_conditions(self, printing: bool = False):
         """
-            Returns the element in the stoichiometric matrix
+            Returns the explicit Wegscheider conditions of the model: one equation per independent cycle of the network,
+            a ratio of products of rate constants equal to 1. They are derived once for the topology and
+            - check_symbolic(values) substitutes the known rate constants and simplifies the conditions
+            - evaluate(values) runs the conditions compiled with sympy.lambdify on NumPy arrays of parameter sets
 
             Args:
-                i (int): the row index
-                j (int): the column index 
-                printing (bool): if this value is True, a message will be displayed to show the result
+                printing (bool): if this value is True, the conditions will be displayed
 
             Returns:
-                str: A value (string)
+                WegscheiderConditions: the conditions
                 None: If an exception is raised during the execution.
         """
 
         try:
+            conditions = self._matrix_constructor.construct_wegscheider_conditions(self._biomlmodel)
 
-            if self._biomlmodel is None:
-                raise exceptions.NoModel("No BioModel has been read!!!")
+            if printing:
+                utility.printer("\nWegscheider Conditions:\n", str(conditions) if len(conditions) else "The network has no cycles, so there are no conditions")
+
+            return conditions
 
-            return self._matrix_constructor.get_stoichiometric_matrix_element_information(i, j, self._biomlmodel, printing = printing)
-        
         except Exception as e:
-            utility.error_handler(e, "get_element_information_in_stoichiometric_matrix")
+            utility.error_handler(e, "get_wegscheider_conditions")
             return None
-        
-
-
 
 
 
     # ********************************
     # *           Function           *
     # ********************************
-    def get_thermo_conversion_matrix(self, printing: bool = False) -> np.ndarray:
+    def get_thermodynamic_violations(self, engine: str = THERMO_ENGINE_EXACT, forward_rates = None, reverse_rates = None, printing: bool = False) -> pd.DataFrame:
         """
-            Returns a 2D numpy array that converts kinetic reaction rate constants to corresponding thermodynamic reaction rate constants
+            Returns where the kinetic rate constants violate the thermodynamic constraints: the violated cycles of the network, their deviation and their reactions.
+            Candidates of a parameter sweep can be localized together, the "candidate" column then tells them apart;
+            candidates with a rate constant which is not positive are left out.
 
             Args:
-                printing (bool): if this value is True, a message will be displayed to show the result
+                engine (str): "exact" (default) for sparse integer cycles or "null_space" for the orthonormal cycles used by the default check
+                forward_rates (array-like): the forward rate constants of several candidates (candidates x reactions); if None, the rate constants of the model are used
+                reverse_rates (array-like): the reverse rate constants, with the same shape
+                printing (bool): if this value is True, the violations will be displayed
 
             Returns:
-                np.ndarray: A 2D numpy array
+                pd.DataFrame: one row per (candidate, violated cycle, reaction) with the columns "candidate", "cycle", "deviation", "reaction" and "coefficient";
+                              empty if the rate constants are compatible
                 None: If an exception is raised during the execution.
         """
 
         try:
-            conversion_matrix = self._matrix_constructor.construct_kinetic_thermo_conversion_matrix(self._biomlmodel, printing = printing)
+            logn_ratios = None
 
-            return conversion_matrix
-            
-        except Exception as e:
-            utility.error_handler(e, "get_thermo_conversion_matrix")
+            if forward_rates is not None or reverse_rates is not None:
+                # the ratios of invalid candidates are zero, so they violate nothing
+                logn_ratios, _ = rate_sweep.logn_rate_ratios(forward_rates, reverse_rates)
 
-            return None
+            violations = self._matrix_constructor.localize_thermodynamic_violations(self._biomlmodel, engine, logn_ratios)
 
-    
+            column_names = self._matrix_constructor.get_stoichiometric_matrix_column_names(self._biomlmodel)
+
+            reaction_ids = np.array([column_names.get(index, str(index)) for index in range(BioMLReaction.get_current_index())], dtype=object)
+
+            violations["reaction"] = reaction_ids[violations["reaction"]] if len(violations["reaction"]) else np.array([], dtype=object)
+
+            report = pd.DataFrame(violations, columns=["candidate", "cycle", "deviation", "reaction", "coefficient"])
+
+            if printing:
+                if report.empty:
+                    utility.message_printer("\nNo thermodynamic cycle is violated\n", color="green")
+                else:
+                    utility.printer("\nViolated Thermodynamic Cycles:\n", report.to_string(index=False))
+
+            return report
 
+        except Exception as e:
+            utility.error_handler(e, "get_thermodynamic_violations")
+            return None
 
 
 
     # ********************************
     # *           Function           *
     # ********************************
-    def get_kinetic_rate_constants_vector(self, printing: bool = False) -> np.ndarray:
+    def get_thermodynamic_component_report(self, printing: bool = False) -> pd.DataFrame:
         """
-            Returns a 1D numpy array that contains the ratio of forward to reverse reaction rate constants
+            Returns the verdicts of the last thermodynamic compatibility check run with by_component=True:
+            one row per connected sub-network with its species, its reactions, whether it is compatible and its largest deviation from the Wegscheider conditions
 
             Args:
-                printing (bool): if this value is True, a message will be displayed to show the result
+                printing (bool): if this value is True, the report will be displayed
 
             Returns:
-                np.ndarray: A 1D numpy array
-                None: If an exception is raised during the execution.
+                pd.DataFrame: A DataFrame with the columns "component", "species", "reactions", "compatible" and "max_deviation"
+                None: If no check has been run by component or an exception is raised during the execution.
         """
 
         try:
-            kinetic_constants_vector = self._matrix_constructor.construct_kinetic_constants_vector(self._biomlmodel, printing)
+            component_report = self._matrix_constructor.component_report
 
-            return kinetic_constants_vector
-        
-        except Exception as e:
-            utility.error_handler(e, "get_kinetic_rate_constants_vector")
+            if component_report is None:
+                raise ValueError("The thermodynamic compatibility has not been checked by component yet!")
 
-            return None
+            report = pd.DataFrame(component_report, columns=["component", "species", "reactions", "compatible", "max_deviation"])
 
-    
+            if printing:
+                utility.printer("\nThermodynamic Compatibility by Sub-network:\n", report.to_string(index=False))
+
+            return report
+
+        except Exception as e:
+            utility.error_handler(e, "get_thermodynamic_component_report")
+            return None
 
 
 
     # ********************************
     # *           Function           *
     # ********************************
-    def check_kinetic_constants_thermo_compatibility(self, printing: bool = False, raise_error: bool = False) -> bool:
+    def get_elemental_matrix(self, printing: bool = False) -> np.ndarray:
         """
-            Checks the validity of Kinetic reaction rate constants in thermodynamic framework.
-            The function uses Wegscheider conditions to check thermodynamic compatibility of constants
+            Returns a 2D numpy array that represents the composition of each compound in an array: rows as chemical elements and columns as chemical compounds
 
             Args:
                 printing (bool): if this value is True, a message will be displayed to show the result
 
             Returns:
-                bool: True if the reaction rate constants are compatible and meaningful, False otherwise
+                np.ndarray: A 2D numpy array
                 None: If an exception is raised during the execution.
         """
 
         try:
-            compatibility = self._matrix_constructor.check_kinetic_rates_thermo_compatibility(self._biomlmodel, printing)
+            elemental_matrix = self._matrix_constructor.construct_elemental_matrix(self._biomlmodel)
+            
 
-            utility.display_warnings()
+            if printing:
+                utility.printer("\nThe Elemental Matrix is:\n", elemental_matrix)
+
+            return elemental_matrix
 
-            return compatibility
-        
         except Exception as e:
-            utility.error_handler(e, "check_kinetic_constants_thermo_compatibility")
-            utility.printer("\nThermodynamic Compatibility Check: ","\nThe kinetic reaction rate constants are NOT compatible with thermodynamic constraints\n", text_color="red", text_style="bold")
-            if raise_error:
-                raise e
+            utility.error_handler(e, "get_elemental_matrix")
             return None
         
 
@@ -638,42 +1331,93 @@ class BioML(object):
     # ********************************
     # *           Function           *
     # ********************************
-    def get_elemental_matrix(self, printing: bool = False) -> np.ndarray:
+    def get_mass_balance_violations(self, reduce: bool = False, printing: bool = False) -> list[dict]:
         """
-            Returns a 2D numpy array that represents the composition of each compound in an array: rows as chemical elements and columns as chemical compounds
+            Returns the reactions which do not conserve mass, each with the amount of every element it produces (negative if it consumes it)
 
             Args:
-                printing (bool): if this value is True, a message will be displayed to show the result
+                reduce (bool): if this value is True, duplicate reactions are lumped and species with identical stoichiometric rows merged before the check;
+                               the violations found are mapped back to all reactions of the model
+                printing (bool): if this value is True, the violations will be displayed
 
             Returns:
-                np.ndarray: A 2D numpy array
-                None: If an exception is raised during the execution.
+                list[dict]: one dictionary per violating reaction containing "reaction" (ID), "index" (column of the stoichiometric matrix)
+                            and "imbalance" (a dictionary mapping elements to amounts); empty if mass is conserved
+                None: If an exception is raised during the check.
         """
 
         try:
-            elemental_matrix = self._matrix_constructor.construct_elemental_matrix(self._biomlmodel)
-            
+            violations = self._find_mass_balance_violations(reduce)
 
             if printing:
-                utility.printer("\nThe Elemental Matrix is:\n", elemental_matrix)
+                for violation in violations:
+                    utility.message_printer(f"\nMass is not conserved in reaction {violation['reaction']}: {violation['imbalance']}", color='magenta')
 
-            return elemental_matrix
+            return violations
 
         except Exception as e:
-            utility.error_handler(e, "get_elemental_matrix")
+            utility.error_handler(e, "get_mass_balance_violations")
             return None
-        
+
+
+
+    def _find_mass_balance_violations(self, reduce: bool = False) -> list[dict]:
+
+        elemental_array = self._matrix_constructor.construct_elemental_matrix(self._biomlmodel)
+
+        stoichiometric_array = self._matrix_constructor.construct_stoichiometric_matrix(self._biomlmodel)
+
+        if elemental_array.shape[1] != stoichiometric_array.shape[0]:
+
+            raise ValueError(f"Matrices cannot be multiplied as the number of columns of the elemental matrix, {elemental_array.shape[1]}, is not equal to the number of rows of the stoichiometric matrix, {stoichiometric_array.shape[0]}!")
+
+        element_names = self._matrix_constructor.get_elemental_matrix_row_names(self._biomlmodel)
+
+        column_names = self._matrix_constructor.get_stoichiometric_matrix_column_names(self._biomlmodel)
+
+        if not reduce:
+
+            conservation_array = matrix_constructor.MatrixConstructor.integer_product(elemental_array, stoichiometric_array)
+
+            return matrix_constructor.MatrixConstructor.balance_violations(conservation_array, element_names, column_names)
+
+        # dead ends are kept, as every reaction has to be balanced on its own
+        reduced_network = self._matrix_constructor.reduce_network(self._biomlmodel, prune_dead_ends=False)
+
+        reduced_elemental_array = matrix_constructor.MatrixConstructor.integer_product(elemental_array, reduced_network.species_merger())
+
+        conservation_array = matrix_constructor.MatrixConstructor.integer_product(reduced_elemental_array, reduced_network.stoichiometric_matrix)
+
+        violations = []
+
+        # a lumped reaction has the imbalance of its representative, or the opposite one if it is the reverse reaction
+        for violation in matrix_constructor.MatrixConstructor.balance_violations(conservation_array, element_names, {}):
+
+            column = violation["index"]
+
+            for reaction, sign in zip(reduced_network.reaction_groups[column], reduced_network.reaction_signs[column]):
+
+                violations.append({
+                    "reaction": column_names.get(reaction, str(reaction)),
+                    "index": int(reaction),
+                    "imbalance": {element: int(sign) * amount for element, amount in violation["imbalance"].items()}
+                })
+
+        return sorted(violations, key=lambda violation: violation["index"])
+
 
 
     # ********************************
     # *           Function           *
     # ********************************
-    def check_mass_balance(self, printing: bool = False) -> bool:
+    def check_mass_balance(self, printing: bool = False, reduce: bool = False) -> bool:
         """
             Returns True if mass is conserved in all reactions of the model and False if not conserved. If printing is on, it can display the reaction violating mass conservation if mass balance fails
 
             Args:
                 printing (bool): if this value is True, a message will be displayed to show the result
+                reduce (bool): if this value is True, duplicate reactions are lumped and species with identical stoichiometric rows merged before the check;
+                               the violations found are mapped back to all reactions of the model
 
             Returns:
                 bool: True if mass is conserved, False otherwise
@@ -683,24 +1427,9 @@ class BioML(object):
 
         try:
 
-            elemental_array = self.get_elemental_matrix()
-
-            if elemental_array is None:
-                raise ValueError(f"Elemental matrix is not provided!")
-
-            stoichiometric_array = self.get_stoichiometric_matrix()
-
-            if stoichiometric_array is None:
-                raise ValueError(f"Stoichiometric matrix is not provided!")
-
-            if elemental_array.shape[1] == stoichiometric_array.shape[0]:
-                conservation_array = elemental_array @ stoichiometric_array
-            
-            else:
+            violations = self._find_mass_balance_violations(reduce)
 
-                raise ValueError(f"Matrices cannot be multiplied as the number of columns of the elemental matrix, {elemental_array.shape[1]}, is not equal to the number of rows of the stoichiometric matrix, {stoichiometric_array.shape[0]}!")
-            
-            if np.all( ( conservation_array == 0 ) ):
+            if len(violations) == 0:
 
                 if printing:
                     utility.message_printer("\nMass is conserved in the reactions\n", color='green')
@@ -710,15 +1439,9 @@ class BioML(object):
             else:
                 if printing:
                     utility.message_printer("\nConservation of Mass is violated", color='red')
-                
-                    length = conservation_array.shape[1]
-                    for i in  range(0,length):
-                        if np.all(conservation_array[:, i] == 0):
-                            pass
-                        else:
-                            for biomlreaction in self._biomlmodel.reactions:
-                                if biomlreaction.index == i:
-                                    utility.message_printer(f"\nMass is not conserved in reaction {biomlreaction.ID}", color='magenta')
+
+                    for violation in violations:
+                        utility.message_printer(f"\nMass is not conserved in reaction {violation['reaction']}: {violation['imbalance']}", color='magenta')
 
                 return False
 
@@ -768,39 +1491,98 @@ class BioML(object):
     # ********************************
     # *           Function           *
     # ********************************
-    def check_charge_balance(self, printing: bool = False) -> bool:
+    def get_charge_balance_violations(self, printing: bool = False, mode: str = CHARGE_MODE_VECTOR) -> list[dict]:
         """
-            Returns True if charge is conserved in all reactions of the model and False if not conserved. If printing is on, it can display the reaction violating charge conservation if charge balance fails
+            Returns the reactions which do not conserve charge, each with the net charge it produces
 
             Args:
-                printing (bool): if this value is True, a message will be displayed to show the result
+                printing (bool): if this value is True, the violations will be displayed
+                mode (str): "vector" (default) for the product of the species charges and the stoichiometric matrix,
+                            "matrix" for the diagonal of the product of the charge matrix and the stoichiometric matrix; both read the charges of the species
 
             Returns:
-                bool: True if charge is conserved, False otherwise
+                list[dict]: one dictionary per violating reaction containing "reaction" (ID), "index" (column of the stoichiometric matrix)
+                            and "imbalance" ({"charge": net charge}); empty if charge is conserved
                 None: If an exception is raised during the check.
         """
 
-
         try:
+            violations = self._find_charge_balance_violations(mode)
+
+            if printing:
+                for violation in violations:
+                    utility.message_printer(f"\nCharge is not conserved in reaction {violation['reaction']}: {violation['imbalance']}", color='magenta')
 
-            charge_array = self.get_charge_matrix()
+            return violations
 
-            if charge_array is None:
-                raise ValueError(f"Charge matrix is not provided!")
+        except Exception as e:
+            utility.error_handler(e, "get_charge_balance_violations")
+            return None
 
-            stoichiometric_array = self.get_stoichiometric_matrix()
 
-            if stoichiometric_array is None:
-                raise ValueError(f"Stoichiometric matrix is not provided!")
 
-            if charge_array.shape[1] == stoichiometric_array.shape[0]:
-                charge_conservation_array = charge_array @ stoichiometric_array
-            
-            else:
+    def _find_charge_balance_violations(self, mode: str = CHARGE_MODE_VECTOR) -> list[dict]:
 
-                raise ValueError(f"Matrices cannot be multiplied as the number of columns of the elemental matrix, {charge_array.shape[1]}, is not equal to the number of rows of the stoichiometric matrix, {stoichiometric_array.shape[0]}!")
-            
-            if np.all( ( charge_conservation_array == 0 ) ):
+        column_names = self._matrix_constructor.get_stoichiometric_matrix_column_names(self._biomlmodel)
+
+        if mode == CHARGE_MODE_VECTOR:
+
+            charge_vector = self._matrix_constructor.construct_charge_vector(self._biomlmodel)
+
+            stoichiometric_array = self._matrix_constructor.construct_stoichiometric_matrix(self._biomlmodel)
+
+            net_charges = matrix_constructor.MatrixConstructor.integer_product(charge_vector.reshape(1, -1), stoichiometric_array)
+
+            return matrix_constructor.MatrixConstructor.balance_violations(net_charges, ["charge"], column_names)
+
+        if mode != CHARGE_MODE_MATRIX:
+            raise ValueError(f"Charge balance mode must be \"{CHARGE_MODE_VECTOR}\" or \"{CHARGE_MODE_MATRIX}\", not \"{mode}\"")
+
+        charge_array = self._matrix_constructor.construct_charge_matrix(self._biomlmodel)
+
+        stoichiometric_array = self._matrix_constructor.construct_stoichiometric_matrix(self._biomlmodel)
+
+        if charge_array.shape[1] != stoichiometric_array.shape[0]:
+
+            raise ValueError(f"Matrices cannot be multiplied as the number of columns of the charge matrix, {charge_array.shape[1]}, is not equal to the number of rows of the stoichiometric matrix, {stoichiometric_array.shape[0]}!")
+
+        # row j of the charge matrix holds the charges of the species of reaction j, so the net charge of reaction j is the diagonal of charge_array @ S,
+        # which is computed without forming the reactions x reactions product; the off-diagonal entries are not net charges (see check_charge_balance)
+        if sparse.issparse(charge_array) or sparse.issparse(stoichiometric_array):
+            net_charges = np.asarray(sparse.csr_matrix(charge_array, dtype=np.int64).multiply(sparse.csr_matrix(stoichiometric_array, dtype=np.int64).T).sum(axis=1)).reshape(1, -1)
+        else:
+            net_charges = np.einsum("ij,ji->i", charge_array.astype(np.int64), stoichiometric_array.astype(np.int64)).reshape(1, -1)
+
+        return matrix_constructor.MatrixConstructor.balance_violations(net_charges, ["charge"], column_names)
+
+
+
+    # ********************************
+    # *           Function           *
+    # ********************************
+    def check_charge_balance(self, printing: bool = False, mode: str = CHARGE_MODE_VECTOR) -> bool:
+        """
+            Returns True if charge is conserved in all reactions of the model and False if not conserved. If printing is on, it can display the reaction violating charge conservation if charge balance fails
+
+            Args:
+                printing (bool): if this value is True, a message will be displayed to show the result
+                mode (str): "vector" (default) to compute the net charges as z @ S from one charge per species,
+                            "matrix" to compute them as the diagonal of C @ S, where row j of the reactions x species matrix C holds the charges of the species of reaction j.
+                            Both modes read the charges of the species and give the same result. The "matrix" mode checks only the diagonal:
+                            an off-diagonal entry (i, j) adds up the species of reaction i with the stoichiometry of reaction j, so it is nonzero
+                            for balanced reactions which share a charged species, and it is not a net charge
+
+            Returns:
+                bool: True if charge is conserved, False otherwise
+                None: If an exception is raised during the check.
+        """
+
+
+        try:
+
+            violations = self._find_charge_balance_violations(mode)
+
+            if len(violations) == 0:
 
                 if printing:
                     utility.message_printer("\nCharge is conserved in the reactions\n", color='green')
@@ -809,16 +1591,10 @@ class BioML(object):
         
             else:
                 if printing:
-                    utility.message_printer("\nConservation of Mass is violated", color='red')
-                
-                    length = charge_conservation_array.shape[1]
-                    for i in  range(0,length):
-                        if np.all(charge_conservation_array[:, i] == 0):
-                            pass
-                        else:
-                            for biomlreaction in self._biomlmodel.reactions:
-                                if biomlreaction.index == i:
-                                    utility.message_printer(f"\nCharge is not conserved in reaction {biomlreaction.ID}", color='magenta')
+                    utility.message_printer("\nConservation of Charge is violated", color='red')
+
+                    for violation in violations:
+                        utility.message_printer(f"\nCharge is not conserved in reaction {violation['reaction']}: {violation['imbalance']}", color='magenta')
 
                 return False
 
@@ -844,7 +1620,7 @@ class BioML(object):
 
         Returns:
            bool: True if model is consistent with thermodynamic rules, False otherwise
-           None: If an exception is raised during the check.
+           None: If an exception is raised during the check, or if the "Mass Action" check is undetermined (see set_symbolic_time_budget).
         """
 
         passed = True
@@ -928,7 +1704,17 @@ class BioML(object):
 
                 else:
 
-                    if not self.check_mass_action_kinetics():
+                    is_mass_action = self.check_mass_action_kinetics()
+
+                    if is_mass_action is None and self._undetermined_reactions():
+
+                        if printing:
+
+                            utility.printer("\nThermodynamic Compatibility Check: ",f"The \"Mass Action\" check of model {self._file_name} is undetermined, the symbolic operations on\n{' ' * 37}reaction(s) {', '.join(self._undetermined_reactions())} ran out of their time budget\n", text_color="yellow")
+
+                        return None
+
+                    if not is_mass_action:
 
                         passed = False
 
@@ -974,7 +1760,7 @@ class BioML(object):
 
             self.read_file(folder_path, file_name)
 
-            mass_action: bool = None
+            mass_action = None     # True, False or "undetermined"
 
             reversible: bool = None
 
@@ -985,7 +1771,15 @@ class BioML(object):
             try:
 
 
-                if self.check_mass_action_kinetics(raise_error=True):
+                is_mass_action = self.check_mass_action_kinetics(raise_error=True)
+
+                if is_mass_action is None and self._undetermined_reactions():
+
+                    mass_action = MASS_ACTION_TIER_UNDETERMINED
+
+                    error = f"The symbolic operations on reaction(s) {', '.join(self._undetermined_reactions())} ran out of their time budget"
+
+                elif is_mass_action:
 
                     mass_action = True
 
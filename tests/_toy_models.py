@@ -0,0 +1,69 @@
+import libsbml
+
+
+FORMULAS = {"A": ("C2H4O2", 0), "B": ("H2O", 0), "C": ("C2H6O3", 0), "D": ("C2H6O3", 0), "E": ("CO2", 0), "F": ("CO2", 0)}
+
+
+def write_toy_model(path, consistent=True, extra_component=False):
+    """
+        Writes a small reversible mass-action SBML model with fbc formulas:
+        A + B <-> C, C <-> D, D <-> A + B and, optionally, an independent E <-> F.
+        The rate constants satisfy the Wegscheider condition of the cycle only if consistent is True.
+    """
+
+    document = libsbml.SBMLDocument(libsbml.SBMLNamespaces(3, 1, "fbc", 2))
+    document.setPackageRequired("fbc", False)
+
+    model = document.createModel()
+    model.setId("toy")
+    model.getPlugin("fbc").setStrict(False)
+
+    compartment = model.createCompartment()
+    compartment.setId("cell")
+    compartment.setConstant(True)
+    compartment.setSize(1)
+
+    for species_id in ["A", "B", "C", "D"] + (["E", "F"] if extra_component else []):
+        species = model.createSpecies()
+        species.setId(species_id)
+        species.setCompartment("cell")
+        species.setInitialConcentration(1.0)
+        species.setHasOnlySubstanceUnits(False)
+        species.setBoundaryCondition(False)
+        species.setConstant(False)
+        species.getPlugin("fbc").setChemicalFormula(FORMULAS[species_id][0])
+        species.getPlugin("fbc").setCharge(FORMULAS[species_id][1])
+
+    constants = {"k1": 2.0, "k2": 1.0, "k3": 3.0, "k4": 1.5, "k5": 1.0, "k6": 4.0 if consistent else 5.0, "k7": 1.0, "k8": 2.0}
+
+    for name, value in constants.items():
+        parameter = model.createParameter()
+        parameter.setId(name)
+        parameter.setValue(value)
+        parameter.setConstant(True)
+
+    reactions = [("R1", {"A": 1, "B": 1}, {"C": 1}, "k1*A*B - k2*C"),
+                 ("R2", {"C": 1}, {"D": 1}, "k3*C - k4*D"),
+                 ("R3", {"D": 1}, {"A": 1, "B": 1}, "k5*D - k6*A*B")]
+
+    if extra_component:
+        reactions.append(("R4", {"E": 1}, {"F": 1}, "k7*E - k8*F"))
+
+    for reaction_id, reactants, products, kinetic_law in reactions:
+        reaction = model.createReaction()
+        reaction.setId(reaction_id)
+        reaction.setReversible(True)
+        reaction.setFast(False)
+        for species_id, stoichiometry in reactants.items():
+            reference = reaction.createReactant()
+            reference.setSpecies(species_id)
+            reference.setStoichiometry(stoichiometry)
+            reference.setConstant(True)
+        for species_id, stoichiometry in products.items():
+            reference = reaction.createProduct()
+            reference.setSpecies(species_id)
+            reference.setStoichiometry(stoichiometry)
+            reference.setConstant(True)
+        reaction.createKineticLaw().setMath(libsbml.parseL3Formula(kinetic_law))
+
+    libsbml.writeSBMLToFile(document, str(path))
@@ -0,0 +1,109 @@
+import math
+
+import pytest
+import sympy as sp
+
+from bioml import BioML
+from tests._toy_models import write_toy_model
+from _modules._kinetic_orders import kinetic_orders
+
+
+def test_balance_violations_list_the_imbalance_per_element(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml")
+
+    bioml_model = BioML()
+    bioml_model.read_file(str(tmp_path), "toy.xml")
+
+    assert bioml_model.get_mass_balance_violations() == []
+    assert bioml_model.get_charge_balance_violations() == []
+
+    species = {single_species.ID: single_species for single_species in bioml_model.get_list_of_species()}
+
+    # C gains an oxygen and a charge, so R1 produces them and R2 consumes them
+    species["C"].composition = {"C": 2, "H": 6, "O": 4}
+    species["C"].charge = 1
+
+    # both charge modes read the charges of the species, not those of the species references
+    for reaction in bioml_model.get_list_of_reactions():
+        for species_reference in reaction.get_list_of_reactants() + reaction.get_list_of_products():
+            if species_reference.ID == "D":
+                species_reference.charge = 3
+
+    for reduce in (False, True):
+        violations = bioml_model.get_mass_balance_violations(reduce=reduce)
+
+        assert [(violation["reaction"], violation["imbalance"]) for violation in violations] == [("R1", {"O": 1}), ("R2", {"O": -1})]
+
+    assert bioml_model.check_mass_balance() is False
+
+    for mode in ("vector", "matrix"):
+        charge_violations = bioml_model.get_charge_balance_violations(mode=mode)
+
+        assert [(violation["reaction"], violation["imbalance"]) for violation in charge_violations] == [("R1", {"charge": 1}), ("R2", {"charge": -1})]
+
+
+def test_element_rows_are_shared_between_models(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml")
+
+    first_model = BioML()
+    first_model.read_file(str(tmp_path), "toy.xml")
+    first_elemental = first_model.get_elemental_matrix()
+
+    second_model = BioML()
+    second_model.read_file(str(tmp_path), "toy.xml")
+
+    species = second_model.get_list_of_species()[0]
+    species.composition = {"C": 2, "H": 4, "O": 2, "Xx": 1}
+
+    second_elemental = second_model.get_elemental_matrix()
+    row_names = second_model._matrix_constructor.get_elemental_matrix_row_names(second_model._biomlmodel)
+
+    assert second_elemental.shape[0] == first_elemental.shape[0] + 1
+    assert row_names[-1] == "Xx"
+    assert (second_elemental[:-1] == first_elemental).all()
+
+    element_indices, counts = species.get_composition_vector()
+    assert {row_names[index]: count for index, count in zip(element_indices, counts)} == {"C": 2, "H": 4, "O": 2, "Xx": 1}
+
+    # a model read afterwards has a zero row for the element it does not use, which does not change its balance
+    third_model = BioML()
+    third_model.read_file(str(tmp_path), "toy.xml")
+
+    third_elemental = third_model.get_elemental_matrix()
+
+    assert third_elemental.shape[0] == second_elemental.shape[0]
+    assert not third_elemental[-1].any()
+    assert third_model.get_mass_balance_violations() == []
+
+    unknown_species = third_model.get_list_of_species()[1]
+    unknown_species._composition, unknown_species._composition_vector = None, None
+    third_model._biomlmodel._touch()
+
+    with pytest.raises(ValueError, match="Chemical composition is not known"):
+        third_model._matrix_constructor.construct_elemental_matrix(third_model._biomlmodel)
+
+
+def test_kinetic_orders_are_compared_with_the_stoichiometry(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml")
+
+    bioml_model = BioML()
+    bioml_model.read_file(str(tmp_path), "toy.xml")
+
+    reactions = {reaction.ID: reaction for reaction in bioml_model.get_list_of_reactions()}
+
+    assert reactions["R1"].forward_kinetic_orders == {"A": 1.0, "B": 1.0}
+    assert reactions["R1"].reverse_kinetic_orders == {"C": 1.0}
+    assert bioml_model.check_kinetic_orders() is True
+
+    # a saturating law has no kinetic order for its substrate
+    reactions["R2"].forward_kinetic_orders = kinetic_orders(sp.sympify("k3*C/(Km + C)"), ["C", "D"])
+
+    assert math.isnan(reactions["R2"].forward_kinetic_orders["C"])
+    assert bioml_model.check_kinetic_orders() is False
+
+    bioml_model.set_matrix_backend("sparse")
+
+    assert list(bioml_model._matrix_constructor.find_kinetic_order_mismatches(bioml_model._biomlmodel)) == [reactions["R2"].index]
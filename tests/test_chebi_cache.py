@@ -0,0 +1,188 @@
+import time
+
+from _modules._chebi_cache import ChebiCache
+from _modules._chebi_resolver import ChebiResolver
+
+
+def test_cache_round_trip(tmp_path):
+
+    cache = ChebiCache(str(tmp_path))
+    cache.put("CHEBI:15377", "H2O", 0, {"H": 2.0, "O": 1.0}, ["H2O"])
+
+    entry = cache.get("15377")
+
+    assert entry["formula"] == "H2O"
+    assert entry["charge"] == 0
+    assert entry["composition"] == {"H": 2.0, "O": 1.0}
+    assert len(cache) == 1
+
+
+def test_cache_ttl_and_lru_eviction(tmp_path):
+
+    cache = ChebiCache(str(tmp_path / "ttl"), ttl=0.0)
+    cache.put("1", "H2O", 0, {"H": 2.0, "O": 1.0})
+    time.sleep(0.01)
+    assert cache.get("1") is None
+
+    cache = ChebiCache(str(tmp_path / "lru"), max_entries=2)
+    cache.put("1", "H2O", 0, {"H": 2.0, "O": 1.0})
+    cache.put("2", "CO2", 0, {"C": 1.0, "O": 2.0})
+    time.sleep(0.01)
+    cache.get("1")
+    cache.put("3", "H", 1, {"H": 1.0})
+
+    assert "1" in cache
+    assert "2" not in cache
+    assert "3" in cache
+
+
+def test_resolver_fetches_each_code_once(tmp_path, monkeypatch):
+
+    calls = []
+
+    def fake_fetch(chebi_code):
+        calls.append(chebi_code)
+        return {"formula": "H2O", "charge": 0, "composition": {"H": 2.0, "O": 1.0}, "formulae": ["H2O"]}
+
+    monkeypatch.setattr(ChebiResolver, "_fetch", staticmethod(fake_fetch))
+
+    resolver = ChebiResolver(ChebiCache(str(tmp_path)))
+
+    assert resolver.parse("15377") == ("H2O", 0, {"H": 2.0, "O": 1.0})
+    assert resolver.parse("15377") == ("H2O", 0, {"H": 2.0, "O": 1.0})
+    assert calls == ["15377"]
+
+
+def test_resolve_many_deduplicates_and_times_out(tmp_path, monkeypatch):
+
+    calls = []
+
+    def fake_fetch(chebi_code):
+        calls.append(chebi_code)
+        if chebi_code == "3":
+            time.sleep(1.0)
+        return {"formula": "H2O", "charge": 0, "composition": {"H": 2.0, "O": 1.0}, "formulae": ["H2O"]}
+
+    monkeypatch.setattr(ChebiResolver, "_fetch", staticmethod(fake_fetch))
+
+    resolver = ChebiResolver(ChebiCache(str(tmp_path)))
+
+    entries = resolver.resolve_many(["CHEBI:1", "1", "2", "3", "2"], max_workers=2, timeout=0.1)
+
+    assert sorted(calls) == ["1", "2", "3"]
+    assert entries["2"]["composition"] == {"H": 2.0, "O": 1.0}
+    assert entries["3"]["formula"] is None
+
+    resolver.parse("1")
+    assert len(calls) == 3
+
+
+def test_species_composition_is_resolved_on_first_access_only_once(monkeypatch):
+
+    from _classes.cBioMLModel import BioMLModel
+    from _classes.cBioMLReaction import BioMLReaction
+    from _classes.cBioMLSpecies import BioMLSpecies
+    from _classes.cBioMLSpeciesReference import BioMLSpeciesReference
+    from _modules._matrix_constructor import MatrixConstructor
+    import _modules._chebi_resolver as chebi_resolver
+
+    calls = []
+
+    def fake_fetch(chebi_code):
+        calls.append(chebi_code)
+        return {"formula": "H2O", "charge": 0, "composition": {"H": 2.0, "O": 1.0}, "formulae": ["H2O"]}
+
+    monkeypatch.setattr(ChebiResolver, "_fetch", staticmethod(fake_fetch))
+    monkeypatch.setattr(chebi_resolver, "_default_resolver", ChebiResolver(use_cache=False))
+
+    species = BioMLSpecies("h2o")
+    species.defer_chebi_resolution(["15377"])
+
+    species_reference = BioMLSpeciesReference(species)
+
+    reaction = BioMLReaction("R1")
+    reaction.reactants = [species_reference]
+
+    model = BioMLModel("model")
+    model.species = [species]
+    model.reactions = [reaction]
+
+    # naming the matrix rows does not go to ChEBI
+    row_names = MatrixConstructor().get_stoichiometric_matrix_row_names(model)
+
+    assert calls == []
+
+    # the first access resolves the codes, once for the reference and its species, and a charge of 0 is applied as well
+    assert species_reference.composition == {"H": 2.0, "O": 1.0}
+    assert species.compound == species_reference.compound == "H2O"
+    assert species.charge_source == species_reference.charge_source == "chebi"
+    assert calls == ["15377"]
+
+    model.resolve_species_compositions()
+
+    assert calls == ["15377"]
+
+    # the names do not depend on whether the codes were resolved before
+    assert MatrixConstructor().get_stoichiometric_matrix_row_names(model) == row_names == {species.index: "h2o"}
+
+def test_failed_and_timed_out_codes_are_fetched_again(tmp_path, monkeypatch):
+
+    calls = []
+
+    def fake_fetch(chebi_code):
+        calls.append(chebi_code)
+        if chebi_code == "1" and calls.count("1") == 1:
+            raise ConnectionError("ChEBI is not reachable")
+        if chebi_code == "2" and calls.count("2") == 1:
+            time.sleep(0.5)
+        return {"formula": "H2O", "charge": 0, "composition": {"H": 2.0, "O": 1.0}, "formulae": ["H2O"]}
+
+    monkeypatch.setattr(ChebiResolver, "_fetch", staticmethod(fake_fetch))
+
+    resolver = ChebiResolver(ChebiCache(str(tmp_path)))
+
+    entries = resolver.resolve_many(["1", "2"], max_workers=1, timeout=0.1)
+
+    assert entries["1"]["formula"] is None and entries["2"]["formula"] is None
+
+    # the timed-out fetch is a daemon thread which holds its worker slot until it ends
+    assert all(thread.daemon for thread in resolver._abandoned)
+
+    entries = resolver.resolve_many(["1", "2"], max_workers=1, timeout=1.0)
+
+    assert entries["1"]["formula"] == "H2O" and entries["2"]["formula"] == "H2O"
+    assert sorted(calls) == ["1", "1", "2", "2"]
+
+
+def test_concurrent_stages_share_the_abandoned_fetches(monkeypatch):
+
+    import threading
+
+    def fake_fetch(chebi_code):
+        time.sleep(0.3)
+        return {"formula": "H2O", "charge": 0, "composition": {"H": 2.0, "O": 1.0}, "formulae": ["H2O"]}
+
+    monkeypatch.setattr(ChebiResolver, "_fetch", staticmethod(fake_fetch))
+
+    resolver = ChebiResolver(use_cache=False)
+
+    results, errors = [], []
+
+    def stage(number):
+        try:
+            results.append(resolver.resolve_many([str(number)], max_workers=1, timeout=0.05))
+        except Exception as e:
+            errors.append(e)
+
+    # the stages give up on their fetches and find the only slot held by the fetches of the others
+    threads = [threading.Thread(target=stage, args=(number,)) for number in range(8)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(results) == 8 and all(entry["formula"] is None for entries in results for entry in entries.values())
+
@@ -0,0 +1,36 @@
+from _modules._chebi_index import ChebiIndex
+from _modules._chebi_resolver import ChebiResolver
+from _modules._constants import CHEBI_RESOLVER_OFFLINE
+
+
+def test_index_build_and_offline_lookup(tmp_path):
+
+    chemical_data = tmp_path / "chemical_data.tsv"
+    chemical_data.write_text(
+        "ID\tCOMPOUND_ID\tSOURCE\tTYPE\tCHEMICAL_DATA\n"
+        "1\t15377\tChEBI\tFORMULA\tH2O\n"
+        "2\t15377\tChEBI\tCHARGE\t0\n"
+        "3\t29101\tChEBI\tFORMULA\tNa\n"
+        "4\t29101\tChEBI\tCHARGE\t1\n"
+        "5\t17544\tChEBI\tFORMULA\tCHO3\n"
+        "6\t17544\tChEBI\tCHARGE\t1-\n"
+    )
+
+    compounds = tmp_path / "compounds.tsv"
+    compounds.write_text("ID\tSTATUS\tPARENT_ID\n42857\tE\t15377\n")
+
+    index = ChebiIndex.build(str(chemical_data), str(compounds), str(tmp_path / "index"))
+
+    assert len(index) == 4
+    assert index.lookup("CHEBI:17544")["charge"] == -1
+    assert index.lookup("42857")["composition"] == {"H": 2.0, "O": 1.0}
+    assert index.lookup("99999") is None
+
+    resolver = ChebiResolver(mode=CHEBI_RESOLVER_OFFLINE, index=ChebiIndex(str(tmp_path / "index")))
+
+    assert resolver.parse("29101") == ("Na", 1, {"Na": 1.0})
+    assert resolver.parse("99999") == (None, None, None)
+
+    # an offline resolver never opens the ChEBI cache
+    assert resolver.resolve_many(["CHEBI:29101", "99999"])["29101"]["charge"] == 1
+    assert resolver._cache is None
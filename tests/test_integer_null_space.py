@@ -0,0 +1,33 @@
+import numpy as np
+from scipy import sparse
+
+from _modules._integer_null_space import integer_null_space, topology_hash, NullSpaceCache
+
+
+def test_integer_null_space_is_an_exact_basis():
+
+    rng = np.random.default_rng(3)
+    stoichiometric = rng.integers(-3, 4, size=(7, 11)) * (rng.random((7, 11)) < 0.5)
+
+    basis = integer_null_space(stoichiometric)
+
+    assert basis.dtype == np.int64
+    assert basis.shape[1] == 11 - np.linalg.matrix_rank(stoichiometric)
+    assert not np.any(stoichiometric @ basis)
+    assert np.linalg.matrix_rank(basis.astype(float)) == basis.shape[1]
+
+
+def test_null_space_cache_is_keyed_by_topology(tmp_path):
+
+    stoichiometric = np.array([[-1, 0, 1], [-1, 0, 1], [1, -1, 0], [0, 1, -1]], dtype=np.int8)
+
+    key = topology_hash(stoichiometric)
+
+    assert key == topology_hash(sparse.csr_matrix(stoichiometric.astype(np.int64)))
+    assert key != topology_hash(2 * stoichiometric)
+
+    NullSpaceCache(str(tmp_path)).put(key, integer_null_space(stoichiometric))
+
+    reloaded = NullSpaceCache(str(tmp_path)).get(key)
+
+    assert reloaded.T.tolist() == [[1, 1, 1]]
@@ -0,0 +1,289 @@
+import libsbml
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from bioml import BioML
+from _classes.cBioMLSpeciesReference import BioMLSpeciesReference
+from tests._toy_models import write_toy_model
+
+
+def test_sparse_backend_matches_dense(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml")
+
+    dense_model = BioML(matrix_backend="dense")
+    dense_model.read_file(str(tmp_path), "toy.xml")
+    dense_stoichiometric = dense_model.get_stoichiometric_matrix()
+
+    sparse_model = BioML(matrix_backend="sparse")
+    sparse_model.read_file(str(tmp_path), "toy.xml")
+    sparse_stoichiometric = sparse_model.get_stoichiometric_matrix()
+
+    assert dense_stoichiometric.dtype == np.int8
+    assert sparse.issparse(sparse_stoichiometric)
+    assert np.array_equal(sparse_stoichiometric.toarray(), dense_stoichiometric)
+
+    for bioml_model in (dense_model, sparse_model):
+        assert bioml_model.check_mass_balance() is True
+        assert bioml_model.check_charge_balance() is True
+        assert bioml_model.check_kinetic_constants_thermo_compatibility() is True
+
+
+def test_matrices_are_cached_until_the_model_changes(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml")
+
+    bioml_model = BioML(matrix_backend="dense")
+    bioml_model.read_file(str(tmp_path), "toy.xml")
+
+    stoichiometric = bioml_model.get_stoichiometric_matrix()
+
+    assert bioml_model.get_stoichiometric_matrix() is stoichiometric
+    assert bioml_model.get_forward_stoichiometric_matrix() is bioml_model.get_forward_stoichiometric_matrix()
+
+    reaction = bioml_model.get_list_of_reactions()[0]
+    reaction.get_list_of_reactants()[0].stoichiometry = 2
+
+    changed = bioml_model.get_stoichiometric_matrix()
+
+    assert changed is not stoichiometric
+    assert changed[0, 0] == -2
+
+    reaction.products.append(BioMLSpeciesReference(bioml_model.get_list_of_species()[3]))
+    reaction.products[-1].stoichiometry = 1
+
+    assert bioml_model.get_stoichiometric_matrix()[3, 0] == 1
+
+
+def test_least_squares_residual_matches_null_space_projection():
+
+    from scipy.linalg import null_space
+    from _modules._matrix_constructor import MatrixConstructor
+
+    rng = np.random.default_rng(0)
+    stoichiometric = rng.integers(-2, 3, size=(6, 9))
+    logn_constants = rng.normal(size=9)
+
+    projection = null_space(-stoichiometric).T @ logn_constants
+
+    for engine in ("lsqr", "lsmr"):
+        residual = MatrixConstructor.row_space_residual(sparse.csr_matrix(stoichiometric), logn_constants, engine)
+        assert np.isclose(np.linalg.norm(residual), np.linalg.norm(projection), atol=1e-8)
+
+    compatible = stoichiometric.T @ rng.normal(size=6)
+    assert np.max(np.abs(MatrixConstructor.row_space_residual(stoichiometric, compatible))) < 1e-8
+
+
+def test_thermodynamic_basis_of_a_small_integer_matrix_does_not_wrap_around():
+
+    from scipy.linalg import null_space
+    from _modules._matrix_constructor import MatrixConstructor
+
+    # -(-128) does not fit into int8
+    stoichiometric = np.array([[-128, 0, 1], [1, -1, 0], [0, 1, -1]], dtype=np.int8)
+
+    expected = null_space(-stoichiometric.astype(np.float64))
+
+    for matrix in (stoichiometric, sparse.csr_matrix(stoichiometric)):
+        basis = MatrixConstructor.thermodynamic_basis(matrix, "null_space")
+
+        assert basis.shape == expected.shape
+        assert np.allclose(np.abs(basis.T @ expected), 1.0)
+
+    # a stoichiometry of -128 is stored with room for its negation
+    assert MatrixConstructor._smallest_int_dtype([-128, 1]) == np.int16
+    assert MatrixConstructor._smallest_int_dtype([-127, 127]) == np.int8
+
+
+def test_thermodynamic_engines_agree_near_the_tolerance(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml")
+
+    document = libsbml.readSBMLFromFile(str(tmp_path / "toy.xml"))
+
+    # the cycle R1..R3 has length sqrt(3): a shift of 0.025 in ln(k6) projects to 0.0144, above the tolerance of 1e-2,
+    # while each entry of the residual is only 0.0083; a shift of 0.015 projects to 0.0087, below the tolerance
+    for shift, expected in ((0.025, False), (-0.025, False), (0.015, True), (-0.015, True)):
+        document.getModel().getParameter("k6").setValue(4 * np.exp(shift))
+        libsbml.writeSBMLToFile(document, str(tmp_path / "toy_shifted.xml"))
+
+        bioml_model = BioML()
+        bioml_model.read_file(str(tmp_path), "toy_shifted.xml")
+
+        for engine in ("null_space", "exact", "lsqr", "lsmr"):
+            assert bioml_model.check_kinetic_constants_thermo_compatibility(engine=engine) is expected, (shift, engine)
+            assert bioml_model.check_kinetic_constants_thermo_compatibility(engine=engine, by_component=True) is expected, (shift, engine)
+
+
+def test_thermodynamic_check_by_component_reports_the_failing_sub_network(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml", consistent=False, extra_component=True)
+
+    bioml_model = BioML()
+    bioml_model.read_file(str(tmp_path), "toy.xml")
+
+    assert bioml_model.check_kinetic_constants_thermo_compatibility(raise_error=True) is False
+
+    for engine in ("null_space", "exact", "lsqr"):
+        assert bioml_model.check_kinetic_constants_thermo_compatibility(engine=engine, by_component=True, parallel=True) is False
+
+        report = bioml_model.get_thermodynamic_component_report()
+
+        assert len(report) == 2
+        assert report["compatible"].tolist() == [False, True]
+        assert sorted(report["reactions"][0]) == ["R1", "R2", "R3"]
+        assert report["species"][1] == ["E", "F"]
+
+
+def test_thermodynamic_sweep_matches_single_checks(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml")
+
+    bioml_model = BioML()
+    bioml_model.read_file(str(tmp_path), "toy.xml")
+
+    # R1..R3 form a cycle, compatible if (k1/k2)(k3/k4)(k5/k6) = 1
+    forward = np.array([[2.0, 3.0, 1.0], [2.0, 3.0, 1.0], [1.0, 1.0, 1.0], [2.0, -3.0, 1.0]])
+    reverse = np.array([[1.0, 1.5, 4.0], [1.0, 1.5, 5.0], [1.0, 1.0, 1.0], [1.0, 1.5, 4.0]])
+
+    for engine in ("null_space", "exact"):
+        compatible, residual_norms = bioml_model.check_kinetic_constants_thermo_compatibility_sweep(forward, reverse, engine=engine)
+
+        assert compatible.tolist() == [True, False, True, False]
+        assert np.isclose(residual_norms[1], np.log(5 / 4) / np.sqrt(3))
+        assert np.isnan(residual_norms[3])
+
+    table = {}
+    for column, reaction_id in enumerate(["R1", "R2", "R3"]):
+        table["k_forward_" + reaction_id] = forward[:, column]
+        table["k_reverse_" + reaction_id] = reverse[:, column]
+
+    pd.DataFrame(table).to_csv(tmp_path / "sweep.csv", index=False)
+    pd.DataFrame(table).to_parquet(tmp_path / "sweep.parquet", index=False)
+
+    for file_name in ("sweep.csv", "sweep.parquet"):
+        compatible, residual_norms = bioml_model.check_kinetic_constants_thermo_compatibility_sweep(file_path=str(tmp_path / file_name))
+
+        assert compatible.tolist() == [True, False, True, False]
+        assert np.isclose(residual_norms[1], np.log(5 / 4) / np.sqrt(3))
+
+
+def test_parallel_sweep_matches_serial_sweep():
+
+    from _modules._parallel_sweep import iterate_thermo_sweep
+
+    rng = np.random.default_rng(0)
+
+    basis = np.linalg.qr(rng.normal(size=(30, 4)))[0]
+    logn_ratios = rng.normal(size=(1000, 30)) * 5e-3
+
+    deviation = logn_ratios @ basis
+
+    chunks = list(iterate_thermo_sweep(basis, logn_ratios, max_workers=2, chunk_size=128))
+
+    assert [chunk.start for chunk, _, _ in chunks] == list(range(0, 1000, 128))
+    assert np.array_equal(np.concatenate([compatible for _, compatible, _ in chunks]), np.linalg.norm(deviation, axis=1) <= 1e-2)
+    assert np.allclose(np.concatenate([residual_norms for _, _, residual_norms in chunks]), np.linalg.norm(deviation, axis=1))
+
+
+def test_flux_evaluator_matches_the_mass_action_rate_laws(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml")
+
+    concentrations = np.array([[1.0, 2.0, 3.0, 4.0], [0.0, 1.0, 2.0, 0.5]])
+
+    # A B C D with k1..k6 = 2, 1, 3, 1.5, 1, 4: R1 = k1*A*B - k2*C, R2 = k3*C - k4*D, R3 = k5*D - k6*A*B
+    expected = np.array([[1.0, 3.0, -4.0], [-2.0, 5.25, 0.5]])
+
+    for backend in ("dense", "sparse"):
+        bioml_model = BioML(matrix_backend=backend)
+        bioml_model.read_file(str(tmp_path), "toy.xml")
+
+        assert np.allclose(bioml_model.evaluate_fluxes(concentrations), expected)
+        assert np.allclose(bioml_model.evaluate_fluxes(concentrations[0]), expected[0])
+
+    # a common factor of the rate law, here the compartment of size 2, is folded into both rate constants
+    document = libsbml.readSBMLFromFile(str(tmp_path / "toy.xml"))
+    document.getModel().getCompartment("cell").setSize(2)
+
+    for reaction in document.getModel().getListOfReactions():
+        kinetic_law = reaction.getKineticLaw()
+        kinetic_law.setMath(libsbml.parseL3Formula(f"cell*({libsbml.formulaToL3String(kinetic_law.getMath())})"))
+
+    libsbml.writeSBMLToFile(document, str(tmp_path / "toy_cell.xml"))
+
+    bioml_model = BioML()
+    bioml_model.read_file(str(tmp_path), "toy_cell.xml")
+
+    assert np.allclose(bioml_model.evaluate_fluxes(concentrations), 2 * expected)
+
+
+def test_process_pool_sweep_matches_the_vectorized_sweep(tmp_path):
+
+    from _modules._parallel_sweep import parallel_thermo_sweep
+
+    write_toy_model(tmp_path / "toy.xml")
+
+    bioml_model = BioML()
+    bioml_model.read_file(str(tmp_path), "toy.xml")
+
+    rng = np.random.default_rng(1)
+
+    forward = rng.uniform(0.5, 2.0, size=(23, 3))
+    reverse = rng.uniform(0.5, 2.0, size=(23, 3))
+
+    # every other candidate closes the cycle R1..R3, and one has a rate constant which is not positive
+    reverse[:, 2] = forward[:, 0] * forward[:, 1] * forward[:, 2] / (reverse[:, 0] * reverse[:, 1])
+    reverse[1::2, 2] *= 3.0
+    forward[5, 1] = 0.0
+
+    serial = bioml_model.check_kinetic_constants_thermo_compatibility_sweep(forward, reverse)
+    parallel = bioml_model.check_kinetic_constants_thermo_compatibility_sweep(forward, reverse, parallel=True, max_workers=2)
+
+    assert serial[0].tolist() == [index % 2 == 0 for index in range(23)]
+    assert np.array_equal(parallel[0], serial[0])
+    assert np.allclose(parallel[1], serial[1], equal_nan=True)
+
+    basis = bioml_model._matrix_constructor.construct_thermodynamic_basis(bioml_model._biomlmodel, "null_space")
+    logn_ratios = np.log(forward[:5] / reverse[:5])
+
+    # chunk sizes which do not divide the number of candidates, and more workers than chunks
+    for chunk_size in (1, 3, 7):
+        compatible, residual_norms = parallel_thermo_sweep(basis, logn_ratios, max_workers=3, chunk_size=chunk_size)
+
+        assert np.array_equal(compatible, serial[0][:5])
+        assert np.allclose(residual_norms, serial[1][:5])
+
+    compatible, residual_norms = parallel_thermo_sweep(basis, np.empty((0, 3)), max_workers=2)
+
+    assert compatible.shape == residual_norms.shape == (0,)
+
+    for parallel_sweep in (False, True):
+        compatible, residual_norms = bioml_model.check_kinetic_constants_thermo_compatibility_sweep(np.empty((0, 3)), np.empty((0, 3)), parallel=parallel_sweep)
+
+        assert len(compatible) == len(residual_norms) == 0
+
+
+def test_flux_evaluator_matches_hand_computed_fluxes():
+
+    from _modules._flux_evaluator import FluxEvaluator
+
+    # 2A + B <-> C with k = 3, 0.5 and C <-> A with k = 2, 0 (irreversible), species A B C
+    forward = np.array([[2, 0], [1, 0], [0, 1]])
+    reverse = np.array([[0, 1], [0, 0], [1, 0]])
+
+    concentrations = np.array([[2.0, 0.5, 4.0], [0.0, 1.0, 3.0]])
+
+    # 3*2^2*0.5 - 0.5*4 = 4, 2*4 - 0*2 = 8 and 3*0^2*1 - 0.5*3 = -1.5, 2*3 - 0*0 = 6
+    expected_forward = np.array([[6.0, 8.0], [0.0, 6.0]])
+    expected_reverse = np.array([[2.0, 0.0], [1.5, 0.0]])
+
+    for to_matrix in (np.asarray, sparse.csr_matrix):
+        flux_evaluator = FluxEvaluator(to_matrix(forward), to_matrix(reverse), [3.0, 2.0], [0.5, 0.0])
+
+        forward_rates, reverse_rates = flux_evaluator.evaluate_directions(concentrations)
+
+        assert np.allclose(forward_rates, expected_forward)
+        assert np.allclose(reverse_rates, expected_reverse)
+        assert np.allclose(flux_evaluator.evaluate(concentrations), expected_forward - expected_reverse)
@@ -0,0 +1,292 @@
+import os
+import time
+
+import libcellml
+import libsbml
+import pytest
+import sympy as sp
+
+from bioml import BioML
+from _modules._constants import MASS_ACTION_TIER_STRUCTURAL, MASS_ACTION_TIER_CANCELLED, MASS_ACTION_TIER_SIMPLIFIED, MASS_ACTION_TIER_AST
+from _modules._constants import MASS_ACTION_TIER_UNDETERMINED
+from _modules._exceptions import SymbolicTimeout
+from _modules._symbolic_budget import SymbolicBudget
+from _modules._cellml_reader import CellmlReader
+from tests._toy_models import write_toy_model
+
+
+def test_mass_action_classifier_records_the_deciding_tier(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml")
+
+    bioml_model = BioML()
+    bioml_model.read_file(str(tmp_path), "toy.xml")
+
+    reaction = bioml_model.get_list_of_reactions()[0]
+
+    cases = [("cell*(k1*A*B - k2*C)", True, MASS_ACTION_TIER_STRUCTURAL),
+             ("k1*A^2", True, MASS_ACTION_TIER_STRUCTURAL),
+             ("(k1*A*B*C - k2*C^2)/C", True, MASS_ACTION_TIER_CANCELLED),
+             ("k1*A/(k2 + A)", False, MASS_ACTION_TIER_CANCELLED),
+             ("k1*exp(A)", None, MASS_ACTION_TIER_SIMPLIFIED)]
+
+    for kinetic_law, expected, tier in cases:
+
+        reaction.expanded_kinetic_law = kinetic_law
+        reaction.klaw_variables = bioml_model._model_checker._get_variables(kinetic_law)
+
+        status, decided_by = bioml_model._model_checker._classify_kinetic_law(bioml_model._biomlmodel, reaction)
+
+        assert decided_by == tier, kinetic_law
+
+        if expected is not None:
+            assert status is expected, kinetic_law
+
+
+
+def test_mass_action_tiers_agree_with_the_string_heuristics(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml")
+
+    bioml_model = BioML()
+    bioml_model.read_file(str(tmp_path), "toy.xml")
+
+    model_checker = bioml_model._model_checker
+
+    reaction = bioml_model.get_list_of_reactions()[0]
+
+    reactant_a, reactant_b = reaction.get_list_of_reactants()
+    product_c, = reaction.get_list_of_products()
+
+    # A + B -> C, A -> (a single species) and -> C (no reactants)
+    stoichiometries = [([reactant_a, reactant_b], [product_c]), ([reactant_a], []), ([], [product_c])]
+
+    kinetic_laws = ["cell*(k1*A*B - k2*C)", "k1*A*B - k2*C", "k1*A^2", "k1*A*B", "(k1*A*B*C - k2*C^2)/C",
+                    "k1*A/(k2 + A)", "k1*A - k2*A", "k1*A", "k1"]
+
+    for reactants, products in stoichiometries:
+
+        reaction.reactants = reactants
+        reaction.products = products
+
+        for kinetic_law in kinetic_laws:
+
+            reaction.expanded_kinetic_law = kinetic_law
+            reaction.klaw_variables = model_checker._get_variables(kinetic_law)
+
+            status, _ = model_checker._classify_kinetic_law(bioml_model._biomlmodel, reaction)
+
+            legacy_status = model_checker._check_kinetic_law(**model_checker._make_checking_args(bioml_model._biomlmodel, reaction))
+
+            assert status == legacy_status, (kinetic_law, [species.get_id() for species in reactants + products])
+
+    reaction.reactants = [reactant_a]
+    reaction.products = []
+    reaction.expanded_kinetic_law = "k1*A - k2*A"
+    reaction.klaw_variables = ["k1", "A", "k2"]
+
+    # the single species of the reaction is written twice
+    assert model_checker._classify_kinetic_law(bioml_model._biomlmodel, reaction) == (False, MASS_ACTION_TIER_STRUCTURAL)
+
+
+def test_ast_engine_classifies_without_sympy_and_extracts_kinetic_orders(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml")
+
+    bioml_model = BioML(mass_action_engine="ast")
+    bioml_model.read_file(str(tmp_path), "toy.xml")
+
+    reaction = bioml_model.get_list_of_reactions()[0]
+
+    cases = [("cell*(k1*A*B - k2*C)", {"A": 1.0, "B": 1.0}, {"C": 1.0}),
+             ("k1*A^2/cell - -k2*pow(C, 2)", None, None),
+             ("-(k2*C - k1*A*B)", {"A": 1.0, "B": 1.0}, {"C": 1.0}),
+             ("k1*pow(A, 2)*B", {"A": 2.0, "B": 1.0}, {})]
+
+    for kinetic_law, forward_orders, reverse_orders in cases:
+
+        reaction.expanded_kinetic_law = kinetic_law
+        reaction._forward_kinetic_orders = None
+        reaction._reverse_kinetic_orders = None
+
+        status, tier = bioml_model._model_checker._classify_kinetic_law_ast(bioml_model._biomlmodel, reaction)
+
+        if forward_orders is None:
+            # a sum of two positive terms is not decided on the tree
+            assert tier != MASS_ACTION_TIER_AST, kinetic_law
+            continue
+
+        assert (status, tier) == (True, MASS_ACTION_TIER_AST), kinetic_law
+        assert reaction.forward_kinetic_orders == forward_orders
+        assert reaction.reverse_kinetic_orders == reverse_orders
+
+    # a species in a denominator is passed on to the SymPy tiers
+    reaction.expanded_kinetic_law = "k1*A/(k2 + A)"
+    reaction.klaw_variables = ["k1", "A", "k2"]
+
+    assert bioml_model._model_checker._classify_kinetic_law_ast(bioml_model._biomlmodel, reaction) == (False, MASS_ACTION_TIER_CANCELLED)
+
+
+
+def test_ast_engine_agrees_with_the_sympy_tiers_and_keeps_the_model_version(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml")
+
+    bioml_model = BioML(mass_action_engine="ast")
+    bioml_model.read_file(str(tmp_path), "toy.xml")
+
+    model_checker = bioml_model._model_checker
+
+    reaction = bioml_model.get_list_of_reactions()[0]
+
+    reactant_a, reactant_b = reaction.get_list_of_reactants()
+    product_c, = reaction.get_list_of_products()
+
+    kinetic_laws = ["cell*(k1*A*B - k2*C)", "-(k2*C - k1*A*B)", "k1*pow(A, 2)*B", "k1*A^2/cell - -k2*pow(C, 2)",
+                    "(k1*A*B*C - k2*C^2)/C", "k1*A/(k2 + A)", "k1*A - k2*A", "k1*A", "k1"]
+
+    for reactants, products in [([reactant_a, reactant_b], [product_c]), ([reactant_a], []), ([], [product_c])]:
+
+        reaction.reactants = reactants
+        reaction.products = products
+
+        for kinetic_law in kinetic_laws:
+
+            reaction.expanded_kinetic_law = kinetic_law
+            reaction.klaw_variables = model_checker._get_variables(kinetic_law)
+
+            status, _ = model_checker._classify_kinetic_law_ast(bioml_model._biomlmodel, reaction)
+
+            assert status == model_checker._classify_kinetic_law(bioml_model._biomlmodel, reaction)[0], kinetic_law
+
+    reaction.reactants = [reactant_a, reactant_b]
+    reaction.products = [product_c]
+    reaction.expanded_kinetic_law = "k1*A*B - k2*C"
+
+    bioml_model.get_stoichiometric_matrix()
+
+    version = bioml_model._biomlmodel.version
+
+    reaction._forward_kinetic_orders = None
+    reaction._reverse_kinetic_orders = None
+
+    # inferring the kinetic orders does not invalidate the cached stoichiometric matrices
+    assert model_checker._classify_kinetic_law_ast(bioml_model._biomlmodel, reaction) == (True, MASS_ACTION_TIER_AST)
+    assert bioml_model._biomlmodel.version == version
+    assert reaction.forward_kinetic_orders == {"A": 1.0, "B": 1.0}
+
+
+def test_symbolic_operations_out_of_budget_leave_the_reaction_undetermined(tmp_path):
+
+    budget = SymbolicBudget(reaction_time_budget=60)
+
+    # the operation runs in a worker and its result is sent back
+    assert budget.run("R1", sp.cancel, (sp.Symbol("A")**2 - 1)/(sp.Symbol("A") - 1)) == sp.Symbol("A") + 1
+
+    with pytest.raises(ValueError):
+        SymbolicBudget(model_time_budget=0)
+
+    write_toy_model(tmp_path / "toy.xml")
+
+    bioml_model = BioML()
+    bioml_model.read_file(str(tmp_path), "toy.xml")
+
+    reactions = bioml_model.get_list_of_reactions()
+    reactions[0].expanded_kinetic_law = "k1*A/(k2 + A)"
+
+    # no worker finishes within a nanosecond, the structural laws of the other reactions need no symbolic operation
+    bioml_model._model_checker.symbolic_budget = SymbolicBudget(reaction_time_budget=1e-9)
+
+    assert bioml_model._model_checker.check_mass_action_kinetics(bioml_model._biomlmodel) is None
+    assert reactions[0].mass_action_tier == MASS_ACTION_TIER_UNDETERMINED
+    assert [reaction.mass_action_tier for reaction in reactions[1:]] == [MASS_ACTION_TIER_STRUCTURAL] * (len(reactions) - 1)
+    assert bioml_model._model_checker.symbolic_budget.timed_out == [reactions[0].ID]
+
+    with pytest.raises(SymbolicTimeout):
+        bioml_model._model_checker.symbolic_budget.run(reactions[0].ID, sp.simplify, sp.Symbol("A"))
+
+
+def test_model_time_budget_is_shared_by_all_reactions_and_a_dead_worker_is_reported():
+
+    budget = SymbolicBudget(reaction_time_budget=60, model_time_budget=0.1)
+
+    with pytest.raises(SymbolicTimeout):
+        budget.run("R1", time.sleep, 10)
+
+    # the model budget is spent, so the next reaction times out before a worker is started
+    assert budget.time_left("R2") <= 0
+
+    with pytest.raises(SymbolicTimeout):
+        budget.run("R2", sp.simplify, sp.Symbol("B"))
+
+    assert budget.timed_out == ["R1", "R2"]
+
+    # a worker which exits without sending a result names its reaction
+    with pytest.raises(RuntimeError, match="R3"):
+        SymbolicBudget(reaction_time_budget=60).run("R3", os._exit, 1)
+
+
+
+def test_symbolic_operations_share_one_worker_until_it_is_killed():
+
+    budget = SymbolicBudget(reaction_time_budget=0.5)
+
+    # the operations of all reactions run in the same worker process
+    worker_pid = budget.run("R1", os.getpid)
+
+    assert worker_pid != os.getpid()
+    assert budget.run("R2", os.getpid) == worker_pid
+
+    with pytest.raises(SymbolicTimeout):
+        budget.run("R3", time.sleep, 10)
+
+    # the killed worker is replaced by a new one
+    new_worker_pid = budget.run("R4", os.getpid)
+
+    assert new_worker_pid != worker_pid
+    assert budget.run("R5", os.getpid) == new_worker_pid
+
+    worker = budget._worker
+
+    budget.close()
+
+    assert not worker.is_alive() and budget._worker is None
+
+
+def test_rate_constant_search_out_of_budget_leaves_the_model_undetermined(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml")
+
+    bioml_model = BioML()
+    bioml_model.set_symbolic_time_budget(reaction_time_budget=1e-9)
+    bioml_model.read_file(str(tmp_path), "toy.xml")
+
+    # the laws are structural, but the search for their rate constants needs sympy.cancel and expand
+    assert bioml_model._biomlmodel.is_mass_action is None
+    assert {reaction.mass_action_tier for reaction in bioml_model.get_list_of_reactions()} == {MASS_ACTION_TIER_UNDETERMINED}
+
+    assert bioml_model.check_mass_action_kinetics() is None
+    assert bioml_model.verify_model() is None
+
+
+
+def test_cellml_equations_out_of_budget_are_kept_and_undetermined():
+
+    reader = CellmlReader()
+    reader._symbolic_budget = SymbolicBudget(reaction_time_budget=1e-9)
+
+    species = [libcellml.Variable(name) for name in ("A", "B", "C")]
+    variables = species + [libcellml.Variable(name) for name in ("k1", "k2", "v", "dA_dt")]
+
+    cellml_ast_nodes = [libsbml.parseL3Formula("v == k1*A*B - k2*C"), libsbml.parseL3Formula("dA_dt == -v")]
+
+    cellml_flattened_eqs = reader._flatten_equations(cellml_ast_nodes)
+
+    # the simplification timed out, the flattened equation is kept as it is
+    assert cellml_flattened_eqs == {"dA_dt": -(sp.Symbol("k1")*sp.Symbol("A")*sp.Symbol("B") - sp.Symbol("k2")*sp.Symbol("C"))}
+
+    mass_action = reader._find_cellml_mass_actions(cellml_vars_instances=variables, cellml_species_instances=species,
+                                                   cellml_ast_nodes=cellml_ast_nodes, cellml_flattened_eqs=cellml_flattened_eqs)
+
+    assert mass_action is None
+    assert reader._symbolic_budget.timed_out == ["dA_dt"]
@@ -0,0 +1,53 @@
+import numpy as np
+
+from bioml import BioML
+from _modules._model_reducer import ModelReducer
+from tests._toy_models import write_toy_model
+
+
+def test_reduction_prunes_lumps_and_merges():
+
+    #                    R0  R1  R2  R3  R4
+    stoichiometric = np.array([[-1,  1,  0, -1,  0],     # A
+                               [-1,  1,  0, -1,  0],     # B, same row as A
+                               [ 1, -1, -1,  1,  0],     # C
+                               [ 0,  0,  1,  0, -1],     # D
+                               [ 0,  0,  0,  0,  1]])    # E, dead end
+
+    reduced = ModelReducer.reduce(stoichiometric)
+
+    # R1 is the reverse and R3 a duplicate of R0; pruning E, D and then A (left in the lumped R0 only) removes everything
+    assert reduced.shape == (0, 0)
+    assert reduced.pruned_reactions.tolist() == [0, 1, 2, 3, 4]
+    assert [0, 1, 3] in [group.tolist() for group in reduced.pruned_reaction_groups]
+
+    consistent = np.log([2.0, 0.5, 7.0, 2.0, 3.0])
+    assert np.allclose(reduced.lumping_deviation(consistent), 0)
+    assert np.abs(reduced.lumping_deviation(np.log([2.0, 2.0, 2.0, 1.0, 1.0]))).max() > 0.5
+
+    unpruned = ModelReducer.reduce(stoichiometric, prune_dead_ends=False)
+
+    assert unpruned.shape == (4, 3)
+    assert [group.tolist() for group in unpruned.species_groups] == [[0, 1], [2], [3], [4]]
+    assert unpruned.reaction_groups[0].tolist() == [0, 1, 3]
+    assert unpruned.reaction_signs[0].tolist() == [1, -1, 1]
+    assert unpruned.original_reactions([0]).tolist() == [0, 1, 3]
+
+
+def test_reduced_checks_match_full_checks(tmp_path):
+
+    for consistent in (True, False):
+
+        write_toy_model(tmp_path / "toy.xml", consistent=consistent, extra_component=True)
+
+        bioml_model = BioML()
+        bioml_model.read_file(str(tmp_path), "toy.xml")
+
+        full = bioml_model.check_kinetic_constants_thermo_compatibility(raise_error=True)
+
+        assert bioml_model.check_kinetic_constants_thermo_compatibility(raise_error=True, reduce=True) is full
+        assert bioml_model.check_kinetic_constants_thermo_compatibility(raise_error=True, reduce=True, by_component=True) is full
+        assert bioml_model.check_mass_balance(reduce=True) is bioml_model.check_mass_balance() is True
+
+        # A and B are merged and E <-> F is pruned
+        assert bioml_model._matrix_constructor.reduce_network(bioml_model._biomlmodel).shape == (3, 3)
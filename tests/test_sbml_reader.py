@@ -0,0 +1,129 @@
+import libsbml
+import sympy as sp
+
+from bioml import BioML
+from _classes.cBioMLSpecies import BioMLSpecies
+from _classes.cBioMLFunctionDefinition import BioMLFunctionDefinition
+from _modules._sbml_reader import SbmlReader
+from _modules._constants import SOURCE_FBC, SOURCE_SBML_CHARGE
+from _modules._constants import KINETIC_LAW_FORM_PARSED, KINETIC_LAW_FORM_CANCELLED, KINETIC_LAW_FORM_EXPANDED, MASS_ACTION_TIER_STRUCTURAL
+from _modules._ast_to_sympy import ast_to_sympy, formula_to_sympy, get_symbol
+from tests._toy_models import write_toy_model
+
+
+def test_fbc_formula_and_charge_are_used_before_chebi():
+
+    document = libsbml.SBMLDocument(libsbml.SBMLNamespaces(3, 1, "fbc", 2))
+    libsbml_species = document.createModel().createSpecies()
+    libsbml_species.getPlugin("fbc").setChemicalFormula("HCO3")
+    libsbml_species.getPlugin("fbc").setCharge(-1)
+
+    species = BioMLSpecies("hco3")
+    SbmlReader._set_composition_and_charge(species, libsbml_species)
+
+    assert species.composition == {"H": 1.0, "C": 1.0, "O": 3.0}
+    assert species.charge == -1
+    assert species.composition_source == SOURCE_FBC
+    assert species.charge_source == SOURCE_FBC
+
+
+def test_species_charge_attribute_is_used_without_fbc():
+
+    document = libsbml.SBMLDocument(2, 1)
+    libsbml_species = document.createModel().createSpecies()
+    libsbml_species.setCharge(2)
+
+    species = BioMLSpecies("ca")
+    SbmlReader._set_composition_and_charge(species, libsbml_species)
+
+    assert species.charge == 2
+    assert species.charge_source == SOURCE_SBML_CHARGE
+    assert species.composition_source is None
+
+
+def test_kinetic_law_is_parsed_once_and_shared(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml")
+
+    bioml_model = BioML()
+    bioml_model.read_file(str(tmp_path), "toy.xml")
+
+    assert bioml_model.check_mass_action_kinetics() is True
+
+    for reaction in bioml_model.get_list_of_reactions():
+
+        # the reader cancelled and expanded the law from one parse, the mass-action checker decided on the parsed tree without simplifying it
+        assert set(reaction._sympy_forms[reaction.expanded_kinetic_law]) == {KINETIC_LAW_FORM_PARSED, KINETIC_LAW_FORM_CANCELLED, KINETIC_LAW_FORM_EXPANDED}
+        assert reaction.mass_action_tier == MASS_ACTION_TIER_STRUCTURAL
+
+        assert reaction.get_sympy_kinetic_law() is reaction.sp_kinetic_law
+
+    reaction = bioml_model.get_list_of_reactions()[0]
+    reaction.expanded_kinetic_law = "k1*A*B"
+
+    assert reaction.get_sympy_kinetic_law(KINETIC_LAW_FORM_EXPANDED) == sp.Symbol("k1") * sp.Symbol("A") * sp.Symbol("B")
+    assert list(reaction._sympy_forms) == ["k1*A*B"]
+
+
+
+def test_math_is_translated_to_sympy_without_parsing_strings():
+
+    lambda_, beta, E, x = (get_symbol(name) for name in ("lambda", "beta", "E", "x"))
+
+    assert get_symbol("beta") is beta
+
+    # names which are Python keywords or Sympy constants and functions stay plain symbols
+    assert formula_to_sympy("lambda * beta^2 / E") == lambda_ * beta**2 / E
+    assert formula_to_sympy("log(x) + pow(x, 3) - root(3, x) + exponentiale") == sp.log(x) + x**3 - x**sp.Rational(1, 3) + sp.E
+
+    document = libsbml.SBMLDocument(3, 1)
+    function_definition = document.createModel().createFunctionDefinition()
+    function_definition.setId("mass_action")
+    function_definition.setMath(libsbml.parseL3Formula("lambda(k, S, k * S)"))
+
+    function_definitions = {"mass_action": BioMLFunctionDefinition(function_definition)}
+
+    # calls of function definitions are expanded on the tree, other calls become undefined functions
+    assert ast_to_sympy(libsbml.parseL3Formula("mass_action(beta, x) - g(x)"), function_definitions) == beta * x - sp.Function("g")(x)
+
+
+def test_math_translation_agrees_with_the_l3_string_parser():
+
+    A, B, k1, k2, x, t = (get_symbol(name) for name in ("A", "B", "k1", "k2", "x", "t"))
+
+    # laws Sympy can also parse from their L3 string
+    for formula in ("k1*A^2/(k2 + A) - k2*exp(-B)", "-(k2*B - k1*A*B)/2.5", "k1*sqrt(A)*abs(B)^3 - ln(k2)"):
+
+        l3_string = libsbml.formulaToL3String(libsbml.parseL3Formula(formula))
+
+        symbols = {name: get_symbol(name) for name in ("A", "B", "k1", "k2")}
+
+        assert ast_to_sympy(libsbml.parseL3Formula(formula)) == sp.sympify(l3_string.replace("^", "**"), locals=symbols), formula
+
+    document = libsbml.SBMLDocument(3, 1)
+    function_definition = document.createModel().createFunctionDefinition()
+    function_definition.setId("hill")
+    function_definition.setMath(libsbml.parseL3Formula("lambda(S, K, n, S^n / (K^n + S^n))"))
+
+    function_definitions = {"hill": BioMLFunctionDefinition(function_definition)}
+
+    cases = [("piecewise(k1*A, A > 2, k2*B, A <= 2)", sp.Piecewise((k1 * A, A > 2), (k2 * B, A <= 2))),
+             ("piecewise(k1*A, A > 2, k2)", sp.Piecewise((k1 * A, A > 2), (k2, True))),
+             ("log(2, x) + log10(x)", sp.log(x, 2) + sp.log(x, 10)),
+             ("k1 * hill(A, k2, 2)", k1 * A**2 / (k2**2 + A**2))]
+
+    for formula, expected in cases:
+
+        ast_node = libsbml.parseL3Formula(formula)
+
+        assert ast_to_sympy(ast_node, function_definitions) == expected, formula
+
+        # the L3 string of the tree is parsed back to the same tree
+        assert ast_to_sympy(libsbml.parseL3Formula(libsbml.formulaToL3String(ast_node)), function_definitions) == expected, formula
+
+    # the csymbol time becomes a plain symbol with the name of the element
+    ast_node = libsbml.readMathMLFromString('<math xmlns="http://www.w3.org/1998/Math/MathML"><apply><times/><ci>k1</ci>'
+                                            '<csymbol encoding="text" definitionURL="http://www.sbml.org/sbml/symbols/time">t</csymbol></apply></math>')
+
+    assert ast_node.getChild(1).getType() == libsbml.AST_NAME_TIME
+    assert ast_to_sympy(ast_node) == k1 * t
@@ -0,0 +1,69 @@
+import numpy as np
+import sympy as sp
+
+from bioml import BioML
+from tests._toy_models import write_toy_model
+
+
+def test_conditions_of_the_toy_cycle(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml", extra_component=True)
+
+    bioml_model = BioML()
+    bioml_model.read_file(str(tmp_path), "toy.xml")
+
+    conditions = bioml_model.get_wegscheider_conditions()
+
+    assert len(conditions) == 1
+
+    k1, k2, k3, k4, k5, k6 = sp.symbols("k1:7", positive=True)
+    ratio = conditions.ratios[0]
+    assert sp.simplify(ratio - k1 * k3 * k5 / (k2 * k4 * k6)) == 0 or sp.simplify(ratio - k2 * k4 * k6 / (k1 * k3 * k5)) == 0
+
+    # k6 is the only unknown constant
+    verdict, = conditions.check_symbolic({"k1": 2, "k2": 1, "k3": 3, "k4": 1.5, "k5": 1})
+    assert [float(solution) for solution in sp.solve(verdict, k6)] == [4.0]
+
+    assert conditions.check_symbolic({"k1": 2, "k2": 1, "k3": 3, "k4": 1.5, "k5": 1, "k6": 4}) == [True]
+
+    values = {"k1": 2.0, "k2": 1.0, "k3": 3.0, "k4": 1.5, "k5": 1.0, "k6": np.array([4.0, 5.0, -1.0])}
+    compatible, deviation = conditions.evaluate(values)
+
+    assert compatible.tolist() == [True, False, False]
+    assert np.isclose(abs(deviation[0, 1]), np.log(5 / 4) / np.sqrt(3))
+
+
+def test_violations_are_localized_to_the_cycle_and_its_reactions(tmp_path):
+
+    write_toy_model(tmp_path / "toy.xml", consistent=False, extra_component=True)
+
+    bioml_model = BioML()
+    bioml_model.read_file(str(tmp_path), "toy.xml")
+
+    violations = bioml_model.get_thermodynamic_violations()
+
+    assert sorted(violations["reaction"]) == ["R1", "R2", "R3"]
+    assert violations["cycle"].nunique() == 1
+    assert np.allclose(np.abs(violations["deviation"]), np.log(5 / 4) / np.sqrt(3))
+
+    forward = np.array([[2.0, 3.0, 1.0, 1.0], [2.0, 3.0, 1.0, 1.0], [2.0, 3.0, 1.0, 1.0]])
+    reverse = np.array([[1.0, 1.5, 4.0, 2.0], [1.0, 1.5, 5.0, 2.0], [1.0, 1.5, 6.0, 2.0]])
+
+    batch = bioml_model.get_thermodynamic_violations(forward_rates=forward, reverse_rates=reverse)
+
+    assert batch.groupby("candidate")["reaction"].count().to_dict() == {1: 3, 2: 3}
+
+
+def test_rate_constants_named_like_keywords_are_symbols():
+
+    from _modules._wegscheider_conditions import WegscheiderConditions
+
+    # the cycle R1 -> R2 -> R3 with forward constants named like Python keywords
+    conditions = WegscheiderConditions(np.array([[1], [1], [1]]), ["lambda", "if", "k3"], ["k4", "k5", "k6"], ["R1", "R2", "R3"])
+
+    assert sorted(str(symbol) for symbol in conditions.ratios[0].free_symbols) == ["if", "k3", "k4", "k5", "k6", "lambda"]
+    assert conditions.check_symbolic({"lambda": 2, "if": 3, "k3": 1, "k4": 1, "k5": 6, "k6": 1}) == [True]
+
+    compatible, _ = conditions.evaluate({"lambda": 2.0, "if": np.array([3.0, 4.0]), "k3": 1.0, "k4": 1.0, "k5": 6.0, "k6": 1.0})
+
+    assert compatible.tolist() == [True, False]